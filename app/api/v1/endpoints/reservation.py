@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Header, Response, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List, Union, Dict
 from datetime import date
-from app.deps import get_db, get_current_user, get_current_admin
+import asyncio
+import json
+from app.core.config import settings
+from app.core.availability_hub import availability_hub
+from app.core.idempotency import idempotency_store, request_fingerprint
+from app.core.admission import admission_controller
+from app.deps import get_db, get_db_session, run_with_session, get_current_user, get_current_admin
 from app.models.user import User
 from app.models.reservation import ReservationStatus
 from app.schemas.venue_available_time_slot import VenueAvailabilityRead
 from app.services.venue_service import VenueService
 from app.services.reservation_service import ReservationService
+from app.services.waiting_list_service import WaitingListService
 from app.schemas.reservation import ReservationCreate, ReservationUpdate, ReservationRead, \
     ReservationDetailRead, PaginatedReservationResponse, \
     RecurringReservationCreate, RecurringReservationRead, RecurringReservationUpdate, ReservationConfirmationResult
-from app.schemas.reservation import VenueCalendarResponse, ConflictCheckResult
-from app.schemas.waiting_list import WaitingListRead
+from app.schemas.reservation import VenueCalendarResponse, ConflictCheckResult, ReservationBulkUpdate, BulkReservationResult
+from app.schemas.waiting_list import WaitingListRead, WaitingListPosition
 from app.core.exceptions import ReservationException, ReservationNotFoundError, InvalidReservationStatusError, \
     InvalidCheckInTimeError
 from app.core.exceptions import ReservationConflictError, DatabaseError
@@ -26,36 +34,57 @@ router = APIRouter()
 
 @router.post("/reservations", response_model=Union[List[ReservationRead], List[WaitingListRead]],
              status_code=status.HTTP_201_CREATED)
-def create_reservation(
+async def create_reservation(
         reservation: ReservationCreate,
+        idempotency_key: Optional[str] = Header(None),
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db_session)
 ):
     """
     Create a new reservation or add to waiting list if there's a conflict.
 
     This endpoint creates a new reservation for the current user. If there's a conflict
     (e.g., the time slot is already fully booked), it adds the user to the waiting list.
+
+    With an ``Idempotency-Key`` header, retries with the same key and body return the stored response
+    (marked with ``Idempotent-Replayed: true``) without creating the reservation again.
     """
     logger.info(f"Received reservation data: {reservation}")
-    reservation_service = ReservationService(db)
-    try:
-        # Ensure the user_id in the reservation matches the current user
-        if reservation.user_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User ID mismatch")
 
-        result = reservation_service.create_reservation(reservation)
-        logger.info(f"Reservation created for user {current_user.id}: {result}")
-        return result
-    except ReservationConflictError as e:
-        logger.warning(f"Reservation conflict for user {current_user.id}: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
-    except DatabaseError as e:
-        logger.error(f"Database error during reservation creation: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred")
-    except Exception as e:
-        logger.error(f"Unexpected error during reservation creation: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    async def create():
+        try:
+            # Ensure the user_id in the reservation matches the current user
+            if reservation.user_id != current_user.id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User ID mismatch")
+
+            # 按场馆排队准入，同一时间段的请求串行写入；过载时返回 503 + Retry-After
+            slot_key = (reservation.date, reservation.start_time, reservation.end_time)
+            async with admission_controller.admit(reservation.venue_id, slot_key):
+                result = await run_with_session(
+                    db, lambda session: ReservationService(session).create_reservation(reservation)
+                )
+            logger.info(f"Reservation created for user {current_user.id}: {result}")
+            return result
+        except ReservationConflictError as e:
+            logger.warning(f"Reservation conflict for user {current_user.id}: {str(e)}")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except DatabaseError as e:
+            logger.error(f"Database error during reservation creation: {str(e)}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                detail="An unexpected error occurred")
+        except HTTPException:
+            # 两者都是 HTTPException 子类，须在上面先处理；其余（403、503 + Retry-After 等）原样抛出
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during reservation creation: {str(e)}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if idempotency_key is None:
+        return await create()
+    # 重放的请求直接返回保存的响应，不会访问时间段、规则和配额
+    return await idempotency_store.execute(
+        current_user.id, idempotency_key, request_fingerprint(reservation), create, status.HTTP_201_CREATED
+    )
 
 
 @router.get("/reservations/{reservation_id}", response_model=ReservationDetailRead)
@@ -89,6 +118,8 @@ def get_reservation(
 def get_all_reservations(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+    include_total: Optional[bool] = Query(None, description="Whether to compute total_count"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -96,8 +127,10 @@ def get_all_reservations(
     Retrieve all reservations with pagination.
 
     Args:
-        skip (int): The number of reservations to skip (for pagination).
+        skip (int): The number of reservations to skip (for pagination). Ignored when cursor is given.
         limit (int): The maximum number of reservations to return (for pagination).
+        cursor (str): Keyset cursor for the next page; makes every page cost the same.
+        include_total (bool): Compute total_count. Defaults to true without cursor, false with cursor.
         current_user (User): The authenticated user making the request.
         db (Session): The database session.
     """
@@ -105,13 +138,16 @@ def get_all_reservations(
         raise HTTPException(status_code=403, detail="Only administrators can view all reservations")
 
     reservation_service = ReservationService(db)
-    reservations, total_count = reservation_service.get_all_reservations(skip=skip, limit=limit)
+    reservations, total_count, next_cursor = reservation_service.get_all_reservations(
+        skip=skip, limit=limit, cursor=cursor, include_total=include_total
+    )
 
     return PaginatedReservationResponse(
         reservations=reservations,
         total_count=total_count,
         page=skip // limit + 1,
-        page_size=limit
+        page_size=limit,
+        next_cursor=next_cursor
     )
 
 
@@ -138,14 +174,15 @@ def update_reservation(
 
 
 @router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_reservation(
+async def cancel_reservation(
         reservation_id: int,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db_session)
 ):
-    reservation_service = ReservationService(db)
     try:
-        reservation_service.cancel_reservation(reservation_id, current_user.id)
+        await run_with_session(
+            db, lambda session: ReservationService(session).cancel_reservation(reservation_id, current_user.id)
+        )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -179,6 +216,21 @@ def get_waiting_list(
     return reservation_service.get_waiting_list(venue_id)
 
 
+@router.get("/waiting-list/status", response_model=List[WaitingListPosition])
+def get_waiting_list_status(
+        venue_id: Optional[int] = None,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Get the current user's waiting list entries and their queue positions.
+
+    Positions are answered from a per-slot ordered queue cache, so the endpoint can be polled frequently.
+    """
+    waiting_list_service = WaitingListService(db)
+    return waiting_list_service.check_user_waiting_list_status(current_user.id, venue_id)
+
+
 @router.post("/reservations/check-conflict", response_model=ConflictCheckResult)
 def check_reservation_conflict(
         reservation: ReservationCreate,
@@ -200,11 +252,14 @@ def check_reservation_conflict(
 
 @router.get("/venues/{venue_id}/calendar", response_model=VenueCalendarResponse)
 def get_venue_calendar(
+    response: Response,
     venue_id: int,
     start_date: Optional[date] = Query(None, description="Start date for calendar data"),
     end_date: Optional[date] = Query(None, description="End date for calendar data"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    include_reservations: bool = Query(False, description="Include reservation details (admin only)"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -212,13 +267,24 @@ def get_venue_calendar(
         Retrieve the calendar data for a specific venue.
 
         This endpoint returns paginated calendar data for the specified venue,
-        including time slots and their reservations. It supports optional date range filtering.
+        including time slots with their booked/free counts. It supports optional date range filtering.
+        Admins can pass include_reservations=true to also get the reservations of each slot.
+        Responses carry an ETag; send it back in If-None-Match to get 304 when nothing changed.
     """
+    if include_reservations and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Only administrators can view reservation details")
     try:
         reservation_service = ReservationService(db)
+        etag = reservation_service.get_venue_calendar_etag(
+            venue_id, start_date, end_date, page, page_size, include_reservations
+        )
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
         calendar_data = reservation_service.get_venue_calendar(
-            venue_id, start_date, end_date, page, page_size
+            venue_id, start_date, end_date, page, page_size, include_reservations
         )
+        response.headers["ETag"] = etag
         return calendar_data
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -233,17 +299,22 @@ def get_user_reservations(
     status: Optional[ReservationStatus] = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
     Retrieve paginated reservations for a specific user.
 
     This endpoint returns a paginated list of reservations for the specified user.
-    It supports optional filtering by venue and reservation status.
+    It supports optional filtering by venue and reservation status, and keyset
+    pagination through the next_cursor returned with each page.
     """
     reservation_service = ReservationService(db)
     try:
-        return reservation_service.get_user_reservations(user_id, venue_id, status, page, page_size)
+        return reservation_service.get_user_reservations(
+            user_id, venue_id, status, page, page_size, cursor=cursor, include_total=include_total
+        )
     except ReservationNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ReservationException as e:
@@ -302,6 +373,8 @@ def get_user_reservation_history(
         end_date: Optional[date] = None,
         page: int = Query(1, ge=1),
         page_size: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        include_total: Optional[bool] = None,
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
@@ -309,21 +382,38 @@ def get_user_reservation_history(
         raise HTTPException(status_code=403, detail="Not authorized to view this user's history")
 
     reservation_service = ReservationService(db)
-    return reservation_service.get_user_reservation_history(user_id, start_date, end_date, page, page_size)
+    try:
+        return reservation_service.get_user_reservation_history(
+            user_id, start_date, end_date, page, page_size, cursor=cursor, include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # 场地可用性检查
 @router.get("/venues/{venue_id}/availability", response_model=List[VenueAvailabilityRead])
-def check_venue_availability(
+async def check_venue_availability(
+    response: Response,
     venue_id: int,
     start_date: date,
     end_date: date,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_session)
 ):
-    venue_service = VenueService(db)
+    def load(session: Session):
+        venue_service = VenueService(session)
+        # ETag 只依赖内存中的可用性快照，未变化时直接返回 304
+        etag = venue_service.get_availability_etag(venue_id, start_date, end_date)
+        if if_none_match == etag:
+            return etag, None
+        return etag, venue_service.check_venue_availability(venue_id, start_date, end_date)
+
     try:
-        availability = venue_service.check_venue_availability(venue_id, start_date, end_date)
+        etag, availability = await run_with_session(db, load)
+        if availability is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return availability
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -333,8 +423,48 @@ def check_venue_availability(
         raise HTTPException(status_code=500, detail="An error occurred while checking venue availability")
 
 
+# 场地可用性推送（Server-Sent Events），替代轮询 /availability
+@router.get("/venues/{venue_id}/availability/stream")
+async def stream_venue_availability(
+    request: Request,
+    venue_id: int,
+    start_date: date,
+    end_date: date,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Subscribe to capacity changes of the venue's time slots between start_date and end_date.
+
+    Fetch /availability once, then apply the events of this stream:
+    - ``capacity``: new remaining capacity of one slot;
+    - ``reload``: slots of ``date`` (all dates when null) were added, edited or removed, refetch them;
+    - ``resync``: events were dropped because the client fell behind, refetch the whole range.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    subscription = availability_hub.subscribe(venue_id, start_date, end_date)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(),
+                                                   timeout=settings.AVAILABILITY_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # 心跳，防止代理关闭空闲连接
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            availability_hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 # 批量预约操作（适用于管理员）
-@router.post("/reservations/bulk", response_model=List[ReservationRead])
+@router.post("/reservations/bulk", response_model=BulkReservationResult)
 def bulk_create_reservations(
     reservations: List[ReservationCreate],
     current_user: User = Depends(get_current_admin),
@@ -344,9 +474,9 @@ def bulk_create_reservations(
     return reservation_service.bulk_create_reservations(reservations)
 
 
-@router.put("/reservations/bulk", response_model=List[ReservationRead])
+@router.put("/reservations/bulk", response_model=BulkReservationResult)
 def bulk_update_reservations(
-    reservations: List[ReservationUpdate],
+    reservations: List[ReservationBulkUpdate],
     current_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
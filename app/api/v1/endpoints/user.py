@@ -8,7 +8,7 @@ import uuid
 
 from app.core.security import create_access_token
 from app.core.config import settings
-from app.deps import get_db
+from app.deps import get_db, get_db_session, run_with_session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserDashboardResponse, \
     UpcomingReservation, RecentActivity, RecommendedVenue
@@ -30,10 +30,10 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     try:
         user_service = UserService(db)
-        user = user_service.authenticate_user(form_data.username, form_data.password)
+        user = await user_service.authenticate_user(form_data.username, form_data.password)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid username or password")
         access_token = create_access_token({"sub": user.username})
@@ -43,8 +43,8 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = D
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
+def get_current_user_info(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return UserService(db).get_user(user_id=current_user.id)
 
 
 @router.post("/me/avatar")
@@ -75,14 +75,12 @@ async def upload_avatar(
 
 
 @router.get("/dashboard", response_model=UserDashboardResponse)
-def get_user_dashboard(
+async def get_user_dashboard(
         user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db_session)
 ):
-    user_service = UserService(db)
-
     try:
-        dashboard_data = user_service.get_dashboard_data(user.id)
+        dashboard_data = await run_with_session(db, lambda session: UserService(session).get_dashboard_data(user.id))
         return dashboard_data
     except Exception as e:
         logger.error(f"Error retrieving user dashboard data: {str(e)}")
@@ -117,7 +115,7 @@ def get_recommended_venues(
 ):
     user_service = UserService(db)
     logger.info(f"Recommend {limit} Venues for user.")
-    return user_service.get_recommended_venues(current_user, limit)
+    return user_service.get_recommended_venues(user_service.get_user(user_id=current_user.id), limit)
 
 
 @router.get("/monthly-reservation-info", response_model=dict)
@@ -196,6 +194,8 @@ def get_user_reservation_history(
         end_date: Optional[date] = None,
         page: int = Query(1, ge=1),
         page_size: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        include_total: Optional[bool] = None,
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
@@ -206,7 +206,9 @@ def get_user_reservation_history(
         raise AuthorizationError("Not authorized to view this user's history")
 
     try:
-        return user_service.get_user_reservation_history(user_id, start_date, end_date, page, page_size)
+        return user_service.get_user_reservation_history(
+            user_id, start_date, end_date, page, page_size, cursor=cursor, include_total=include_total
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
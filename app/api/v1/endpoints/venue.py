@@ -4,8 +4,10 @@ from typing import List, Optional
 from app.deps import get_db, get_current_user, get_current_admin
 from app.models.user import User
 from app.models.venue import VenueStatus
-from app.schemas.venue import VenueCreate, VenueUpdate, VenueRead, VenueStats
+from app.schemas.venue import VenueCreate, VenueUpdate, VenueRead, VenueStats, VenueSlotTemplateEntry, \
+    VenueSlotTemplateRead
 from app.services.venue_service import VenueService
+from app.services.venue_slot_template_service import VenueSlotTemplateService
 from app.core.exceptions import VenueNotFoundError, VenueCreateError, VenueUpdateError, VenueDeleteError
 
 router = APIRouter()
@@ -139,6 +141,33 @@ def create_venues_batch(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+
+@router.get("/venues/{venue_id}/slot-template", response_model=VenueSlotTemplateRead)
+def get_venue_slot_template(
+    venue_id: int,
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    try:
+        return VenueSlotTemplateService(db).get_template(venue_id)
+    except VenueNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.put("/venues/{venue_id}/slot-template", response_model=VenueSlotTemplateRead)
+def replace_venue_slot_template(
+    venue_id: int,
+    entries: List[VenueSlotTemplateEntry],
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    try:
+        return VenueSlotTemplateService(db).replace_template(venue_id, entries)
+    except VenueNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except VenueUpdateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 # @router.get("/{venue_id}/facilities", response_model=List[FacilityRead])
 # def get_venue_facilities(venue_id: int, db: Session = Depends(get_db)):
 #     venue_service = VenueService(db)
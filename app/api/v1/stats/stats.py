@@ -9,6 +9,12 @@ from app.schemas.stats import (UserReservationStats,
                                FacilityUsageStats)
 from app.deps import get_db, get_current_admin, get_current_user
 from app.services.stats_service import StatsService
+from app.core.cache import cache_stats
+from app.core.password_hasher import password_hasher
+from app.core.availability_hub import availability_hub
+from app.core.admission import admission_controller
+from app.db.database import engine, async_engine
+from app.db.pool_metrics import pool_status
 
 router = APIRouter()
 
@@ -66,3 +72,36 @@ def get_admin_dashboard_stats(
 ):
     stats_service = StatsService(db)
     return stats_service.get_dashboard_stats()
+
+
+@router.get('/cache')
+def get_cache_stats(current_admin: User = Depends(get_current_admin)):
+    # 各进程内缓存（及共享缓存客户端）的命中、未命中和淘汰计数，数据为当前进程的值
+    return cache_stats()
+
+
+@router.get('/password-hasher')
+def get_password_hasher_stats(current_admin: User = Depends(get_current_admin)):
+    # 密码哈希进程池的队列深度、拒绝次数和平均耗时（当前进程）
+    return password_hasher.stats()
+
+
+@router.get('/db-pool')
+def get_db_pool_stats(current_admin: User = Depends(get_current_admin)):
+    # 当前进程数据库连接池的实时指标
+    pools = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine)
+    return pools
+
+
+@router.get('/availability-hub')
+def get_availability_hub_stats(current_admin: User = Depends(get_current_admin)):
+    # 当前进程的可用性推送订阅数
+    return availability_hub.stats()
+
+
+@router.get('/admission')
+async def get_admission_stats(current_admin: User = Depends(get_current_admin)):
+    # 预约准入队列的深度、等待时间和拒绝次数（当前进程）；队列只在事件循环线程中修改，因此在事件循环中读取
+    return admission_controller.stats()
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Hashable, Optional, Set
+
+from app.core.config import settings, get_logger
+from app.core.exceptions import ServiceOverloadedError
+
+logger = get_logger(__name__)
+
+
+class AdmissionStats:
+    """一个场馆队列的准入计数、等待时间和平均处理时间"""
+
+    def __init__(self):
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_service = 0.0  # 指数移动平均，用于估算排队时间
+
+    def record_admitted(self, waited: float) -> None:
+        self.admitted += 1
+        if waited:
+            self.queued += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def record_service(self, duration: float) -> None:
+        self.avg_service = duration if not self.avg_service else 0.8 * self.avg_service + 0.2 * duration
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait * 1000 / self.queued, 3) if self.queued else None,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_service_ms": round(self.avg_service * 1000, 3)
+        }
+
+
+class _Waiter:
+    __slots__ = ("slot_key", "future", "enqueued_at")
+
+    def __init__(self, slot_key: Optional[Hashable], future: asyncio.Future):
+        self.slot_key = slot_key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class VenueQueue:
+    """
+    一个场馆的有界准入队列。
+
+    同时执行的预约写入不超过 concurrency 个，其余请求按到达顺序排队；
+    同一时间段（slot_key）同时只放行一个写入者，后到的同时段请求保持队列位置，
+    不阻塞其他时间段的请求。只在事件循环线程中访问，不需要加锁。
+    """
+
+    def __init__(self, concurrency: int, max_queue: int):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.active_slots: Set[Hashable] = set()
+        self.waiters: Deque[_Waiter] = deque()
+        self.stats = AdmissionStats()
+
+    def _can_run(self, slot_key: Optional[Hashable]) -> bool:
+        return self.active < self.concurrency and (slot_key is None or slot_key not in self.active_slots)
+
+    def _start(self, slot_key: Optional[Hashable]) -> None:
+        self.active += 1
+        if slot_key is not None:
+            self.active_slots.add(slot_key)
+
+    def estimated_wait(self, position: int) -> float:
+        return position / self.concurrency * self.stats.avg_service
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.estimated_wait(len(self.waiters) + 1)))
+
+    async def acquire(self, slot_key: Optional[Hashable]) -> None:
+        # _dispatch 之后仍在排队的请求都在等待忙碌的时间段，可以直接执行的新请求不必排在它们后面
+        if self._can_run(slot_key):
+            self._start(slot_key)
+            self.stats.record_admitted(0)
+            return
+
+        # 队列已满，或预计等待时间超过上限时立即拒绝，避免请求排队到超时
+        if (len(self.waiters) >= self.max_queue
+                or self.estimated_wait(len(self.waiters) + 1) > settings.ADMISSION_MAX_WAIT_SECONDS):
+            self.stats.shed += 1
+            raise ServiceOverloadedError("Too many booking requests for this venue, please retry later",
+                                         retry_after=self.retry_after())
+
+        waiter = _Waiter(slot_key, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter.future,), timeout=settings.ADMISSION_MAX_WAIT_SECONDS)
+        except BaseException:
+            # 请求被取消（客户端断开）：已获准入则归还，否则离开队列
+            if waiter.future.done():
+                self.release(slot_key)
+            else:
+                self._abandon(waiter)
+            raise
+        if not waiter.future.done():
+            self._abandon(waiter)
+            self.stats.timeouts += 1
+            raise ServiceOverloadedError("Booking queue wait timed out, please retry later",
+                                         retry_after=self.retry_after())
+        self.stats.record_admitted(time.monotonic() - waiter.enqueued_at)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, slot_key: Optional[Hashable], duration: Optional[float] = None) -> None:
+        self.active -= 1
+        if slot_key is not None:
+            self.active_slots.discard(slot_key)
+        if duration is not None:
+            self.stats.record_service(duration)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # 按到达顺序放行第一个可以执行的等待者；时间段已有写入者的请求保留原位置
+        if self.active >= self.concurrency or not self.waiters:
+            return
+        for waiter in list(self.waiters):
+            if self.active >= self.concurrency:
+                break
+            if self._can_run(waiter.slot_key):
+                self.waiters.remove(waiter)
+                self._start(waiter.slot_key)
+                waiter.future.set_result(None)
+
+    def status(self) -> Dict[str, Any]:
+        status = {"active": self.active, "queue_depth": len(self.waiters)}
+        status.update(self.stats.as_dict())
+        return status
+
+
+class AdmissionController:
+    """预约写入接口前的按场馆准入控制（当前进程）"""
+
+    def __init__(self):
+        self._venues: Dict[int, VenueQueue] = {}
+
+    def _queue(self, venue_id: int) -> VenueQueue:
+        queue = self._venues.get(venue_id)
+        if queue is None:
+            queue = self._venues[venue_id] = VenueQueue(settings.ADMISSION_VENUE_CONCURRENCY,
+                                                        settings.ADMISSION_VENUE_QUEUE_SIZE)
+        return queue
+
+    @asynccontextmanager
+    async def admit(self, venue_id: int, slot_key: Optional[Hashable] = None):
+        """
+        在 venue_id 的队列中排队并执行，slot_key 相同的请求串行执行。
+
+        队列已满或等待超时时抛出 ServiceOverloadedError（503 + Retry-After）。
+        """
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        queue = self._queue(venue_id)
+        await queue.acquire(slot_key)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            queue.release(slot_key, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        venues = {venue_id: queue.status() for venue_id, queue in self._venues.items()}
+        return {
+            "enabled": settings.ADMISSION_ENABLED,
+            "active": sum(status["active"] for status in venues.values()),
+            "queue_depth": sum(status["queue_depth"] for status in venues.values()),
+            "shed": sum(status["shed"] for status in venues.values()),
+            "timeouts": sum(status["timeouts"] for status in venues.values()),
+            "venues": venues
+        }
+
+
+admission_controller = AdmissionController()
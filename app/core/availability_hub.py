@@ -0,0 +1,209 @@
+import asyncio
+import json
+import queue
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.config import settings, get_logger
+from app.core.exceptions import ServiceOverloadedError
+
+try:
+    import redis
+except ImportError:  # 跨进程推送后端是可选的
+    redis = None
+
+logger = get_logger(__name__)
+
+# 订阅者队列溢出时推送的事件：客户端应重新拉取可用性
+RESYNC_EVENT = {"type": "resync"}
+
+
+def capacity_event(venue_id: int, slot_date: date, slot_id: int, remaining: int) -> Dict[str, Any]:
+    return {"type": "capacity", "venue_id": venue_id, "date": slot_date.isoformat(),
+            "slot_id": slot_id, "remaining": remaining}
+
+
+def reload_event(venue_id: int, slot_date: Optional[date] = None) -> Dict[str, Any]:
+    """时间段被增删改：该日期（未指定时为所有日期）需要重新拉取"""
+    return {"type": "reload", "venue_id": venue_id, "date": slot_date.isoformat() if slot_date else None}
+
+
+class Subscription:
+    """一个客户端对 (venue_id, [start_date, end_date]) 的订阅，事件放入绑定到其事件循环的有界队列"""
+
+    def __init__(self, venue_id: int, start_date: date, end_date: date, max_queue: int):
+        self.venue_id = venue_id
+        self.start_date = start_date.isoformat()
+        self.end_date = end_date.isoformat()
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        event_date = event.get("date")
+        return event_date is None or self.start_date <= event_date <= self.end_date
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        # 在订阅者的事件循环中执行；队列满时丢弃积压，只保留一个 resync 事件
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    async def get(self) -> Dict[str, Any]:
+        event = await self.queue.get()
+        if event is RESYNC_EVENT:
+            self.overflowed = False
+        return event
+
+
+class AvailabilityHub:
+    """
+    进程内的可用性变化扇出中心。
+
+    publish 可以在任意线程调用（同步服务代码在线程池中运行），按场馆找到订阅者后
+    通过 call_soon_threadsafe 投递到各自的事件循环。只在单进程内有效，多 worker 部署使用 RedisAvailabilityHub。
+    """
+
+    def __init__(self, max_subscribers: int, max_queue: int):
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, venue_id: int, start_date: date, end_date: date) -> Subscription:
+        subscription = Subscription(venue_id, start_date, end_date, self.max_queue)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise ServiceOverloadedError("Too many availability subscribers", retry_after=5)
+            self._subscribers.setdefault(venue_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.venue_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.venue_id]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self._fan_out(event)
+
+    def publish_many(self, events: Iterable[Dict[str, Any]]) -> None:
+        for event in events:
+            self.publish(event)
+
+    def _fan_out(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["venue_id"], ()))
+        for subscription in subscribers:
+            if subscription.matches(event):
+                subscription.deliver(event)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "memory", "subscribers": self._count, "venues": len(self._subscribers)}
+
+
+class RedisAvailabilityHub(AvailabilityHub):
+    """
+    经由 Redis pub/sub 的扇出中心，接口与 AvailabilityHub 相同。
+
+    publish 只把事件放入有界的待发布队列并立即返回，由后台发布线程写入频道，
+    调用方（可能仍持有时间段的行锁）不等待 Redis 往返，Redis 不可用也不影响预约；
+    API 进程和 Celery worker 都可以发布。每个 API 进程在第一次订阅时启动一个监听线程，
+    收到的事件再在本进程内扇出给订阅者。
+    """
+
+    def __init__(self, url: str, channel: str, max_subscribers: int, max_queue: int, max_pending: int):
+        if redis is None:
+            raise RuntimeError(
+                "The redis package is required for the shared availability hub (poetry install -E redis)"
+            )
+        super().__init__(max_subscribers, max_queue)
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener: Optional[threading.Thread] = None
+        self._pending: "queue.Queue[str]" = queue.Queue(max_pending)
+        self._publisher: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def subscribe(self, venue_id: int, start_date: date, end_date: date) -> Subscription:
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="availability-hub", daemon=True)
+                self._listener.start()
+        return super().subscribe(venue_id, start_date, end_date)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        if self._publisher is None:
+            with self._lock:
+                if self._publisher is None:
+                    self._publisher = threading.Thread(target=self._publish_pending, name="availability-publisher",
+                                                       daemon=True)
+                    self._publisher.start()
+        try:
+            self._pending.put_nowait(json.dumps(event))
+        except queue.Full:
+            # 推送只是提示，丢弃时客户端仍可通过轮询获得最新数据
+            self.dropped += 1
+
+    def _publish_pending(self) -> None:
+        while True:
+            messages = [self._pending.get()]
+            while len(messages) < 500:
+                try:
+                    messages.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                pipeline = self.client.pipeline(transaction=False)
+                for message in messages:
+                    pipeline.publish(self.channel, message)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Failed to publish {len(messages)} availability events: {str(e)}")
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._fan_out(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"Availability hub listener failed, reconnecting: {str(e)}")
+                threading.Event().wait(1)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(backend="redis", pending=self._pending.qsize(), dropped=self.dropped)
+        return stats
+
+
+def _build_hub() -> AvailabilityHub:
+    if settings.AVAILABILITY_HUB_BACKEND == "redis":
+        return RedisAvailabilityHub(settings.AVAILABILITY_HUB_REDIS_URL, settings.AVAILABILITY_HUB_CHANNEL,
+                                    settings.AVAILABILITY_STREAM_MAX_SUBSCRIBERS,
+                                    settings.AVAILABILITY_STREAM_QUEUE_SIZE,
+                                    settings.AVAILABILITY_HUB_PUBLISH_QUEUE_SIZE)
+    return AvailabilityHub(settings.AVAILABILITY_STREAM_MAX_SUBSCRIBERS, settings.AVAILABILITY_STREAM_QUEUE_SIZE)
+
+
+availability_hub = _build_hub()
@@ -0,0 +1,200 @@
+import asyncio
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # 共享缓存后端是可选的
+    redis = None
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # 未安装 greenlet 时不会有 run_sync 上下文
+    getcurrent = None
+
+from sqlalchemy.util import await_only
+
+
+def _in_run_sync() -> bool:
+    # AsyncSession.run_sync 在 SQLAlchemy 提供的 greenlet 中执行同步代码
+    return getcurrent is not None and getattr(getcurrent(), "__sqlalchemy_greenlet_provider__", False)
+
+
+def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    执行阻塞的非数据库 I/O（如同步 Redis 客户端调用）。
+
+    在 AsyncSession.run_sync 执行的服务代码中（事件循环线程上的 greenlet），调用被放到线程池，
+    greenlet 挂起等待，事件循环可以继续处理其他请求；其他情况下直接调用。
+    """
+    if _in_run_sync():
+        return await_only(asyncio.to_thread(func, *args))
+    return func(*args)
+
+
+class CacheStats:
+    """命中、未命中和淘汰计数"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_eviction(self) -> None:
+        with self._lock:
+            self.evictions += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else None
+            }
+
+
+class TTLCache:
+    """
+    线程安全的进程内 TTL 缓存，可选按 LRU 限制条目数。
+
+    只适合缓存可以容忍短暂过期的数据：多进程部署时各进程各自持有一份，
+    依赖 TTL 限制不一致的时间窗口。
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.record(False)
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.record(False)
+                return default
+            self._data.move_to_end(key)
+            self.stats.record(True)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+                    self.stats.record_eviction()
+
+    def update(self, key: Hashable, func: Callable[[Any], Any]) -> bool:
+        """
+        原子地用 func(旧值) 替换已缓存的值，不刷新过期时间。
+
+        :return: 键存在且未过期时返回True
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._data.pop(key, None)
+                return False
+            self._data[key] = (entry[0], func(entry[1]))
+            return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """删除所有满足 predicate(key) 的键，返回删除的数量"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisCache:
+    """
+    与 TTLCache 相同 get/set/delete 接口的共享缓存后端（Redis 或兼容的本地替身）。
+
+    值用 pickle 序列化，键为元组时转换为以 ":" 连接的字符串并加上 namespace 前缀；
+    多个进程共享同一份数据，失效操作对所有进程立即生效。
+    """
+
+    def __init__(self, url: str, namespace: str, ttl_seconds: float):
+        if redis is None:
+            raise RuntimeError("The redis package is required for the shared cache backend (poetry install -E redis)")
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+    def _key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    # 客户端调用都经过 run_blocking，在 run_sync 中使用时不阻塞事件循环
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raw = run_blocking(self.client.get, self._key(key))
+        self.stats.record(raw is not None)
+        return default if raw is None else pickle.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        run_blocking(lambda: self.client.set(self._key(key), pickle.dumps(value), px=int(ttl * 1000)))
+
+    def delete(self, key: Hashable) -> None:
+        run_blocking(self.client.delete, self._key(key))
+
+    def clear(self) -> None:
+        keys = run_blocking(lambda: list(self.client.scan_iter(match=f"{self.namespace}:*")))
+        if keys:
+            run_blocking(self.client.delete, *keys)
+
+
+# 名称 -> 缓存实例，用于导出命中率
+_registry: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> Any:
+    _registry[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    stats = {}
+    for name, cache in _registry.items():
+        entry = cache.stats.as_dict()
+        if isinstance(cache, TTLCache):
+            entry["size"] = len(cache)
+        stats[name] = entry
+    return stats
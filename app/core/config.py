@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
+from typing import Optional
 from logging.handlers import RotatingFileHandler
 import logging
 
@@ -12,6 +13,20 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = os.getenv("PROJECT_NAME")
     PROJECT_VERSION: str = os.getenv("PROJECT_VERSION")
     DATABASE_URL: str
+    # 可选的异步引擎（需要安装 async 附加依赖：poetry install -E async）；未设置 ASYNC_DATABASE_URL 时由 DATABASE_URL 推导
+    ASYNC_DB_ENABLED: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool; DB_POOL_PROFILE=worker（Celery worker 启动时设置）使用 DB_WORKER_* 配置
+    DB_POOL_PROFILE: str = "api"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10  # 等待连接的秒数，超时返回 503 而不是一直阻塞
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_WORKER_POOL_SIZE: int = 5
+    DB_WORKER_MAX_OVERFLOW: int = 5
+    DB_WORKER_POOL_TIMEOUT: float = 30
+    DB_WORKER_POOL_RECYCLE: int = 1800
     SECRET_KEY: str
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
@@ -22,10 +37,16 @@ class Settings(BaseSettings):
     SMTP_PORT: int = os.getenv("SMTP_PORT")
     SMTP_USER: str = os.getenv("SMTP_USER")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD")
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 30
+    SMTP_POOL_SIZE: int = 4  # 每个进程（事件循环）保持的 SMTP 长连接数，也是邮件并发上限
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
 
     # SMS settings
     SMS_API_URL: str = os.getenv("SMS_API_URL")
     SMS_API_KEY: str = os.getenv("SMS_API_KEY")
+    SMS_MAX_CONNECTIONS: int = 20
+    SMS_TIMEOUT_SECONDS: float = 10
 
     FRONTEND_BASE_URL: str = os.getenv("FRONTEND_BASE_URL")
     # Reservation Cancellation Rule
@@ -39,6 +60,69 @@ class Settings(BaseSettings):
     # Check-in
     CHECK_IN_TIME_WINDOW_MINUTES: int = os.getenv("CHECK_IN_TIME_WINDOW_MINUTES")
     CHECK_IN_TOKEN_EXPIRY_MINUTES: int = os.getenv("CHECK_IN_TOKEN_EXPIRY_MINUTES")
+    # Reservation quota counters cache
+    QUOTA_CACHE_TTL_SECONDS: int = 60
+    # 缓存计数距离上限不足该值时，预约前在事务中重新计数
+    QUOTA_RECOUNT_MARGIN: int = 1
+    # Recurring reservations
+    MAX_RECURRING_OCCURRENCES: int = 366
+    # Future time slot generation
+    VENUE_OPEN_HOUR: int = 8
+    VENUE_CLOSE_HOUR: int = 22
+    VENUE_SLOT_MINUTES: int = 60  # 未配置模板的场馆使用的默认时间段长度
+    SLOT_TEMPLATE_CACHE_TTL_SECONDS: int = 300
+    SLOT_GENERATION_VENUE_BATCH_SIZE: int = 50
+    SLOT_GENERATION_MAX_WORKERS: int = 4
+    SLOT_GENERATION_INSERT_CHUNK_SIZE: int = 5000
+    # Per-venue/per-date slot interval index
+    SLOT_INDEX_TTL_SECONDS: int = 30
+    SLOT_INDEX_MAX_ENTRIES: int = 20000  # 区间索引和可用性快照各自的条目上限（场馆 × 日期）
+    # Waiting-list queue position cache (one entry per time slot)
+    WAITING_QUEUE_TTL_SECONDS: int = 30
+    WAITING_QUEUE_MAX_SLOTS: int = 10000
+    # Availability push (SSE): memory 只在单进程内扇出，多 worker 部署使用 redis
+    AVAILABILITY_HUB_BACKEND: str = "memory"  # memory | redis
+    AVAILABILITY_HUB_REDIS_URL: Optional[str] = None
+    AVAILABILITY_HUB_CHANNEL: str = "availability"
+    AVAILABILITY_STREAM_MAX_SUBSCRIBERS: int = 5000  # 每个进程
+    AVAILABILITY_STREAM_QUEUE_SIZE: int = 100  # 每个订阅者积压的事件数，超过时改发 resync
+    AVAILABILITY_STREAM_HEARTBEAT_SECONDS: float = 15
+    AVAILABILITY_HUB_PUBLISH_QUEUE_SIZE: int = 10000  # Redis 后端待发布事件的上限，超过时丢弃
+    # Idempotency-Key store for POST /reservations
+    IDEMPOTENCY_BACKEND: str = "memory"  # memory | redis
+    IDEMPOTENCY_REDIS_URL: Optional[str] = None
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    # Admission control for booking writes (per process, per venue)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_VENUE_CONCURRENCY: int = 4  # 与 DB_POOL_SIZE 和场馆数一起调整
+    ADMISSION_VENUE_QUEUE_SIZE: int = 200
+    ADMISSION_MAX_WAIT_SECONDS: float = 5
+    # Reference data cache (venue / sport venue / reservation rules / facility)
+    REFERENCE_CACHE_BACKEND: str = "memory"  # memory | redis
+    REFERENCE_CACHE_REDIS_URL: Optional[str] = None
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    REFERENCE_CACHE_MAX_ENTRIES: int = 10000
+    # Authenticated principal cache used by get_current_user
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # Password hashing: bcrypt cost and the dedicated process pool
+    BCRYPT_ROUNDS: int = 12  # 修改后旧哈希在用户下次登录时透明重算
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 排队加执行中的上限，超过时返回 503
+
+    # Notification delivery: 邮件/短信按批次交给 Celery，未启用时只记录日志
+    NOTIFICATION_DELIVERY_ENABLED: bool = False
+    NOTIFICATION_BATCH_SIZE: int = 500
+    DELIVERY_CONCURRENCY: int = 50  # 一个批次内同时进行的邮件/短信发送数
+    DELIVERY_MAX_ATTEMPTS: int = 3
+    DELIVERY_RETRY_BASE_SECONDS: float = 0.5
+    # Transactional outbox dispatcher
+    OUTBOX_DISPATCH_INTERVAL_SECONDS: float = 5
+    OUTBOX_DISPATCH_BATCH_SIZE: int = 500
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETENTION_DAYS: int = 7
 
     # Log config
     LOG_LEVEL: str = os.getenv("LOG_LEVEL")
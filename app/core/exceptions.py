@@ -86,6 +86,20 @@ class RateLimitExceededError(BaseAPIException):
         super().__init__(message, status_code=429)
 
 
+class ServiceOverloadedError(BaseAPIException):
+    """Raised when a bounded worker pool or queue is full"""
+    def __init__(self, message: str = "Service is busy, please retry later", retry_after: int = 1):
+        super().__init__(message, status_code=503)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class IdempotencyKeyError(BaseAPIException):
+    """Raised when an Idempotency-Key is invalid or reused with a different request"""
+    def __init__(self, message: str = "Idempotency-Key was already used with a different request",
+                 status_code: int = 422):
+        super().__init__(message, status_code)
+
+
 # Reservation Exceptions
 class ReservationException(BaseAPIException):
     """Base exception for reservation related errors"""
@@ -105,6 +119,12 @@ class ReservationConflictError(ReservationException):
         super().__init__(message, status_code=409)
 
 
+class ReservationLimitExceededError(ReservationException):
+    """Raised when a reservation would exceed the user's daily, weekly or monthly quota"""
+    def __init__(self, message: str = "Reservation limit exceeded"):
+        super().__init__(message, status_code=400)
+
+
 class ReservationCreateError(ReservationException):
     """Raised when there's an error creating a reservation"""
     def __init__(self, message: str = "Error creating reservation"):
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple
+
+from fastapi import HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import TTLCache, RedisCache, register_cache
+from app.core.config import settings, get_logger
+from app.core.exceptions import IdempotencyKeyError
+
+logger = get_logger(__name__)
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: bytes  # 请求体摘要，同一个键携带不同请求体时拒绝
+    status_code: int
+    body: bytes  # 已编码的 JSON 响应体
+
+
+def request_fingerprint(payload: Any) -> bytes:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key 的响应存储。
+
+    第一次执行的结果（成功响应和 4xx 错误）按 (scope, key) 保存 IDEMPOTENCY_TTL_SECONDS 秒，
+    重放时直接返回保存的响应，不再执行操作；5xx 不保存，客户端重试时重新执行。
+    同一进程内相同键的并发请求等待正在执行的那一次完成后共享其结果。
+    """
+
+    def __init__(self, cache: Any):
+        self.cache = cache
+        # (scope, key) -> 执行完成时置位的 Future；只在事件循环线程中访问
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    # execute 运行在事件循环上：进程内缓存直接访问，Redis 后端的阻塞调用放到线程池，网络往返不阻塞事件循环
+
+    async def _cache_get(self, cache_key: Hashable) -> Any:
+        if isinstance(self.cache, TTLCache):
+            return self.cache.get(cache_key)
+        return await run_in_threadpool(self.cache.get, cache_key)
+
+    async def _cache_set(self, cache_key: Hashable, stored: StoredResponse) -> None:
+        if isinstance(self.cache, TTLCache):
+            self.cache.set(cache_key, stored)
+        else:
+            await run_in_threadpool(self.cache.set, cache_key, stored)
+
+    async def execute(self, scope: Hashable, key: str, fingerprint: bytes,
+                      operation: Callable[[], Awaitable[Any]], status_code: int = 200) -> Response:
+        if not key or len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise IdempotencyKeyError(
+                f"Idempotency-Key must be 1 to {settings.IDEMPOTENCY_KEY_MAX_LENGTH} characters", status_code=400
+            )
+        cache_key = (scope, key)
+        while True:
+            stored = await self._cache_get(cache_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+            in_flight = self._in_flight.get(cache_key)
+            if in_flight is None:
+                break
+            # 相同键的请求正在执行：等待完成后重新查看存储；若它以 5xx 或取消结束，由本请求重新执行
+            await asyncio.shield(in_flight)
+
+        done = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = done
+        try:
+            try:
+                result = await operation()
+                stored = StoredResponse(fingerprint, status_code, json.dumps(jsonable_encoder(result)).encode())
+            except HTTPException as e:
+                if e.status_code >= 500:
+                    raise
+                stored = StoredResponse(fingerprint, e.status_code, json.dumps({"detail": e.detail}).encode())
+            await self._cache_set(cache_key, stored)
+        finally:
+            del self._in_flight[cache_key]
+            done.set_result(None)
+        return self._to_response(stored)
+
+    @staticmethod
+    def _replay(stored: StoredResponse, fingerprint: bytes) -> Response:
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyError()
+        response = IdempotencyStore._to_response(stored)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    @staticmethod
+    def _to_response(stored: StoredResponse) -> Response:
+        return Response(content=stored.body, status_code=stored.status_code, media_type="application/json")
+
+
+def _build_cache():
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        cache = RedisCache(settings.IDEMPOTENCY_REDIS_URL, "idempotency", settings.IDEMPOTENCY_TTL_SECONDS)
+    else:
+        cache = TTLCache(ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS, max_entries=settings.IDEMPOTENCY_MAX_ENTRIES)
+    return register_cache("idempotency", cache)
+
+
+idempotency_store = IdempotencyStore(_build_cache())
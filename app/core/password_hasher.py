@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import security
+from app.core.config import settings, get_logger
+from app.core.exceptions import ServiceOverloadedError
+
+logger = get_logger(__name__)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return security.verify_and_update_password(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return security.get_password_hash(password)
+
+
+class PasswordHasher:
+    """
+    在独立的有界进程池中执行 bcrypt 计算。
+
+    bcrypt 每次约数百毫秒且持有 GIL，直接在请求线程中执行会让登录高峰占满线程池。
+    这里把计算交给子进程：异步调用方 await 结果时不占用事件循环和线程池，
+    排队加执行中的任务超过 max_pending 时直接拒绝（503 + Retry-After），而不是无限排队。
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 首次使用时才创建进程池，导入本模块的进程（如 Celery worker、脚本）不会启动子进程
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _submit(self, func: Callable, *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ServiceOverloadedError("Too many concurrent password operations, please retry later")
+            self._pending += 1
+            executor = self._get_executor()
+        submitted_at = time.monotonic()
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(lambda _: self._on_done(submitted_at))
+        return future
+
+    def _on_done(self, submitted_at: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_seconds += time.monotonic() - submitted_at
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """验证密码；哈希参数变化时同时返回新哈希"""
+        return await asyncio.wrap_future(self._submit(_verify_and_update, plain_password, hashed_password))
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    def hash(self, password: str) -> str:
+        """同步调用方使用：计算仍在子进程中进行，当前线程只等待结果"""
+        return self._submit(_hash, password).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": min(self._pending, self.max_workers),
+                "queued": max(self._pending - self.max_workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_latency_ms": round(self._total_seconds * 1000 / self._completed, 2) if self._completed else None
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,45 @@
+from typing import NamedTuple, Optional
+
+from app.models.user import User, UserRole
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings
+
+
+class Principal(NamedTuple):
+    """
+    已认证用户的只读快照，由 get_current_user 返回。
+
+    只包含鉴权和按用户过滤需要的字段；需要完整用户信息时用 id 查询 User。
+    """
+    id: int
+    username: str
+    role: UserRole
+    is_leader: bool
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.ADMIN
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, role=user.role, is_leader=user.is_leader)
+
+
+# (token sub, token iat) -> Principal
+_principal_cache = register_cache("principal", TTLCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES
+))
+
+
+def get_cached_principal(username: str, issued_at: Optional[int]) -> Optional[Principal]:
+    return _principal_cache.get((username, issued_at))
+
+
+def cache_principal(issued_at: Optional[int], principal: Principal) -> None:
+    _principal_cache.set((principal.username, issued_at), principal)
+
+
+def invalidate_principal(username: str) -> None:
+    """用户信息修改、删除或重置密码后失效该用户所有令牌对应的快照"""
+    _principal_cache.delete_where(lambda key: key[0] == username)
@@ -1,10 +1,58 @@
+from typing import Any, Dict
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
+
+def pool_options(profile: str) -> Dict[str, Any]:
+    """按进程类型返回连接池参数：api（FastAPI 进程）或 worker（Celery worker）"""
+    if profile == "worker":
+        options = {
+            "pool_size": settings.DB_WORKER_POOL_SIZE,
+            "max_overflow": settings.DB_WORKER_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_WORKER_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_WORKER_POOL_RECYCLE
+        }
+    else:
+        options = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE
+        }
+    options["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+    return options
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **pool_options(settings.DB_POOL_PROFILE)
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    # postgresql:// 或 postgresql+psycopg2:// -> postgresql+asyncpg://
+    scheme, _, rest = url.partition("://")
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+# 异步引擎只在 ASYNC_DB_ENABLED 时创建，未启用时不要求安装异步驱动
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options(settings.DB_POOL_PROFILE)
+) if settings.ASYNC_DB_ENABLED else None
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False
+) if async_engine is not None else None
+
 Base = declarative_base()
@@ -1,10 +1,16 @@
+from typing import Callable, Optional, TypeVar, Union
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 from app.models.user import User
 from app.core.config import settings
-from app.db.database import SessionLocal
+from app.core.principal import Principal, get_cached_principal, cache_principal
+from app.db.database import SessionLocal, AsyncSessionLocal
+
+T = TypeVar("T")
 
 
 def get_db():
@@ -15,10 +21,56 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def get_db_session():
+    """ASYNC_DB_ENABLED 时提供 AsyncSession，否则提供同步 Session；与 run_with_session 配合使用"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def run_with_session(db: Union[Session, AsyncSession], func: Callable[[Session], T]) -> T:
+    """
+    在 db 上执行以同步 Session 编写的服务代码。
+
+    AsyncSession 通过 run_sync 执行：服务代码不变，数据库 I/O 由异步驱动完成，等待期间不占用线程；
+    同步 Session 则放到线程池中执行，行为与同步端点相同。
+    run_sync 中的代码运行在事件循环线程上，其他阻塞 I/O 必须避开它：RedisCache 经由 run_blocking
+    转到线程池，可用性推送只入队、由后台线程发布。
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func)
+    return await run_in_threadpool(func, db)
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _load_principal(username: str) -> Optional[Principal]:
+    # 使用独立的短会话，查询结束立即归还连接
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == username).first()
+        return Principal.from_user(user) if user is not None else None
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    返回当前用户的只读快照（Principal）。
+
+    快照按令牌的 sub 和 iat 缓存 PRINCIPAL_CACHE_TTL_SECONDS 秒，命中时不访问数据库。
+    未命中时在线程池中用独立的短会话查询，连接在查询后立即归还：不与端点共用 get_db 的会话，
+    请求在准入队列中等待时不占用连接池中的连接。
+    """
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -31,13 +83,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    issued_at = payload.get("iat")
+    principal = get_cached_principal(username, issued_at)
+    if principal is not None:
+        return principal
+    principal = await run_in_threadpool(_load_principal, username)
+    if principal is None:
         raise credentials_exception
-    return user
+    cache_principal(issued_at, principal)
+    return principal
 
 
-async def get_current_admin(current_user: User = Depends(get_current_user)):
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=403,
@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import asyncio
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import user, sport_venue, venue, facility, venue_available_time_slots
@@ -7,6 +9,7 @@ from app.api.v1.stats import stats
 from app.api.v1.endpoints import reservation
 from app.scripts.init_db import init_db, create_sample_data, recreate_db
 from app.core.config import settings, get_logger
+from app.core.password_hasher import password_hasher
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 
@@ -19,6 +22,7 @@ async def lifespan_context(app: FastAPI):
     # await loop.run_in_executor(None, create_sample_data)
     yield
     # 在应用关闭时执行清理操作（如果需要）
+    password_hasher.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -50,6 +54,14 @@ app.include_router(stats.router, prefix="/stats", tags=["statistics"])
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # 连接池耗尽：返回 503 让客户端稍后重试，而不是笼统的 500
+    logger.warning(f"Database pool exhausted while handling {request.url.path}")
+    return JSONResponse(status_code=503, content={"detail": "Database is busy, please retry later"},
+                        headers={"Retry-After": "1"})
+
+
 @app.get("/")
 def read_root():
     logger.info("Hello World endpoint")
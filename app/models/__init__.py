@@ -2,6 +2,7 @@ from .user import User
 from .sport_venue import SportVenue
 from .venue import Venue
 from .venue_available_time_slot import VenueAvailableTimeSlot
+from .venue_slot_template import VenueSlotTemplate
 from .facility import Facility
 from .reservation import Reservation
 from .waiting_list import WaitingList
@@ -13,3 +14,4 @@ from .recurring_reservation import RecurringReservation
 from .reservation_rules import ReservationRules
 
 from .user_activity import UserActivity
+from .outbox_event import OutboxEvent
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, text, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -14,3 +14,7 @@ class Facility(Base):
     updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
 
     venue = relationship("Venue", back_populates="facilities")
+
+    __table_args__ = (
+        Index('ix_facility_venue_id', 'venue_id'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, text, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -18,3 +18,7 @@ class Feedback(Base):
 
     user = relationship("User", back_populates="feedbacks")
     venue = relationship("Venue", back_populates="feedbacks")
+
+    __table_args__ = (
+        Index('ix_feedback_venue_id', 'venue_id'),
+    )
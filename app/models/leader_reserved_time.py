@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, SmallInteger, Time, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, Integer, SmallInteger, Time, ForeignKey, TIMESTAMP, text, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -17,3 +17,7 @@ class LeaderReservedTime(Base):
 
     user = relationship("User", back_populates="leader_reserved_times")
     venue = relationship("Venue", back_populates="leader_reserved_times")
+
+    __table_args__ = (
+        Index('ix_leader_reserved_time_venue_day', 'venue_id', 'day_of_week'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, TIMESTAMP, text, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -16,3 +16,7 @@ class Notification(Base):
     updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
 
     user = relationship("User", back_populates="notifications")
+
+    __table_args__ = (
+        Index('ix_notification_user_created_at', 'user_id', 'created_at'),
+    )
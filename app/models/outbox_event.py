@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, TIMESTAMP, text, Index
+from app.db.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    事务性发件箱：与业务修改写在同一事务中的待发送副作用（通知投递、操作日志等），
+    由后台 dispatcher 批量取出交给 Celery，业务事务回滚时这些行也随之消失。
+    """
+    __tablename__ = "outbox_event"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    dispatched_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # dispatcher 按 id 顺序扫描未发送的行
+        Index('ix_outbox_event_pending', 'dispatched_at', 'id'),
+    )
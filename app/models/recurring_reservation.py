@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, Enum as SqlAlchemyEnum
+from sqlalchemy import Column, Integer, SmallInteger, String, Time, ForeignKey, TIMESTAMP, text, Enum as SqlAlchemyEnum
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from enum import Enum
@@ -19,6 +19,10 @@ class RecurringReservation(Base):
     pattern = Column(SqlAlchemyEnum(RecurrencePattern), nullable=False)
     start_date = Column(TIMESTAMP, nullable=False)
     end_date = Column(TIMESTAMP, nullable=True)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+    days_of_week = Column(String(20), nullable=True)  # 逗号分隔的星期（0 为周一），仅 WEEKLY 使用
+    day_of_month = Column(SmallInteger, nullable=True)  # 仅 MONTHLY 使用
     created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
 
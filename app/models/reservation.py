@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, TIMESTAMP, text, Enum as SqlAlchemyEnum, Date, Time, String
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, TIMESTAMP, text, Enum as SqlAlchemyEnum, Date, Time, String, \
+    Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from enum import Enum
@@ -35,3 +36,15 @@ class Reservation(Base):
     venue_available_time_slot = relationship("VenueAvailableTimeSlot", back_populates="reservations")
     recurring_reservation = relationship("RecurringReservation", back_populates="reservations")
     activities = relationship("UserActivity", back_populates="reservation")
+
+    __table_args__ = (
+        # 用户预约列表、配额统计
+        Index('ix_reservation_user_created_at', 'user_id', 'created_at'),
+        Index('ix_reservation_user_venue_created_at', 'user_id', 'venue_id', 'created_at'),
+        # 场馆维度统计
+        Index('ix_reservation_venue_created_at', 'venue_id', 'created_at'),
+        # 按时间段统计/查询有效预约
+        Index('ix_reservation_slot_status', 'venue_available_time_slot_id', 'status'),
+        # 管理员按创建时间分页、按时间范围统计
+        Index('ix_reservation_created_at_id', 'created_at', 'id'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, Interval, Enum as SqlAlchemyEnum
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, Interval, Enum as SqlAlchemyEnum, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from app.models.user import UserRole
@@ -19,3 +19,7 @@ class ReservationRules(Base):
     updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
 
     venue = relationship("Venue", back_populates="reservation_rules")
+
+    __table_args__ = (
+        Index('ix_reservation_rules_venue_role', 'venue_id', 'user_role'),
+    )
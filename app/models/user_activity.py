@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -17,3 +17,7 @@ class UserActivity(Base):
     user = relationship("User", back_populates="activities")
     reservation = relationship("Reservation", back_populates="activities")
     venue = relationship("Venue", back_populates="activities")
+
+    __table_args__ = (
+        Index('ix_user_activity_user_timestamp', 'user_id', 'timestamp'),
+    )
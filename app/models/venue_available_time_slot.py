@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, Time, ForeignKey, TIMESTAMP, text, UniqueConstraint
+from sqlalchemy import Column, Integer, Date, Time, ForeignKey, TIMESTAMP, text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -21,4 +21,6 @@ class VenueAvailableTimeSlot(Base):
 
     __table_args__ = (
         UniqueConstraint('venue_id', 'date', 'start_time', 'end_time', name='uq_venue_date_time'),
+        # 跨场馆按日期和开始时间扫描（等待列表处理、提醒、自动确认、趋势统计）
+        Index('ix_venue_available_time_slot_date_start_time', 'date', 'start_time'),
     )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, SmallInteger, Time, ForeignKey, TIMESTAMP, text, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+
+class VenueSlotTemplate(Base):
+    """场馆的每周时间段模板，每行是某个星期几的一个时间段"""
+    __tablename__ = "venue_slot_template"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    venue_id = Column(Integer, ForeignKey("venue.id"), nullable=False)
+    day_of_week = Column(SmallInteger, nullable=False)  # 0 为周一
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    capacity = Column(Integer, nullable=True)  # 为空时使用场馆的 default_capacity
+    created_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP"), onupdate=text("CURRENT_TIMESTAMP"))
+
+    venue = relationship("Venue", back_populates="slot_templates")
+
+    __table_args__ = (
+        UniqueConstraint('venue_id', 'day_of_week', 'start_time', 'end_time', name='uq_venue_slot_template'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, TIMESTAMP, text, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -16,3 +16,9 @@ class WaitingList(Base):
 
     user = relationship("User", back_populates="waiting_lists")
     venue_available_time_slot = relationship("VenueAvailableTimeSlot", back_populates="waiting_lists")
+
+    __table_args__ = (
+        # 按时间段取下一个候补用户 / 计算排队位置
+        Index('ix_waiting_list_slot_expired_created_at', 'venue_available_time_slot_id', 'is_expired', 'created_at'),
+        Index('ix_waiting_list_user_id', 'user_id'),
+    )
@@ -44,6 +44,10 @@ class ReservationUpdate(BaseModel):
     venue_available_time_slot_id: Optional[int] = None
 
 
+class ReservationBulkUpdate(ReservationUpdate):
+    id: int
+
+
 class ReservationRead(BaseModel):
     id: int
     user_id: int
@@ -85,11 +89,25 @@ class ReservationDetailRead(BaseModel):
         from_attributes = True
 
 
+class BulkReservationItemResult(BaseModel):
+    index: int
+    success: bool
+    reservation: Optional[ReservationRead] = None
+    error: Optional[str] = None
+
+
+class BulkReservationResult(BaseModel):
+    success_count: int
+    failure_count: int
+    results: List[BulkReservationItemResult]
+
+
 class PaginatedReservationResponse(BaseModel):
     reservations: List[ReservationDetailRead]
-    total_count: int
+    total_count: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class CalendarTimeSlot(BaseModel):
@@ -97,8 +115,10 @@ class CalendarTimeSlot(BaseModel):
     date: date
     start_time: time
     end_time: time
-    capacity: int
-    reservations: List[ReservationRead] = []
+    capacity: int  # 剩余可预约名额
+    booked_count: int = 0
+    total_capacity: int = 0
+    reservations: List[ReservationRead] = []  # 仅管理员显式请求时返回
 
     class Config:
         from_attributes = True
@@ -164,8 +184,8 @@ class RecurringReservationRead(BaseModel):
     start_time: time
     end_time: time
     recurrence_pattern: RecurrencePattern
-    days_of_week: Optional[List[int]]
-    day_of_month: Optional[int]
+    days_of_week: Optional[List[int]] = None
+    day_of_month: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -174,12 +194,12 @@ class RecurringReservationRead(BaseModel):
 
 
 class RecurringReservationUpdate(BaseModel):
-    end_date: Optional[date]
-    start_time: Optional[time]
-    end_time: Optional[time]
-    recurrence_pattern: Optional[RecurrencePattern]
-    days_of_week: Optional[List[int]]
-    day_of_month: Optional[int]
+    end_date: Optional[date] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    recurrence_pattern: Optional[RecurrencePattern] = None
+    days_of_week: Optional[List[int]] = None
+    day_of_month: Optional[int] = Field(None, ge=1, le=31)
 
     class Config:
         json_schema_extra = {
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import datetime, time
 from app.models.venue import VenueStatus
 
 class SportVenueInfo(BaseModel):
@@ -68,3 +68,26 @@ class VenueRead(BaseModel):
 class VenueStats(BaseModel):
     total_venues: int
     status_counts: Dict[str, int]
+
+class VenueSlotTemplateEntry(BaseModel):
+    day_of_week: int
+    start_time: time
+    end_time: time
+    capacity: Optional[int] = None
+
+    @field_validator('day_of_week')
+    def validate_day_of_week(cls, v):
+        if not 0 <= v <= 6:
+            raise ValueError('day_of_week must be between 0 (Monday) and 6 (Sunday)')
+        return v
+
+    @field_validator('end_time')
+    def validate_end_time(cls, v, info):
+        if 'start_time' in info.data and v <= info.data['start_time']:
+            raise ValueError('end_time must be after start_time')
+        return v
+
+class VenueSlotTemplateRead(BaseModel):
+    venue_id: int
+    is_default: bool
+    entries: List[VenueSlotTemplateEntry]
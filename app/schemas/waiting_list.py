@@ -1,10 +1,11 @@
+from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
 from app.schemas.venue_available_time_slot import VenueAvailableTimeSlotRead
 
 
 class WaitingListBase(BaseModel):
-    reservation_id: int
+    venue_available_time_slot_id: int
     user_id: int
 
 
@@ -16,7 +17,7 @@ class WaitingListRead(WaitingListBase):
     id: int
     created_at: datetime
     updated_at: datetime
-    reservation_time_slot: VenueAvailableTimeSlotRead
+    venue_available_time_slot: VenueAvailableTimeSlotRead
 
     class Config:
         from_attributes = True
@@ -48,3 +49,12 @@ class WaitingListReadWithReservationTimeSlot(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class WaitingListPosition(BaseModel):
+    entry_id: int
+    venue_available_time_slot_id: int
+    created_at: datetime
+    is_expired: bool
+    position: Optional[int] = None  # 从 1 开始；已过期的条目为空
+    queue_length: int
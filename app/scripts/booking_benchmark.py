@@ -0,0 +1,102 @@
+"""
+预约写入基准：以固定并发通过 ReservationService.create_reservation 预约一个专用时间段，
+输出吞吐量、延迟分位数，以及每次预约执行的 SQL 语句数和提交次数。
+
+对比改动前后：在改动前的提交上建一个工作区，复制本脚本和 booking_stress_test.py 后分别运行，
+两次使用相同的参数（时间段与测试用户的准备和清理与压力测试相同）：
+    git worktree add ../before <改动前的提交>
+    cp app/scripts/booking_benchmark.py app/scripts/booking_stress_test.py ../before/app/scripts/
+    (cd ../before && python -m app.scripts.booking_benchmark --venue-id 1 --bookings 500 --concurrency 20)
+    python -m app.scripts.booking_benchmark --venue-id 1 --bookings 500 --concurrency 20
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy import event
+
+from app.db.database import SessionLocal, engine
+from app.models.reservation import ReservationStatus
+from app.schemas.reservation import ReservationCreate
+from app.scripts.booking_stress_test import _cleanup, _create_slot, _prepare_users
+from app.scripts.login_benchmark import _percentile
+from app.services.reservation_service import ReservationService
+
+
+class _Counters:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.lock = threading.Lock()
+
+    def on_statement(self, *args) -> None:
+        with self.lock:
+            self.statements += 1
+
+    def on_commit(self, *args) -> None:
+        with self.lock:
+            self.commits += 1
+
+
+def _book(user_id: int, args, latencies: List[float], errors: List[str]) -> None:
+    reservation = ReservationCreate(status=ReservationStatus.PENDING, user_id=user_id, venue_id=args.venue_id,
+                                    date=args.date, start_time=args.start_time, end_time=args.end_time)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        try:
+            ReservationService(db).create_reservation(reservation)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+    latencies.append(time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reservation write benchmark")
+    parser.add_argument("--venue-id", type=int, default=1)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today() + timedelta(days=30))
+    parser.add_argument("--start-time", type=lambda value: datetime.strptime(value, "%H:%M").time(),
+                        default="05:00")
+    parser.add_argument("--end-time", type=lambda value: datetime.strptime(value, "%H:%M").time(),
+                        default="06:00")
+    parser.add_argument("--bookings", type=int, default=500, help="预约次数，每次使用不同的测试用户")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--user-prefix", default="stresstest_")
+    args = parser.parse_args()
+    # 容量足够所有预约成功，测量的是预约路径本身而不是等待列表
+    args.capacity = args.bookings
+
+    user_ids = _prepare_users(args.user_prefix, args.bookings)
+    slot_id = _create_slot(args)
+    counters = _Counters()
+    event.listen(engine, "before_cursor_execute", counters.on_statement)
+    event.listen(engine, "commit", counters.on_commit)
+    latencies, errors = [], []
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for user_id in user_ids:
+                executor.submit(_book, user_id, args, latencies, errors)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", counters.on_statement)
+        event.remove(engine, "commit", counters.on_commit)
+        _cleanup(slot_id, args.venue_id, args.date, user_ids)
+
+    booked = len(latencies)
+    print(f"{booked} of {args.bookings} booked in {elapsed:.2f}s ({booked / elapsed:.1f} bookings/s), "
+          f"concurrency {args.concurrency}")
+    print(f"  latency p50={_percentile(latencies, 50)}ms p95={_percentile(latencies, 95)}ms "
+          f"p99={_percentile(latencies, 99)}ms")
+    if args.bookings:
+        print(f"  per booking: {counters.statements / args.bookings:.1f} statements, "
+              f"{counters.commits / args.bookings:.2f} commits")
+    if errors:
+        print(f"  {len(errors)} errors, first: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
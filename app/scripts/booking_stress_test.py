@@ -0,0 +1,139 @@
+"""
+预约并发压力测试：N 个用户同时预约一个容量为 K 的时间段，校验恰好 K 个预约成功、其余进入等待列表。
+
+直接在进程内调用 ReservationService.create_reservation，每个线程使用独立的会话，
+与 API 走同一条原子扣减路径。脚本在 --date 的 --start-time~--end-time 新建一个专用时间段
+（该时间段不能已存在），测试用户不存在时创建（需要场馆已配置 employee 角色的预约规则），
+结束后删除专用时间段及其预约、等待列表和测试用户的活动记录。
+线程数等于 --users；连接池（DB_POOL_SIZE + DB_MAX_OVERFLOW）小于 N 时部分线程会等待连接。
+
+    python -m app.scripts.booking_stress_test --venue-id 1 --date 2026-12-31 --users 200 --capacity 10
+
+校验失败时以退出码 1 结束。
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, func, insert, select
+
+from app.db.database import SessionLocal
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.user import User, UserRole
+from app.models.user_activity import UserActivity
+from app.models.venue_available_time_slot import VenueAvailableTimeSlot
+from app.models.waiting_list import WaitingList
+from app.schemas.reservation import ReservationCreate
+from app.schemas.waiting_list import WaitingListRead
+from app.services.reservation_service import ReservationService
+from app.services.slot_interval_index import SlotIntervalIndex
+
+
+def _prepare_users(prefix: str, count: int) -> List[int]:
+    usernames = [f"{prefix}{index}" for index in range(count)]
+    with SessionLocal() as db:
+        existing = set(db.scalars(select(User.username).where(User.username.in_(usernames))).all())
+        missing = [username for username in usernames if username not in existing]
+        if missing:
+            # 测试用户不能登录：密码字段不是有效的哈希
+            db.execute(insert(User), [
+                {"username": username, "password": "!", "email": f"{username}@stresstest.example.com",
+                 "phone": "13900000000", "role": UserRole.EMPLOYEE, "is_leader": False}
+                for username in missing
+            ])
+            db.commit()
+        return list(db.scalars(select(User.id).where(User.username.in_(usernames)).order_by(User.id)).all())
+
+
+def _create_slot(args) -> int:
+    with SessionLocal() as db:
+        slot = VenueAvailableTimeSlot(venue_id=args.venue_id, date=args.date, start_time=args.start_time,
+                                      end_time=args.end_time, capacity=args.capacity)
+        db.add(slot)
+        db.commit()
+        SlotIntervalIndex.invalidate_slots(args.venue_id, args.date)
+        return slot.id
+
+
+def _cleanup(slot_id: int, venue_id: int, slot_date: date, user_ids: List[int]) -> None:
+    with SessionLocal() as db:
+        # 活动记录只属于测试用户，整体删除（包括加入等待列表的记录）
+        db.execute(delete(UserActivity).where(UserActivity.user_id.in_(user_ids)))
+        db.execute(delete(Reservation).where(Reservation.venue_available_time_slot_id == slot_id))
+        db.execute(delete(WaitingList).where(WaitingList.venue_available_time_slot_id == slot_id))
+        db.execute(delete(VenueAvailableTimeSlot).where(VenueAvailableTimeSlot.id == slot_id))
+        db.commit()
+    SlotIntervalIndex.invalidate_slots(venue_id, slot_date)
+
+
+def _book(user_id: int, args, start: threading.Barrier) -> str:
+    reservation = ReservationCreate(status=ReservationStatus.PENDING, user_id=user_id, venue_id=args.venue_id,
+                                    date=args.date, start_time=args.start_time, end_time=args.end_time)
+    start.wait()
+    with SessionLocal() as db:
+        try:
+            results = ReservationService(db).create_reservation(reservation)
+        except Exception as e:
+            return f"error: {type(e).__name__}: {e}"
+    return "waiting_list" if isinstance(results[0], WaitingListRead) else "booked"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test")
+    parser.add_argument("--venue-id", type=int, default=1)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today() + timedelta(days=30))
+    parser.add_argument("--start-time", type=lambda value: datetime.strptime(value, "%H:%M").time(),
+                        default="05:00")
+    parser.add_argument("--end-time", type=lambda value: datetime.strptime(value, "%H:%M").time(),
+                        default="06:00")
+    parser.add_argument("--users", type=int, default=200, help="同时预约的用户数 N")
+    parser.add_argument("--capacity", type=int, default=10, help="时间段容量 K")
+    parser.add_argument("--user-prefix", default="stresstest_")
+    args = parser.parse_args()
+
+    user_ids = _prepare_users(args.user_prefix, args.users)
+    slot_id = _create_slot(args)
+    try:
+        start = threading.Barrier(len(user_ids))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(user_ids)) as executor:
+            outcomes = Counter(executor.map(lambda user_id: _book(user_id, args, start), user_ids))
+        elapsed = time.perf_counter() - started
+
+        with SessionLocal() as db:
+            remaining = db.scalar(select(VenueAvailableTimeSlot.capacity).where(VenueAvailableTimeSlot.id == slot_id))
+            stored = db.scalar(select(func.count(Reservation.id)).where(
+                Reservation.venue_available_time_slot_id == slot_id,
+                Reservation.status != ReservationStatus.CANCELLED
+            ))
+    finally:
+        _cleanup(slot_id, args.venue_id, args.date, user_ids)
+
+    print(f"{len(user_ids)} users, capacity {args.capacity}, {elapsed:.2f}s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome}: {count}")
+    print(f"  reservations stored: {stored}, remaining capacity: {remaining}")
+
+    expected = min(args.capacity, len(user_ids))
+    failures = []
+    if outcomes["booked"] != expected:
+        failures.append(f"expected {expected} bookings, got {outcomes['booked']}")
+    if stored != expected:
+        failures.append(f"expected {expected} stored reservations, found {stored}")
+    if remaining != args.capacity - expected:
+        failures.append(f"expected remaining capacity {args.capacity - expected}, found {remaining}")
+    if outcomes["booked"] + outcomes["waiting_list"] != len(user_ids):
+        failures.append("some requests failed instead of booking or joining the waiting list")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+查询计划回归检查：对热点查询执行 EXPLAIN (FORMAT JSON)，确认计划使用了为其声明的索引。
+
+检查在只读事务中关闭顺序扫描（SET LOCAL enable_seqscan = off），使小数据量的测试库也能暴露
+"索引缺失或不可用"的问题；任一查询没有用到期望的索引时以退出码 1 结束，可在迁移后或 CI 中运行：
+
+    python -m app.scripts.migrate_db && python -m app.scripts.check_query_plans
+
+只支持 PostgreSQL。
+"""
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple
+
+from sqlalchemy import text
+
+from app.db.database import engine
+from app.core.config import get_logger
+
+logger = get_logger(__name__)
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    index: str  # 计划中必须出现的索引
+    sql: str
+    params: Dict[str, Any]
+
+
+def _checks() -> List[PlanCheck]:
+    now = datetime.now()
+    today = date.today()
+    month_start = datetime.combine(today.replace(day=1), datetime.min.time())
+    return [
+        PlanCheck(
+            "quota counts", "ix_reservation_user_venue_created_at",
+            "SELECT count(*) FROM reservation WHERE user_id = :user_id AND venue_id = :venue_id "
+            "AND created_at >= :since AND status != 'CANCELLED'",
+            {"user_id": 1, "venue_id": 1, "since": month_start}
+        ),
+        PlanCheck(
+            "user reservation history", "ix_reservation_user_created_at",
+            "SELECT id FROM reservation WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 20",
+            {"user_id": 1}
+        ),
+        PlanCheck(
+            "active reservations of a slot", "ix_reservation_slot_status",
+            "SELECT id FROM reservation WHERE venue_available_time_slot_id = :slot_id "
+            "AND status IN ('PENDING', 'CONFIRMED')",
+            {"slot_id": 1}
+        ),
+        PlanCheck(
+            "admin reservation page", "ix_reservation_created_at_id",
+            "SELECT id FROM reservation WHERE (created_at, id) < (:created_at, :id) "
+            "ORDER BY created_at DESC, id DESC LIMIT 20",
+            {"created_at": now, "id": 2 ** 31 - 1}
+        ),
+        PlanCheck(
+            "next waiting user", "ix_waiting_list_slot_expired_created_at",
+            "SELECT id FROM waiting_list WHERE venue_available_time_slot_id = :slot_id AND is_expired = false "
+            "ORDER BY created_at LIMIT 1",
+            {"slot_id": 1}
+        ),
+        PlanCheck(
+            "slots starting soon", "ix_venue_available_time_slot_date_start_time",
+            "SELECT id FROM venue_available_time_slot WHERE date = :day AND start_time > :start "
+            "AND start_time <= :end",
+            {"day": today, "start": now.time(), "end": (now + timedelta(hours=2)).time()}
+        ),
+        PlanCheck(
+            "user notifications", "ix_notification_user_created_at",
+            "SELECT id FROM notification WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 20",
+            {"user_id": 1}
+        ),
+        PlanCheck(
+            "recent user activity", "ix_user_activity_user_timestamp",
+            "SELECT id FROM user_activity WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 10",
+            {"user_id": 1}
+        ),
+        PlanCheck(
+            "pending outbox events", "ix_outbox_event_pending",
+            "SELECT id FROM outbox_event WHERE dispatched_at IS NULL ORDER BY id LIMIT 100",
+            {}
+        ),
+    ]
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def run_checks() -> List[str]:
+    """返回未通过的检查说明，全部通过时为空列表"""
+    failures = []
+    with engine.connect() as connection:
+        with connection.begin():
+            connection.execute(text("SET TRANSACTION READ ONLY"))
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+            for check in _checks():
+                plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {check.sql}"), check.params).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(_plan_nodes(plan[0]["Plan"]))
+                indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+                if check.index in indexes:
+                    logger.info(f"{check.name}: uses {check.index}")
+                else:
+                    scans = ", ".join(f"{node['Node Type']} on {node.get('Relation Name', '?')}"
+                                      for node in nodes if "Relation Name" in node)
+                    failures.append(f"{check.name}: expected {check.index}, plan has {scans or 'no scans'}")
+    return failures
+
+
+def main() -> None:
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Query plan checks require PostgreSQL")
+    failures = run_checks()
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"All {len(_checks())} query plans use their indexes")
+
+
+if __name__ == "__main__":
+    main()
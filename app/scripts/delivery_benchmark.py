@@ -0,0 +1,135 @@
+"""
+通知发送吞吐量基准：在本机启动一个 SMTP 接收器和一个短信网关桩服务，
+用 deliver_notifications 任务的发送路径投递一批通知，输出每秒发送的消息数。
+
+    python -m app.scripts.delivery_benchmark --messages 2000
+
+--compare 额外以 SMTP_MAX_MESSAGES_PER_CONNECTION=1（每封邮件新建连接，即改造前的方式）运行一次作为对照。
+--latency-ms 为两个桩服务的每条消息增加固定延迟，模拟真实网关的往返时间。
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.utils.delivery import delivery_loop
+from celery_tasks.tasks.notification_tasks import _deliver
+
+
+class _Counter:
+    def __init__(self):
+        self.emails = 0
+        self.sms = 0
+        self.smtp_connections = 0
+        self.http_connections = 0
+
+
+async def _smtp_session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, counter: _Counter,
+                        latency: float) -> None:
+    """只实现发送所需命令的最小 SMTP 服务端"""
+    counter.smtp_connections += 1
+    writer.write(b"220 sink ESMTP\r\n")
+    await writer.drain()
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        command = line[:4].upper()
+        if command == b"EHLO":
+            writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+        elif command == b"DATA":
+            writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            await writer.drain()
+            while (await reader.readline()) not in (b".\r\n", b""):
+                pass
+            if latency:
+                await asyncio.sleep(latency)
+            counter.emails += 1
+            writer.write(b"250 OK\r\n")
+        elif command == b"QUIT":
+            writer.write(b"221 Bye\r\n")
+            await writer.drain()
+            break
+        else:
+            writer.write(b"250 OK\r\n")
+        await writer.drain()
+    writer.close()
+
+
+async def _http_session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, counter: _Counter,
+                        latency: float) -> None:
+    """支持 keep-alive 的最小 HTTP/1.1 服务端，所有请求返回 200"""
+    counter.http_connections += 1
+    while True:
+        try:
+            headers = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            break
+        length = 0
+        for line in headers.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        await reader.readexactly(length)
+        if latency:
+            await asyncio.sleep(latency)
+        counter.sms += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}")
+        await writer.drain()
+    writer.close()
+
+
+async def _start_stubs(counter: _Counter, latency: float):
+    async def smtp_handler(reader, writer):
+        try:
+            await _smtp_session(reader, writer, counter, latency)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+    async def http_handler(reader, writer):
+        try:
+            await _http_session(reader, writer, counter, latency)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+    smtp_server = await asyncio.start_server(smtp_handler, "127.0.0.1", 0)
+    http_server = await asyncio.start_server(http_handler, "127.0.0.1", 0)
+    return smtp_server, http_server
+
+
+def _run(label: str, messages: int, counter: _Counter) -> None:
+    deliveries = [[f"user{i}@example.com", f"1380000{i:04d}", "Benchmark", "Benchmark message"]
+                  for i in range(messages)]
+    started = time.perf_counter()
+    failed = delivery_loop.run(_deliver(deliveries))
+    elapsed = time.perf_counter() - started
+    sent = counter.emails + counter.sms
+    print(f"{label}: {sent / elapsed:.1f} msg/s ({counter.emails} emails, {counter.sms} sms in {elapsed:.2f}s), "
+          f"smtp connections={counter.smtp_connections}, http connections={counter.http_connections}, "
+          f"failed={failed}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Notification delivery throughput benchmark")
+    parser.add_argument("--messages", type=int, default=1000, help="通知条数，每条发送一封邮件和一条短信")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+
+    counter = _Counter()
+    smtp_server, http_server = delivery_loop.run(_start_stubs(counter, args.latency_ms / 1000))
+    settings.SMTP_HOST, settings.SMTP_PORT = smtp_server.sockets[0].getsockname()[:2]
+    settings.SMTP_USE_TLS = False
+    settings.SMTP_USER = ""
+    settings.SMS_API_URL = "http://%s:%d/sms" % http_server.sockets[0].getsockname()[:2]
+
+    runs = [("pooled", settings.SMTP_MAX_MESSAGES_PER_CONNECTION)]
+    if args.compare:
+        runs.append(("connection per email", 1))
+    for label, max_messages in runs:
+        settings.SMTP_MAX_MESSAGES_PER_CONNECTION = max_messages
+        counter.__init__()
+        _run(label, args.messages, counter)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from app.models.leader_reserved_time import LeaderReservedTime
 from app.models.feedback import Feedback
 from app.models.notification import Notification
 from app.core.security import get_password_hash
+from app.services.reference_data_service import ReferenceDataService
 from datetime import date, time, datetime, timedelta
 from app.core.config import get_logger
 import random
@@ -204,6 +205,9 @@ def create_sample_reservation_rules(db: Session):
         db.add_all([employee_rule, vip_rule])
 
     db.commit()
+    # 共享缓存后端下，已缓存的“无规则”结果对 API 进程可见，写入后需要失效
+    for venue in venues:
+        ReferenceDataService.invalidate_rules(venue.id)
 
 
 def create_sample_available_time_slots(db: Session):
@@ -0,0 +1,67 @@
+"""
+读接口压测：以固定并发持续请求可用性和仪表盘接口，输出吞吐量和延迟分位数。
+
+分别以 ASYNC_DB_ENABLED=false 和 ASYNC_DB_ENABLED=true 启动服务（单个 uvicorn worker）后各运行一次，
+对比两种数据库模式：
+    python -m app.scripts.load_test --base-url http://localhost:8000 \
+        --username admin --password 123456 --venue-id 1 --concurrency 500 --seconds 30
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List
+
+from app.scripts.login_benchmark import _get_token, _percentile
+
+
+def _worker(url: str, token: str, deadline: float, samples: List[float], errors: Dict[str, int],
+            lock: threading.Lock) -> None:
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+        except (urllib.error.URLError, OSError) as e:
+            key = str(getattr(e, "code", type(e).__name__))
+            with lock:
+                errors[key] = errors.get(key, 0) + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read endpoint load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--venue-id", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    token = _get_token(args.base_url, args.username, args.password)
+    today = date.today()
+    targets = {
+        "availability": f"{args.base_url}/api/v1/reservations/venues/{args.venue_id}/availability"
+                        f"?start_date={today}&end_date={today + timedelta(days=6)}",
+        "dashboard": f"{args.base_url}/api/v1/users/dashboard",
+    }
+
+    for name, url in targets.items():
+        samples, errors, lock = [], {}, threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for _ in range(args.concurrency):
+                executor.submit(_worker, url, token, deadline, samples, errors, lock)
+        print(f"{name}: {len(samples) / args.seconds:.1f} req/s, n={len(samples)}, "
+              f"p50={_percentile(samples, 50)}ms p99={_percentile(samples, 99)}ms, errors={errors}")
+
+
+if __name__ == "__main__":
+    main()
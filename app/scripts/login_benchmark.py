@@ -0,0 +1,100 @@
+"""
+登录压测：并发发起一批登录请求，同时持续探测另一个接口，比较探测接口在压测前后的延迟分位数。
+
+用法（服务已启动）：
+    python -m app.scripts.login_benchmark --base-url http://localhost:8000 \
+        --username admin --password 123456 --logins 200
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+
+def _percentile(samples: List[float], percent: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 1)
+
+
+def _login(base_url: str, username: str, password: str) -> int:
+    data = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    request = urllib.request.Request(f"{base_url}/api/v1/users/login", data=data, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _get_token(base_url: str, username: str, password: str) -> str:
+    data = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    with urllib.request.urlopen(f"{base_url}/api/v1/users/login", data=data, timeout=60) as response:
+        return json.loads(response.read())["access_token"]
+
+
+def _probe(base_url: str, path: str, token: str, stop: threading.Event, samples: List[float]) -> None:
+    request = urllib.request.Request(f"{base_url}{path}", headers={"Authorization": f"Bearer {token}"})
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except urllib.error.URLError:
+            pass
+        samples.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def _measure(base_url: str, path: str, token: str, seconds: float) -> List[float]:
+    stop, samples = threading.Event(), []
+    thread = threading.Thread(target=_probe, args=(base_url, path, token, stop, samples))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Login burst benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/api/v1/users/upcoming-reservations")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    token = _get_token(args.base_url, args.username, args.password)
+    baseline = _measure(args.base_url, args.probe_path, token, args.baseline_seconds)
+
+    stop, during = threading.Event(), []
+    probe = threading.Thread(target=_probe, args=(args.base_url, args.probe_path, token, stop, during))
+    probe.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        statuses = list(executor.map(
+            lambda _: _login(args.base_url, args.username, args.password), range(args.logins)
+        ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe.join()
+
+    status_counts = {status: statuses.count(status) for status in set(statuses)}
+    print(f"logins: {args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s), statuses: {status_counts}")
+    for label, samples in (("baseline", baseline), ("during burst", during)):
+        print(f"{args.probe_path} {label}: n={len(samples)} "
+              f"p50={_percentile(samples, 50)}ms p99={_percentile(samples, 99)}ms")
+
+
+if __name__ == "__main__":
+    main()
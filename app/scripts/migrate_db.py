@@ -0,0 +1,99 @@
+from sqlalchemy import inspect, text
+from app.db.database import engine, Base
+from app.core.config import get_logger
+import app.models  # noqa: F401  确保所有模型都注册到 Base.metadata
+
+logger = get_logger(__name__)
+
+
+def create_missing_tables():
+    # create_all 默认 checkfirst，只会创建尚不存在的表（连同其索引）
+    Base.metadata.create_all(bind=engine)
+
+
+def _invalid_indexes(connection) -> set:
+    """PostgreSQL 中因 CREATE INDEX CONCURRENTLY 失败而残留的无效索引"""
+    return set(connection.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    )).scalars().all())
+
+
+def create_missing_indexes():
+    """
+    为已存在的表补建模型中声明、但数据库中还没有的索引。
+
+    create_all 不会为已经存在的表追加新索引，这里逐个比对后创建，可重复执行。
+    PostgreSQL 上以 CREATE INDEX CONCURRENTLY 在自动提交模式下逐个创建，建索引期间不阻塞表的写入；
+    上次中断留下的无效索引先删除再重建。
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    concurrently = engine.dialect.name == "postgresql"
+
+    created = 0
+    # CONCURRENTLY 不能在事务块中执行，每条 DDL 单独自动提交
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        invalid_indexes = _invalid_indexes(connection) if concurrently else set()
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in invalid_indexes:
+                    logger.warning(f"Dropping invalid index {index.name} left by an interrupted migration")
+                    connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                elif index.name in existing_indexes:
+                    continue
+                logger.info(f"Creating index {index.name} on {table.name}")
+                # 只在这里临时打开 CONCURRENTLY，不影响同一进程中 create_all 生成的 DDL
+                index.dialect_kwargs["postgresql_concurrently"] = concurrently
+                try:
+                    index.create(bind=connection)
+                finally:
+                    index.dialect_kwargs["postgresql_concurrently"] = False
+                created += 1
+
+    logger.info(f"Index migration finished, {created} index(es) created")
+    return created
+
+
+def add_missing_columns():
+    """
+    为已存在的表补加模型中新增的可空列。
+
+    只处理 nullable 的列，非空列需要回填数据，应单独编写迁移。
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    added = 0
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable:
+                    logger.warning(f"Skipping non-nullable column {table.name}.{column.name}, migrate it manually")
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                logger.info(f"Adding column {column.name} to {table.name}")
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                added += 1
+
+    logger.info(f"Column migration finished, {added} column(s) added")
+    return added
+
+
+def upgrade():
+    create_missing_tables()
+    add_missing_columns()
+    create_missing_indexes()
+
+
+if __name__ == "__main__":
+    upgrade()
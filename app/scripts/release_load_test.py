@@ -0,0 +1,155 @@
+"""
+放号压测：模拟大量用户在同一时刻抢订同一场馆同一天的时间段，统计响应状态分布和延迟分位数。
+
+准备阶段注册（已存在则跳过）并登录 --users 个测试用户，令牌缓存到 --token-file，重复运行时不再登录；
+放号阶段所有用户在同一时刻提交预约，--hot-ratio 比例的请求集中到第一个时间段。
+--retries 大于 0 时按 503 响应的 Retry-After 重试（携带同一个 Idempotency-Key）。
+
+    python -m app.scripts.release_load_test --base-url http://localhost:8000 --venue-id 1 \
+        --date 2026-10-18 --users 10000 --concurrency 1000 --retries 2
+
+对比准入控制的效果：分别以 ADMISSION_ENABLED=true / false 启动服务后各运行一次。
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.scripts.login_benchmark import _get_token, _percentile
+
+
+def _request(url: str, data: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+             method: str = "GET") -> Tuple[int, Dict[str, str], bytes]:
+    request = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def _prepare_user(base_url: str, prefix: str, index: int, password: str) -> Tuple[int, str]:
+    username = f"{prefix}{index}"
+    body = json.dumps({
+        "username": username,
+        "email": f"{username}@loadtest.example.com",
+        "phone": f"139{index:08d}",
+        "password": password
+    }).encode()
+    _request(f"{base_url}/api/v1/users/register", body, {"Content-Type": "application/json"}, "POST")
+    token = _get_token(base_url, username, password)
+    status, _, me = _request(f"{base_url}/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    if status != 200:
+        raise RuntimeError(f"Failed to load user {username}: {status}")
+    return json.loads(me)["id"], token
+
+
+def _prepare_users(args) -> List[Tuple[int, str]]:
+    if args.token_file and os.path.exists(args.token_file):
+        with open(args.token_file) as f:
+            users = [tuple(user) for user in json.load(f)]
+        if len(users) >= args.users:
+            return users[:args.users]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.setup_concurrency) as executor:
+        users = list(executor.map(
+            lambda index: _prepare_user(args.base_url, args.user_prefix, index, args.password), range(args.users)
+        ))
+    print(f"Prepared {len(users)} users in {time.perf_counter() - started:.1f}s")
+    if args.token_file:
+        with open(args.token_file, "w") as f:
+            json.dump(users, f)
+    return users
+
+
+def _load_slots(base_url: str, token: str, venue_id: int, day: str) -> List[Dict[str, str]]:
+    query = urllib.parse.urlencode({"start_date": day, "end_date": day})
+    status, _, body = _request(f"{base_url}/api/v1/reservations/venues/{venue_id}/availability?{query}",
+                               headers={"Authorization": f"Bearer {token}"})
+    if status != 200:
+        raise RuntimeError(f"Failed to load availability: {status} {body[:200]!r}")
+    return [slot for day_availability in json.loads(body) for slot in day_availability["time_slots"]]
+
+
+def _book(base_url: str, user: Tuple[int, str], venue_id: int, day: str, slot: Dict[str, str], retries: int,
+          start: threading.Event) -> Tuple[int, float, int]:
+    user_id, token = user
+    body = json.dumps({
+        "user_id": user_id,
+        "venue_id": venue_id,
+        "date": day,
+        "start_time": slot["start_time"],
+        "end_time": slot["end_time"]
+    }).encode()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json",
+               "Idempotency-Key": str(uuid.uuid4())}
+    start.wait()
+    started = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        status, response_headers, _ = _request(f"{base_url}/api/v1/reservations/reservations", body, headers, "POST")
+        if status != 503 or attempts > retries:
+            return status, time.perf_counter() - started, attempts
+        time.sleep(float(response_headers.get("Retry-After", 1)) * (1 + random.random()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Slot release load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--venue-id", type=int, default=1)
+    parser.add_argument("--date", required=True, help="放号日期 YYYY-MM-DD")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--user-prefix", default="loadtest_")
+    parser.add_argument("--password", default="LoadTest123!")
+    parser.add_argument("--token-file", default="release_load_test_tokens.json")
+    parser.add_argument("--setup-concurrency", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1000, help="同时发出请求的客户端线程数")
+    parser.add_argument("--hot-ratio", type=float, default=0.5, help="集中抢订第一个时间段的请求比例")
+    parser.add_argument("--retries", type=int, default=0)
+    args = parser.parse_args()
+
+    users = _prepare_users(args)
+    slots = _load_slots(args.base_url, users[0][1], args.venue_id, args.date)
+    if not slots:
+        raise SystemExit(f"No time slots for venue {args.venue_id} on {args.date}")
+
+    start = threading.Event()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(_book, args.base_url, user, args.venue_id, args.date,
+                            slots[0] if random.random() < args.hot_ratio else random.choice(slots),
+                            args.retries, start)
+            for user in users
+        ]
+        released_at = time.perf_counter()
+        start.set()
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - released_at
+
+    by_status: Dict[int, List[float]] = {}
+    for status, latency, _ in results:
+        by_status.setdefault(status, []).append(latency)
+    print(f"{len(results)} users, {len(slots)} slots, {elapsed:.1f}s, "
+          f"{len(results) / elapsed:.1f} req/s, attempts={sum(result[2] for result in results)}")
+    for status, latencies in sorted(by_status.items()):
+        print(f"  {status}: n={len(latencies)} p50={_percentile(latencies, 50)}ms "
+              f"p99={_percentile(latencies, 99)}ms")
+
+    status, _, body = _request(f"{args.base_url}/stats/admission",
+                               headers={"Authorization": f"Bearer {users[0][1]}"})
+    if status == 200:
+        print(f"admission: {body.decode()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import hashlib
+from array import array
+from datetime import date, time
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.venue_available_time_slot import VenueAvailableTimeSlot
+from app.core.cache import TTLCache, register_cache
+from app.core.availability_hub import availability_hub, capacity_event, reload_event
+from app.core.config import settings, get_logger
+
+logger = get_logger(__name__)
+
+# 占用名额的预约状态
+ACTIVE_RESERVATION_STATUSES = (ReservationStatus.PENDING, ReservationStatus.CONFIRMED, ReservationStatus.CHECKED_IN)
+
+
+def _to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _from_minutes(value: int) -> time:
+    return time(value // 60, value % 60)
+
+
+class SnapshotSlot(NamedTuple):
+    slot_id: int
+    start_time: time
+    end_time: time
+    remaining: int
+    total: int
+
+
+class DaySnapshot:
+    """
+    一个场馆一天的可用性快照。
+
+    时间段按开始时间排序后存为定长数组：开始/结束时间（当天分钟数）、剩余容量和总容量，
+    总容量 = 剩余容量 + 占用名额的预约数。``etag`` 由数组内容计算，跨进程稳定。
+    """
+
+    __slots__ = ("slot_ids", "starts", "ends", "remaining", "totals", "etag")
+
+    def __init__(self, slot_ids: array, starts: array, ends: array, remaining: array, totals: array):
+        self.slot_ids = slot_ids
+        self.starts = starts
+        self.ends = ends
+        self.remaining = remaining
+        self.totals = totals
+        digest = hashlib.blake2b(digest_size=8)
+        for packed in (slot_ids, starts, ends, remaining, totals):
+            digest.update(packed.tobytes())
+        self.etag = digest.hexdigest()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, time, time, int, int]]) -> "DaySnapshot":
+        slot_ids, starts, ends, remaining, totals = array("q"), array("H"), array("H"), array("l"), array("l")
+        for slot_id, start_time, end_time, capacity, booked in sorted(rows, key=lambda row: (row[1], row[2])):
+            slot_ids.append(slot_id)
+            starts.append(_to_minutes(start_time))
+            ends.append(_to_minutes(end_time))
+            remaining.append(capacity)
+            totals.append(capacity + booked)
+        return cls(slot_ids, starts, ends, remaining, totals)
+
+    def with_remaining(self, slot_id: int, remaining: int) -> "DaySnapshot":
+        """返回更新了一个时间段剩余容量的新快照；总容量不变"""
+        try:
+            position = self.slot_ids.index(slot_id)
+        except ValueError:
+            return self
+        updated = array(self.remaining.typecode, self.remaining)
+        updated[position] = remaining
+        return DaySnapshot(self.slot_ids, self.starts, self.ends, updated, self.totals)
+
+    def __len__(self) -> int:
+        return len(self.slot_ids)
+
+    def __iter__(self) -> Iterator[SnapshotSlot]:
+        for position in range(len(self.slot_ids)):
+            yield SnapshotSlot(
+                self.slot_ids[position],
+                _from_minutes(self.starts[position]),
+                _from_minutes(self.ends[position]),
+                self.remaining[position],
+                self.totals[position]
+            )
+
+
+# (venue_id, date) -> DaySnapshot；由预约、取消和时间段修改增量维护，按 LRU 限制条目数。
+# 其他进程的修改不会更新本进程的快照，TTL 限制多进程间的不一致窗口；快照只用于展示，预约仍以数据库为准
+_snapshot_cache = register_cache(
+    "availability_snapshot",
+    TTLCache(ttl_seconds=settings.SLOT_INDEX_TTL_SECONDS, max_entries=settings.SLOT_INDEX_MAX_ENTRIES)
+)
+
+
+class AvailabilitySnapshotService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_days(self, venue_id: int, start_date: date, end_date: date) -> Dict[date, DaySnapshot]:
+        """返回 [start_date, end_date] 内每一天的快照，缓存未命中的日期用一次聚合查询加载"""
+        days: Dict[date, DaySnapshot] = {}
+        missing = []
+        for offset in range((end_date - start_date).days + 1):
+            day = date.fromordinal(start_date.toordinal() + offset)
+            snapshot = _snapshot_cache.get((venue_id, day))
+            if snapshot is None:
+                missing.append(day)
+            else:
+                days[day] = snapshot
+
+        if missing:
+            booked = func.count(Reservation.id)
+            rows = self.db.query(
+                VenueAvailableTimeSlot.id,
+                VenueAvailableTimeSlot.date,
+                VenueAvailableTimeSlot.start_time,
+                VenueAvailableTimeSlot.end_time,
+                VenueAvailableTimeSlot.capacity,
+                booked
+            ).outerjoin(
+                Reservation,
+                and_(
+                    Reservation.venue_available_time_slot_id == VenueAvailableTimeSlot.id,
+                    Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)
+                )
+            ).filter(
+                VenueAvailableTimeSlot.venue_id == venue_id,
+                VenueAvailableTimeSlot.date.between(missing[0], missing[-1])
+            ).group_by(VenueAvailableTimeSlot.id).all()
+
+            grouped: Dict[date, list] = {day: [] for day in missing}
+            for slot_id, slot_date, start_time, end_time, capacity, booked_count in rows:
+                if slot_date in grouped:
+                    grouped[slot_date].append((slot_id, start_time, end_time, capacity, booked_count))
+            for day, day_rows in grouped.items():
+                snapshot = DaySnapshot.from_rows(day_rows)
+                _snapshot_cache.set((venue_id, day), snapshot)
+                days[day] = snapshot
+
+        return dict(sorted(days.items()))
+
+    @staticmethod
+    def combined_etag(days: Dict[date, DaySnapshot], *extra: object) -> str:
+        """多天快照与额外参数（分页、模板等）组合成一个 ETag"""
+        digest = hashlib.blake2b(digest_size=12)
+        for day, snapshot in days.items():
+            digest.update(f"{day.isoformat()}:{snapshot.etag};".encode())
+        for value in extra:
+            digest.update(f"|{value}".encode())
+        return f'"{digest.hexdigest()}"'
+
+    # 以下方法是可用性变化的唯一入口，同时向订阅了该场馆的客户端推送增量（见 availability_hub）
+    # 只在事务提交之后调用，订阅者不会收到随后被回滚的变化
+
+    @staticmethod
+    def record_remaining(venue_id: int, slot_date: date, slot_id: int, remaining: int) -> None:
+        _snapshot_cache.update((venue_id, slot_date), lambda snapshot: snapshot.with_remaining(slot_id, remaining))
+        availability_hub.publish(capacity_event(venue_id, slot_date, slot_id, remaining))
+
+    @staticmethod
+    def invalidate(venue_id: int, slot_date: date = None) -> None:
+        if slot_date is not None:
+            _snapshot_cache.delete((venue_id, slot_date))
+        else:
+            _snapshot_cache.delete_where(lambda key: key[0] == venue_id)
+        availability_hub.publish(reload_event(venue_id, slot_date))
+
+    @staticmethod
+    def invalidate_venues(venue_ids: Iterable[int]) -> None:
+        venue_ids = set(venue_ids)
+        _snapshot_cache.delete_where(lambda key: key[0] in venue_ids)
+        availability_hub.publish_many(reload_event(venue_id) for venue_id in venue_ids)
@@ -3,8 +3,8 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
 from app.models.facility import Facility
-from app.models.venue import Venue
 from app.schemas.facility import FacilityCreate, FacilityUpdate
+from app.services.reference_data_service import ReferenceDataService
 from app.core.config import get_logger
 
 logger = get_logger(__name__)
@@ -21,18 +21,18 @@ class FacilityService:
         return facility
 
     def get_facilities(self, venue_id: int = None, skip: int = 0, limit: int = 100) -> List[Facility]:
-        query = self.db.query(Facility)
         if venue_id:
-            query = query.filter(Facility.venue_id == venue_id)
-        return query.offset(skip).limit(limit).all()
+            return ReferenceDataService(self.db).get_facilities(venue_id)[skip:skip + limit]
+        return self.db.query(Facility).offset(skip).limit(limit).all()
 
     def create_facility(self, venue_id: int, facility: FacilityCreate):
         # 检查对应的具体场馆是否存在
-        db_venue = self.db.query(Venue).filter(Venue.id == venue_id).first()
+        db_venue = ReferenceDataService(self.db).get_venue(venue_id)
         if db_venue:
             db_facility = Facility(**facility.dict(), venue_id=venue_id)
             self.db.add(db_facility)
             self.db.commit()
+            ReferenceDataService.invalidate_facilities(venue_id)
             self.db.refresh(db_facility)
             return db_facility
         else:
@@ -44,10 +44,13 @@ class FacilityService:
         for key, value in update_data.items():
             setattr(db_facility, key, value)
         self.db.commit()
+        ReferenceDataService.invalidate_facilities(db_facility.venue_id)
         self.db.refresh(db_facility)
         return db_facility
 
     def delete_facility(self, facility_id: int):
         db_facility = self.get_facility(facility_id)
+        venue_id = db_facility.venue_id
         self.db.delete(db_facility)
         self.db.commit()
+        ReferenceDataService.invalidate_facilities(venue_id)
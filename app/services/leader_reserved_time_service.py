@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.leader_reserved_time import LeaderReservedTime
 from app.schemas.leader_reserved_time import LeaderReservedTimeCreate, LeaderReservedTimeUpdate
+from app.services.slot_interval_index import SlotIntervalIndex
 
 
 class LeaderReservedTimeService:
@@ -12,6 +13,7 @@ class LeaderReservedTimeService:
         self.db.add(db_leader_reserved_time)
         self.db.commit()
         self.db.refresh(db_leader_reserved_time)
+        SlotIntervalIndex.invalidate_leader_times(db_leader_reserved_time.venue_id)
         return db_leader_reserved_time
 
     def get_leader_reserved_times(self, venue_id: int):
@@ -23,16 +25,21 @@ class LeaderReservedTimeService:
     def update_leader_reserved_time(self, leader_reserved_time_id: int, leader_reserved_time: LeaderReservedTimeUpdate):
         db_leader_reserved_time = self.db.query(LeaderReservedTime).filter(LeaderReservedTime.id == leader_reserved_time_id).first()
         if db_leader_reserved_time:
+            old_venue_id = db_leader_reserved_time.venue_id
             update_data = leader_reserved_time.dict(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(db_leader_reserved_time, key, value)
             self.db.commit()
             self.db.refresh(db_leader_reserved_time)
+            SlotIntervalIndex.invalidate_leader_times(old_venue_id)
+            SlotIntervalIndex.invalidate_leader_times(db_leader_reserved_time.venue_id)
         return db_leader_reserved_time
 
     def delete_leader_reserved_time(self, leader_reserved_time_id: int):
         db_leader_reserved_time = self.db.query(LeaderReservedTime).filter(LeaderReservedTime.id == leader_reserved_time_id).first()
         if db_leader_reserved_time:
+            venue_id = db_leader_reserved_time.venue_id
             self.db.delete(db_leader_reserved_time)
             self.db.commit()
+            SlotIntervalIndex.invalidate_leader_times(venue_id)
         return db_leader_reserved_time
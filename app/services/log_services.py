@@ -1,10 +1,22 @@
 import json
 from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
 from app.models.user_log import UserLog
+from app.services.outbox_service import OutboxService, EVENT_USER_LOG
 from celery_tasks.tasks.log_tasks import log_user_operation, archive_logs
 
 
-def log_operation(user_id: int, operation: str, details: dict = None):
+def log_operation(user_id: int, operation: str, details: dict = None, db: Optional[Session] = None):
+    """
+    记录用户操作。
+
+    传入 db 时写入发件箱，随调用方的事务提交，由 dispatcher 批量写入日志库，请求路径上不访问消息代理；
+    未传入时直接提交 Celery 任务。
+    """
+    if db is not None:
+        OutboxService(db).add(EVENT_USER_LOG, {'user_id': user_id, 'operation': operation, 'details': details})
+        return
     log_data = {
         'user_id': user_id,
         'operation': operation,
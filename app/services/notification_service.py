@@ -1,4 +1,5 @@
-from typing import List
+from typing import List, NamedTuple, Sequence
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.models.user import User
@@ -6,13 +7,20 @@ from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate, NotificationUpdate
 from app.schemas.reservation import ReservationRead
 from app.core.exceptions import NotificationNotFoundError, UserNotFoundError
-from app.core.config import get_logger
+from app.core.config import settings, get_logger
 from app.utils.templates import get_notification_template
-from celery_tasks.tasks.notification_tasks import send_email_task, send_sms_task
+from app.services.outbox_service import OutboxService, EVENT_NOTIFICATION_DELIVERY
 
 logger = get_logger(__name__)
 
 
+class NotificationMessage(NamedTuple):
+    user_id: int
+    title: str
+    content: str
+    type: str = "GENERAL"
+
+
 class NotificationService:
     def __init__(self, db: Session):
         self.db = db
@@ -69,81 +77,128 @@ class NotificationService:
             logger.error(f"Error deleting notification: {str(e)}")
             raise
 
-    def notify_user(self, user_id: int, title: str, content: str, type: str = "GENERAL") -> None:
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
+    def notify_user(self, user_id: int, title: str, content: str, type: str = "GENERAL",
+                    commit: bool = True) -> None:
+        user_exists = self.db.query(User.id).filter(User.id == user_id).first()
+        if not user_exists:
             logger.warning(f"User not found: {user_id}")
             raise UserNotFoundError(f"User with id {user_id} not found")
+        self.notify_users([NotificationMessage(user_id, title, content, type)], commit=commit)
 
-        notification = Notification(
-            user_id=user_id,
-            title=title,
-            content=content,
-            type=type
-        )
-        self.db.add(notification)
-        try:
-            self.db.commit()
-            logger.info(f"Notification created for user {user_id}")
+    def notify_users(self, messages: Sequence[NotificationMessage], commit: bool = False) -> int:
+        """
+        批量创建通知。
+
+        收件人的联系方式用一次查询获取，通知用一条多行 INSERT 写入调用方的事务；
+        commit=False 时由调用方提交。邮件和短信按 NOTIFICATION_BATCH_SIZE 分块写入发件箱，
+        与通知在同一事务中提交，事务回滚时不会发送。不存在的用户会被跳过。
 
-            # 记录要发送的邮件内容
-            logger.info(f"Email would be sent to {user.email}: Subject: {title}, Content: {content}")
-            logger.info(f"SMS would be sent to {user.phone}: Content: {content}")
+        :return: 创建的通知数量
+        """
+        if not messages:
+            return 0
+
+        contacts = {
+            row.id: row for row in self.db.execute(
+                select(User.id, User.email, User.phone).where(User.id.in_({m.user_id for m in messages}))
+            )
+        }
+        rows, deliveries = [], []
+        for message in messages:
+            contact = contacts.get(message.user_id)
+            if contact is None:
+                logger.warning(f"User not found, notification skipped: {message.user_id}")
+                continue
+            rows.append({
+                "user_id": message.user_id,
+                "title": message.title,
+                "content": message.content,
+                "type": message.type
+            })
+            deliveries.append([contact.email, contact.phone, message.title, message.content])
 
-            # # 异步发送邮件和短信
-            # send_email_task.delay(user.email, title, content)
-            # send_sms_task.delay(user.phone, content)
+        if not rows:
+            return 0
 
+        try:
+            self.db.execute(insert(Notification), rows)
+            self._schedule_delivery(deliveries)
+            if commit:
+                self.db.commit()
         except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error notifying user {user_id}: {str(e)}")
+            if commit:
+                self.db.rollback()
+            logger.error(f"Error creating {len(rows)} notifications: {str(e)}")
             raise
+        logger.info(f"Created {len(rows)} notifications")
+        return len(rows)
+
+    def _schedule_delivery(self, deliveries: List[list]) -> None:
+        if not settings.NOTIFICATION_DELIVERY_ENABLED:
+            for email, phone, title, content in deliveries:
+                logger.debug(f"Email would be sent to {email}: Subject: {title}, Content: {content}")
+                logger.debug(f"SMS would be sent to {phone}: Content: {content}")
+            return
+        batch_size = settings.NOTIFICATION_BATCH_SIZE
+        OutboxService(self.db).add_many(
+            EVENT_NOTIFICATION_DELIVERY,
+            (deliveries[start:start + batch_size] for start in range(0, len(deliveries), batch_size))
+        )
 
     def send_reservation_reminder(self, reservation: ReservationRead) -> None:
-        user = self.db.query(User).filter(User.id == reservation.user_id).first()
-        if user:
-            content = get_notification_template("reservation_reminder", {
-                "username": user.username,
-                "sport_venue_name": reservation.sport_venue_name,
-                "venue_name": reservation.venue_name,
-                "date": reservation.date,
-                "start_time": reservation.start_time,
-                "end_time": reservation.end_time
-            })
-            self.notify_user(
-                user_id=user.id,
+        self.send_reservation_reminders([reservation], commit=True)
+
+    def send_reservation_reminders(self, reservations: Sequence[ReservationRead], commit: bool = False) -> int:
+        usernames = self._get_usernames(reservation.user_id for reservation in reservations)
+        messages = [
+            NotificationMessage(
+                user_id=reservation.user_id,
                 title="Reservation Reminder",
-                content=content,
+                content=get_notification_template("reservation_reminder", {
+                    "username": usernames[reservation.user_id],
+                    "sport_venue_name": reservation.sport_venue_name,
+                    "venue_name": reservation.venue_name,
+                    "date": reservation.date,
+                    "start_time": reservation.start_time,
+                    "end_time": reservation.end_time
+                }),
                 type="REMINDER"
             )
-        else:
-            logger.warning(f"User not found for reservation reminder: {reservation.user_id}")
+            for reservation in reservations if reservation.user_id in usernames
+        ]
+        return self.notify_users(messages, commit=commit)
 
     def send_reservation_cancellation_notice(self, reservation: ReservationRead, reason: str) -> None:
-        user = self.db.query(User).filter(User.id == reservation.user_id).first()
-        if user:
-            content = get_notification_template("reservation_cancellation", {
-                "username": user.username,
-                "sport_venue_name": reservation.sport_venue_name,
-                "venue_name": reservation.venue_name,
-                "date": reservation.date,
-                "start_time": reservation.start_time,
-                "end_time": reservation.end_time,
-                "reason": reason
-            })
-            self.notify_user(
-                user_id=user.id,
+        self.send_reservation_cancellation_notices([reservation], reason, commit=True)
+
+    def send_reservation_cancellation_notices(self, reservations: Sequence[ReservationRead], reason: str,
+                                              commit: bool = False) -> int:
+        usernames = self._get_usernames(reservation.user_id for reservation in reservations)
+        messages = [
+            NotificationMessage(
+                user_id=reservation.user_id,
                 title="Reservation Cancellation Notice",
-                content=content,
+                content=get_notification_template("reservation_cancellation", {
+                    "username": usernames[reservation.user_id],
+                    "sport_venue_name": reservation.sport_venue_name,
+                    "venue_name": reservation.venue_name,
+                    "date": reservation.date,
+                    "start_time": reservation.start_time,
+                    "end_time": reservation.end_time,
+                    "reason": reason
+                }),
                 type="CANCELLATION"
             )
-        else:
-            logger.warning(f"User not found for reservation cancellation notice: {reservation.user_id}")
+            for reservation in reservations if reservation.user_id in usernames
+        ]
+        return self.notify_users(messages, commit=commit)
 
     def send_bulk_notifications(self, user_ids: List[int], title: str, content: str,
                                       type: str = "GENERAL") -> None:
-        for user_id in user_ids:
-            try:
-                self.notify_user(user_id, title, content, type)
-            except Exception as e:
-                logger.error(f"Failed to send notification to user {user_id}: {str(e)}")
+        self.notify_users([NotificationMessage(user_id, title, content, type) for user_id in user_ids], commit=True)
+
+    def _get_usernames(self, user_ids) -> dict:
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+        return dict(self.db.query(User.id, User.username).filter(User.id.in_(user_ids)).all())
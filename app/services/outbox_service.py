@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List
+
+from sqlalchemy import update, delete
+from sqlalchemy.orm import Session
+
+from app.models.outbox_event import OutboxEvent
+from app.core.config import settings, get_logger
+from celery_tasks.tasks.notification_tasks import deliver_notifications_task
+from celery_tasks.tasks.log_tasks import log_user_operations
+
+logger = get_logger(__name__)
+
+EVENT_NOTIFICATION_DELIVERY = "notification.deliver"  # payload: [[email, phone, title, content], ...]
+EVENT_USER_LOG = "user_log"  # payload: {"user_id", "operation", "details"}
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _send_notification_deliveries(items: List[Any]) -> None:
+    for chunk in _chunks(items, settings.NOTIFICATION_BATCH_SIZE):
+        deliver_notifications_task.delay(chunk)
+
+
+def _send_user_logs(items: List[Any]) -> None:
+    for chunk in _chunks(items, settings.OUTBOX_DISPATCH_BATCH_SIZE):
+        log_user_operations.delay(chunk)
+
+
+# event_type -> 接收该类型所有待发送条目（payload 为列表时展开）的发送函数
+_HANDLERS: Dict[str, Callable[[List[Any]], None]] = {
+    EVENT_NOTIFICATION_DELIVERY: _send_notification_deliveries,
+    EVENT_USER_LOG: _send_user_logs,
+}
+
+
+class OutboxService:
+    """
+    事务性发件箱。
+
+    add / add_many 只把事件加入当前 Session，由调用方的事务一起提交；请求路径上不再访问消息代理。
+    dispatch_pending 由 Celery 定时任务调用：锁定一批未发送的行（SKIP LOCKED，多个 dispatcher 互不阻塞），
+    同类事件合并后按批次发送，成功后标记 dispatched_at。发送失败的行保留并记录错误，
+    超过 OUTBOX_MAX_ATTEMPTS 次后不再重试，留待人工处理。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add(self, event_type: str, payload: Any) -> None:
+        self.db.add(OutboxEvent(event_type=event_type, payload=payload))
+
+    def add_many(self, event_type: str, payloads: Iterable[Any]) -> None:
+        self.db.add_all([OutboxEvent(event_type=event_type, payload=payload) for payload in payloads])
+
+    def dispatch_pending(self, batch_size: int = None) -> int:
+        """发送一批待发送事件，返回成功发送的行数"""
+        batch_size = batch_size or settings.OUTBOX_DISPATCH_BATCH_SIZE
+        events = self.db.query(OutboxEvent).filter(
+            OutboxEvent.dispatched_at.is_(None),
+            OutboxEvent.attempts < settings.OUTBOX_MAX_ATTEMPTS
+        ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not events:
+            self.db.commit()
+            return 0
+
+        by_type: Dict[str, List[OutboxEvent]] = {}
+        for event in events:
+            by_type.setdefault(event.event_type, []).append(event)
+
+        dispatched_ids, now = [], datetime.now()
+        for event_type, type_events in by_type.items():
+            handler = _HANDLERS.get(event_type)
+            try:
+                if handler is None:
+                    raise ValueError(f"No outbox handler for event type {event_type}")
+                items = []
+                for event in type_events:
+                    if isinstance(event.payload, list):
+                        items.extend(event.payload)
+                    else:
+                        items.append(event.payload)
+                handler(items)
+                dispatched_ids.extend(event.id for event in type_events)
+            except Exception as e:
+                logger.error(f"Failed to dispatch {len(type_events)} outbox events of type {event_type}: {str(e)}")
+                for event in type_events:
+                    event.attempts += 1
+                    event.last_error = str(e)
+
+        if dispatched_ids:
+            self.db.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_(dispatched_ids))
+                .values(dispatched_at=now, attempts=OutboxEvent.attempts + 1),
+                execution_options={"synchronize_session": False}
+            )
+        self.db.commit()
+        logger.info(f"Dispatched {len(dispatched_ids)} of {len(events)} outbox events")
+        return len(dispatched_ids)
+
+    def purge_dispatched(self, older_than_days: int = 7) -> int:
+        """删除已发送超过 older_than_days 天的行"""
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        result = self.db.execute(
+            delete(OutboxEvent).where(OutboxEvent.dispatched_at < cutoff),
+            execution_options={"synchronize_session": False}
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.facility import Facility
+from app.models.reservation_rules import ReservationRules
+from app.models.sport_venue import SportVenue
+from app.models.user import UserRole
+from app.models.venue import Venue
+from app.core.cache import TTLCache, RedisCache, register_cache
+from app.core.config import settings, get_logger
+
+logger = get_logger(__name__)
+
+# 负缓存标记：场馆没有对应角色的预约规则
+_MISSING = "__missing__"
+
+
+def _build_cache():
+    if settings.REFERENCE_CACHE_BACKEND == "redis":
+        cache = RedisCache(settings.REFERENCE_CACHE_REDIS_URL, "reference_data",
+                           settings.REFERENCE_CACHE_TTL_SECONDS)
+    else:
+        cache = TTLCache(ttl_seconds=settings.REFERENCE_CACHE_TTL_SECONDS,
+                         max_entries=settings.REFERENCE_CACHE_MAX_ENTRIES)
+    return register_cache("reference_data", cache)
+
+
+# ("venue", id) / ("sport_venue", id) / ("rules", venue_id, role) / ("facilities", venue_id) -> 列值字典
+_reference_cache = _build_cache()
+
+
+def _to_values(instance: Any) -> Dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(type(instance)).column_attrs}
+
+
+class ReferenceDataService:
+    """
+    场馆、运动场馆、预约规则和设施等参考数据的读穿缓存。
+
+    缓存中只保存列值字典，读取时重建实例并以 ``merge(load=False)`` 挂到当前 Session，
+    调用方拿到的仍是普通的持久化对象（关系属性照常懒加载），但不会产生 SELECT。
+    写路径修改这些表后必须调用对应的 invalidate_* 方法。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _attach(self, model: Type, values: Dict[str, Any]) -> Any:
+        instance = model(**values)
+        make_transient_to_detached(instance)
+        return self.db.merge(instance, load=False)
+
+    def get_sport_venue(self, sport_venue_id: int) -> Optional[SportVenue]:
+        values = _reference_cache.get(("sport_venue", sport_venue_id))
+        if values is None:
+            sport_venue = self.db.query(SportVenue).filter(SportVenue.id == sport_venue_id).first()
+            if sport_venue is None:
+                return None
+            _reference_cache.set(("sport_venue", sport_venue_id), _to_values(sport_venue))
+            return sport_venue
+        return self._attach(SportVenue, values)
+
+    def get_venue(self, venue_id: int) -> Optional[Venue]:
+        """返回场馆，sport_venue 关系已填充"""
+        values = _reference_cache.get(("venue", venue_id))
+        if values is None:
+            venue = self.db.query(Venue).filter(Venue.id == venue_id).first()
+            if venue is None:
+                return None
+            values = _to_values(venue)
+            _reference_cache.set(("venue", venue_id), values)
+        else:
+            venue = self._attach(Venue, values)
+        sport_venue = self.get_sport_venue(values["sport_venue_id"])
+        set_committed_value(venue, "sport_venue", sport_venue)
+        return venue
+
+    def get_rules(self, venue_id: int, user_role: UserRole) -> Optional[ReservationRules]:
+        key = ("rules", venue_id, user_role.value)
+        values = _reference_cache.get(key)
+        if values == _MISSING:
+            return None
+        if values is None:
+            rules = self.db.query(ReservationRules).filter(
+                ReservationRules.venue_id == venue_id,
+                ReservationRules.user_role == user_role
+            ).first()
+            _reference_cache.set(key, _to_values(rules) if rules is not None else _MISSING)
+            return rules
+        return self._attach(ReservationRules, values)
+
+    def get_facilities(self, venue_id: int) -> List[Facility]:
+        rows = _reference_cache.get(("facilities", venue_id))
+        if rows is None:
+            facilities = self.db.query(Facility).filter(Facility.venue_id == venue_id).order_by(Facility.id).all()
+            _reference_cache.set(("facilities", venue_id), [_to_values(facility) for facility in facilities])
+            return facilities
+        return [self._attach(Facility, values) for values in rows]
+
+    @staticmethod
+    def invalidate_venue(venue_id: int) -> None:
+        _reference_cache.delete(("venue", venue_id))
+
+    @staticmethod
+    def invalidate_venues(venue_ids: Iterable[int]) -> None:
+        for venue_id in venue_ids:
+            _reference_cache.delete(("venue", venue_id))
+            _reference_cache.delete(("facilities", venue_id))
+
+    @staticmethod
+    def invalidate_sport_venue(sport_venue_id: int) -> None:
+        _reference_cache.delete(("sport_venue", sport_venue_id))
+
+    @staticmethod
+    def invalidate_rules(venue_id: int, user_role: Optional[UserRole] = None) -> None:
+        roles = [user_role] if user_role is not None else list(UserRole)
+        for role in roles:
+            _reference_cache.delete(("rules", venue_id, role.value))
+
+    @staticmethod
+    def invalidate_facilities(venue_id: int) -> None:
+        _reference_cache.delete(("facilities", venue_id))
+
+    @staticmethod
+    def clear() -> None:
+        _reference_cache.clear()
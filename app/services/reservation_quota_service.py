@@ -0,0 +1,185 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.venue import Venue
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.reservation_rules import ReservationRules
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings, get_logger
+from app.core.exceptions import ReservationLimitExceededError
+
+logger = get_logger(__name__)
+
+
+class QuotaCounts(NamedTuple):
+    daily: int
+    weekly: int
+    monthly: int
+
+
+# (user_id, venue_id) -> (统计所属日期, QuotaCounts)；venue_id 为 None 表示用户在所有场馆的合计
+_quota_cache = register_cache("reservation_quota", TTLCache(ttl_seconds=settings.QUOTA_CACHE_TTL_SECONDS))
+
+
+def _window_starts(today: date):
+    day_start = datetime.combine(today, time.min)
+    week_start = day_start - timedelta(days=today.weekday())
+    month_start = day_start.replace(day=1)
+    return day_start, week_start, month_start
+
+
+class ReservationQuotaService:
+    """
+    预约配额计算。
+
+    日/周/月三个窗口的计数由一条条件聚合查询得到，并按 (user_id, venue_id) 写穿缓存：
+    创建和取消预约时直接调整缓存中的计数，仪表盘等只读场景不再访问数据库。
+    缓存只属于当前进程，其他 worker 的预约在 TTL 内不可见：单次预约的 check_limit 在缓存计数距离上限
+    还有余量时直接通过，接近上限（或缓存未命中）时才在预约事务中重新计数；批量和周期性预约用
+    get_counts_bulk(fresh=True) 总是重新计数。调用方先锁定用户行，使同一用户的预约串行执行。
+    已取消的预约不占用配额；签到不改变计数，已签到的预约仍然占用配额。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_counts(self, user_id: int, venue_id: Optional[int] = None) -> QuotaCounts:
+        today = date.today()
+        cached = _quota_cache.get((user_id, venue_id))
+        if cached is not None and cached[0] == today:
+            return cached[1]
+
+        counts = self._count_from_db(user_id, venue_id, today)
+        _quota_cache.set((user_id, venue_id), (today, counts))
+        return counts
+
+    def get_counts_bulk(self, pairs: Iterable[Tuple[int, int]],
+                        fresh: bool = False) -> Dict[Tuple[int, int], QuotaCounts]:
+        """
+        批量获取多个 (user_id, venue_id) 的配额计数，未命中缓存的部分用一条 GROUP BY 查询补齐。
+
+        :param fresh: 为 True 时忽略缓存，全部从数据库计数（用于预约事务中的权威检查）
+        """
+        today = date.today()
+        result: Dict[Tuple[int, int], QuotaCounts] = {}
+        missing = []
+        for pair in set(pairs):
+            cached = None if fresh else _quota_cache.get(pair)
+            if cached is not None and cached[0] == today:
+                result[pair] = cached[1]
+            else:
+                missing.append(pair)
+
+        if missing:
+            day_start, week_start, month_start = _window_starts(today)
+            rows = self.db.query(
+                Reservation.user_id,
+                Reservation.venue_id,
+                *self._window_count_columns(today)
+            ).filter(
+                Reservation.user_id.in_({user_id for user_id, _ in missing}),
+                Reservation.venue_id.in_({venue_id for _, venue_id in missing}),
+                Reservation.created_at >= min(week_start, month_start),
+                Reservation.status != ReservationStatus.CANCELLED
+            ).group_by(Reservation.user_id, Reservation.venue_id).all()
+
+            found = {
+                (user_id, venue_id): QuotaCounts(daily=daily, weekly=weekly, monthly=monthly)
+                for user_id, venue_id, daily, weekly, monthly in rows
+            }
+            for pair in missing:
+                counts = found.get(pair, QuotaCounts(daily=0, weekly=0, monthly=0))
+                _quota_cache.set(pair, (today, counts))
+                result[pair] = counts
+
+        return result
+
+    def _count_from_db(self, user_id: int, venue_id: Optional[int], today: date) -> QuotaCounts:
+        day_start, week_start, month_start = _window_starts(today)
+
+        query = self.db.query(*self._window_count_columns(today)).filter(
+            Reservation.user_id == user_id,
+            Reservation.created_at >= min(week_start, month_start),
+            Reservation.status != ReservationStatus.CANCELLED
+        )
+        if venue_id is not None:
+            query = query.filter(Reservation.venue_id == venue_id)
+
+        daily, weekly, monthly = query.one()
+        return QuotaCounts(daily=daily, weekly=weekly, monthly=monthly)
+
+    @staticmethod
+    def _window_count_columns(today: date):
+        # 条件聚合：一次扫描同时得到日/周/月三个窗口的计数
+        day_start, week_start, month_start = _window_starts(today)
+        return (
+            func.count(case((Reservation.created_at >= day_start, 1))),
+            func.count(case((Reservation.created_at >= week_start, 1))),
+            func.count(case((Reservation.created_at >= month_start, 1)))
+        )
+
+    @staticmethod
+    def limit_violation(counts: QuotaCounts, rules: ReservationRules, adding: int = 1) -> Optional[str]:
+        """返回再预约 adding 次时超出的配额说明，没有超出时返回None"""
+        if counts.daily + adding > rules.max_daily_reservations:
+            return "Daily reservation limit exceeded"
+        if counts.weekly + adding > rules.max_weekly_reservations:
+            return "Weekly reservation limit exceeded"
+        if counts.monthly + adding > rules.max_monthly_reservations:
+            return "Monthly reservation limit exceeded"
+        return None
+
+    def check_limit(self, user: User, venue: Venue, rules: ReservationRules) -> None:
+        """
+        检查再预约一次是否超出配额；调用方应已锁定用户行。
+
+        缓存计数加上 QUOTA_RECOUNT_MARGIN 次仍不超限时直接通过，不访问数据库；否则在事务中
+        重新计数（权威结果）并刷新缓存。余量覆盖其他 worker 在缓存 TTL 内产生、本进程不可见的预约。
+        """
+        today = date.today()
+        cached = _quota_cache.get((user.id, venue.id))
+        if cached is not None and cached[0] == today and self.limit_violation(
+                cached[1], rules, adding=1 + settings.QUOTA_RECOUNT_MARGIN) is None:
+            return
+
+        counts = self._count_from_db(user.id, venue.id, today)
+        _quota_cache.set((user.id, venue.id), (today, counts))
+        violation = self.limit_violation(counts, rules)
+        if violation:
+            raise ReservationLimitExceededError(violation)
+
+    def record_created(self, user_id: int, venue_id: int, created_at: Optional[datetime] = None) -> None:
+        """预约提交成功后调用，计数加一"""
+        self._apply_delta(user_id, venue_id, created_at or datetime.now(), 1)
+
+    def record_cancelled(self, user_id: int, venue_id: int, created_at: datetime) -> None:
+        """预约取消提交成功后调用，释放其占用的配额"""
+        self._apply_delta(user_id, venue_id, created_at, -1)
+
+    def invalidate(self, user_id: int, venue_id: Optional[int] = None) -> None:
+        _quota_cache.delete((user_id, venue_id))
+        _quota_cache.delete((user_id, None))
+
+    @staticmethod
+    def _apply_delta(user_id: int, venue_id: int, created_at: datetime, delta: int) -> None:
+        today = date.today()
+        day_start, week_start, month_start = _window_starts(today)
+        in_day = int(created_at >= day_start)
+        in_week = int(created_at >= week_start)
+        in_month = int(created_at >= month_start)
+
+        def adjust(entry):
+            anchor, counts = entry
+            if anchor != today:
+                return entry
+            return anchor, QuotaCounts(
+                daily=max(counts.daily + delta * in_day, 0),
+                weekly=max(counts.weekly + delta * in_week, 0),
+                monthly=max(counts.monthly + delta * in_month, 0)
+            )
+
+        for key in ((user_id, venue_id), (user_id, None)):
+            _quota_cache.update(key, adjust)
@@ -1,9 +1,10 @@
 import logging
 from typing import List, Union, Dict, Optional, Any, Tuple
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, select
-from datetime import datetime, timedelta, date
+from sqlalchemy import and_, or_, select, update, insert, delete, func, case
+from datetime import datetime, timedelta, date, time
 from app.core.config import settings
 
 from app.models import UserActivity
@@ -13,23 +14,31 @@ from app.models.venue import Venue
 from app.models.reservation import Reservation, ReservationStatus
 from app.models.reservation_rules import ReservationRules
 from app.models.recurring_reservation import RecurringReservation, RecurrencePattern
-from app.models.leader_reserved_time import LeaderReservedTime
 from app.models.venue_available_time_slot import VenueAvailableTimeSlot
 from app.models.waiting_list import WaitingList
 from app.schemas.reservation import (ReservationCreate, ReservationUpdate, VenueAvailableTimeSlotRead,
                                      ReservationRead, ReservationDetailRead, PaginatedReservationResponse,
                                      ConflictCheckResult, RecurringReservationRead, RecurringReservationUpdate,
-                                     RecurringReservationCreate)
+                                     RecurringReservationCreate, ReservationBulkUpdate, BulkReservationResult,
+                                     BulkReservationItemResult)
 from app.schemas.reservation import VenueCalendarResponse, CalendarTimeSlot, ReservationConfirmationResult
 from app.schemas.waiting_list import WaitingListReadWithVenueAvailableTimeSlot, WaitingListRead
 from app.schemas.venue_available_time_slot import VenueAvailableTimeSlotRead, VenueAvailabilityRead
-from app.services.notification_service import NotificationService
+from app.services.notification_service import NotificationService, NotificationMessage
 from app.services.waiting_list_service import WaitingListService
+from app.services.waiting_queue_index import WaitingQueueIndex
 from app.services.venue_available_time_slot_service import VenueAvailableTimeSlotService
+from app.services.reference_data_service import ReferenceDataService
+from app.services.reservation_quota_service import ReservationQuotaService, QuotaCounts
+from app.services.slot_interval_index import SlotIntervalIndex, Interval
+from app.services.availability_snapshot import AvailabilitySnapshotService, SnapshotSlot
 
 from app.core.exceptions import (ReservationException, ReservationNotFoundError, DatabaseError,
-                                 InvalidCheckInTimeError, InvalidReservationStatusError)
+                                 InvalidCheckInTimeError, InvalidReservationStatusError, ReservationConflictError,
+                                 ReservationLimitExceededError)
 from app.core.config import get_logger
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_before, resolve_include_total
+from app.utils.recurrence import iter_occurrences, format_days_of_week, parse_days_of_week
 from contextlib import contextmanager
 # add check-in func
 import jwt
@@ -50,6 +59,10 @@ class ReservationService:
         self.notification_service = NotificationService(db=self.db)
         self.venue_available_time_slot_service = VenueAvailableTimeSlotService(db=self.db)
         self.waiting_list_service = WaitingListService(db=self.db)
+        self.quota_service = ReservationQuotaService(db=self.db)
+        self.slot_index = SlotIntervalIndex(db=self.db)
+        # 本事务中被改变容量的时间段 (venue_id, date, slot_id, 剩余容量)，提交后才同步到区间索引和可用性快照
+        self._capacity_changes: List[Tuple[int, date, int, int]] = []
 
     # add context manager
     @contextmanager
@@ -59,7 +72,15 @@ class ReservationService:
             self.db.commit()
         except Exception as e:
             self.db.rollback()
+            self._capacity_changes.clear()
             raise
+        self._apply_capacity_changes()
+
+    def _apply_capacity_changes(self) -> None:
+        """事务提交后把记录的剩余容量写入区间索引（并经由可用性快照推送）；回滚的事务不会到达这里"""
+        changes, self._capacity_changes = self._capacity_changes, []
+        for slot_venue_id, slot_date, slot_id, capacity in changes:
+            SlotIntervalIndex.record_capacity(slot_venue_id, slot_date, slot_id, capacity)
 
     def get_reservation(self, reservation_id: int) -> Optional[ReservationDetailRead]:
         reservation = (
@@ -79,29 +100,57 @@ class ReservationService:
 
         return ReservationService.create_reservation_detail_read(reservation)
 
-    def get_all_reservations(self, skip: int = 0, limit: int = 100) -> Tuple[List[ReservationDetailRead], int]:
+    def get_all_reservations(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            include_total: Optional[bool] = None
+    ) -> Tuple[List[ReservationDetailRead], Optional[int], Optional[str]]:
+        """
+        分页获取所有预约，按 (created_at, id) 倒序。
+
+        传入 cursor 时使用 keyset 分页，忽略 skip，每一页的代价相同；
+        include_total 为 False 时不计算总数（游标模式下默认不计算）。
+        """
         try:
-            query = (
-                self.db.query(Reservation)
+            query = self.db.query(Reservation)
+            total_count = query.count() if resolve_include_total(include_total, cursor) else None
+
+            sort_keys = (Reservation.created_at, Reservation.id)
+            if cursor:
+                query = query.filter(keyset_before(sort_keys, decode_cursor(cursor, (datetime.fromisoformat, int))))
+            else:
+                query = query.offset(skip)
+
+            reservations = (
+                query
                 .options(
                     joinedload(Reservation.venue_available_time_slot),
                     joinedload(Reservation.venue).joinedload(Venue.sport_venue),
                     joinedload(Reservation.user)
                 )
-                .order_by(Reservation.created_at.desc())
+                .order_by(*(key.desc() for key in sort_keys))
+                .limit(limit + 1)
+                .all()
             )
 
-            total_count = query.count()
-            reservations = query.offset(skip).limit(limit).all()
+            next_cursor = None
+            if len(reservations) > limit:
+                reservations = reservations[:limit]
+                last = reservations[-1]
+                next_cursor = encode_cursor(last.created_at, last.id)
 
             reservation_detail_reads = [ReservationService.create_reservation_detail_read(res) for res in reservations]
 
             logger.info(f"Retrieved {len(reservation_detail_reads)} reservations out of {total_count}")
-            return reservation_detail_reads, total_count
+            return reservation_detail_reads, total_count, next_cursor
 
         except SQLAlchemyError as e:
             logger.error(f"Database error in get_all_reservations: {str(e)}")
             raise DatabaseError("Error retrieving reservations from database")
+        except ValueError as e:
+            raise ReservationException(str(e))
         except Exception as e:
             logger.error(f"Unexpected error in get_all_reservations: {str(e)}")
             raise ReservationException("An unexpected error occurred while retrieving reservations")
@@ -110,19 +159,26 @@ class ReservationService:
         db_reservation = self.db.query(Reservation).filter(Reservation.id == reservation_id).first()
         if db_reservation:
             update_data = reservation.dict(exclude_unset=True)
+            old_slot_id = db_reservation.venue_available_time_slot_id
             for key, value in update_data.items():
                 setattr(db_reservation, key, value)
 
             # 如果更新了时间段,需要相应更新 VenueAvailableTimeSlot
-            if 'venue_available_time_slot_id' in update_data:
-                old_slot = self.db.query(VenueAvailableTimeSlot).get(db_reservation.venue_available_time_slot_id)
-                new_slot = self.db.query(VenueAvailableTimeSlot).get(update_data['venue_available_time_slot_id'])
+            new_slot_id = update_data.get('venue_available_time_slot_id')
+            if new_slot_id is not None and new_slot_id != old_slot_id:
+                old_slot = self.db.query(VenueAvailableTimeSlot).get(old_slot_id)
+                new_slot = self.db.query(VenueAvailableTimeSlot).get(new_slot_id)
 
                 if old_slot and new_slot:
-                    old_slot.capacity += 1
-                    new_slot.capacity -= 1
+                    # 先在新时间段上原子扣减容量，失败则整体回滚，避免超卖
+                    if not self._decrement_slot_capacity(new_slot):
+                        self.db.rollback()
+                        self._capacity_changes.clear()
+                        raise ReservationException("No remaining capacity in the requested time slot")
+                    self._increment_slot_capacity(old_slot)
 
             self.db.commit()
+            self._apply_capacity_changes()
             self.db.refresh(db_reservation)
         return db_reservation
 
@@ -132,36 +188,47 @@ class ReservationService:
             venue_id: Optional[int] = None,
             status: Optional[ReservationStatus] = None,
             page: int = 1,
-            page_size: int = 20
+            page_size: int = 20,
+            cursor: Optional[str] = None,
+            include_total: Optional[bool] = None
     ) -> PaginatedReservationResponse:
         try:
-            # 构建基础查询
-            query = (
-                self.db.query(Reservation)
-                .join(VenueAvailableTimeSlot, Reservation.venue_available_time_slot_id == VenueAvailableTimeSlot.id)
-                .join(Venue, VenueAvailableTimeSlot.venue_id == Venue.id)
-                .join(SportVenue, Venue.sport_venue_id == SportVenue.id)
-                .options(
-                    joinedload(Reservation.venue_available_time_slot)
-                    .joinedload(VenueAvailableTimeSlot.venue)
-                    .joinedload(Venue.sport_venue),
-                    joinedload(Reservation.user)
-                )
-                .filter(Reservation.user_id == user_id)
-            )
+            # 构建基础查询（过滤条件都在 reservation 表上，计数时不需要关联其他表）
+            query = self.db.query(Reservation).filter(Reservation.user_id == user_id)
 
             if venue_id:
-                query = query.filter(Venue.id == venue_id)
+                query = query.filter(Reservation.venue_id == venue_id)
 
             if status:
                 query = query.filter(Reservation.status == status)
 
             # 计算总数
-            total_count = query.count()
+            total_count = query.count() if resolve_include_total(include_total, cursor) else None
 
-            # 应用分页
-            reservations = query.order_by(Reservation.created_at.desc())
-            paginated_reservations = reservations.offset((page - 1) * page_size).limit(page_size).all()
+            # 应用分页：有游标时使用 keyset 分页，否则退回偏移分页
+            sort_keys = (Reservation.created_at, Reservation.id)
+            if cursor:
+                query = query.filter(keyset_before(sort_keys, decode_cursor(cursor, (datetime.fromisoformat, int))))
+            else:
+                query = query.offset((page - 1) * page_size)
+
+            paginated_reservations = (
+                query
+                .options(
+                    joinedload(Reservation.venue_available_time_slot),
+                    joinedload(Reservation.venue).joinedload(Venue.sport_venue),
+                    joinedload(Reservation.user)
+                )
+                .order_by(*(key.desc() for key in sort_keys))
+                .limit(page_size + 1)
+                .all()
+            )
+
+            next_cursor = None
+            if len(paginated_reservations) > page_size:
+                paginated_reservations = paginated_reservations[:page_size]
+                last = paginated_reservations[-1]
+                next_cursor = encode_cursor(last.created_at, last.id)
 
             reservation_detail_reads = [
                 ReservationService.create_reservation_detail_read(r) for r in paginated_reservations
@@ -171,11 +238,14 @@ class ReservationService:
                 reservations=reservation_detail_reads,
                 total_count=total_count,
                 page=page,
-                page_size=page_size
+                page_size=page_size,
+                next_cursor=next_cursor
             )
         except SQLAlchemyError as e:
             logging.error(f"Database error in get_user_reservations: {str(e)}")
             raise ReservationException("A database error occurred")
+        except ValueError as e:
+            raise ReservationException(str(e))
         except Exception as e:
             logging.error(f"Unexpected error in get_user_reservations: {str(e)}")
             raise ReservationException("An unexpected error occurred")
@@ -186,55 +256,52 @@ class ReservationService:
             start_date: Optional[date] = None,
             end_date: Optional[date] = None,
             page: int = 1,
-            page_size: int = 10
+            page_size: int = 10,
+            include_reservations: bool = False
     ) -> VenueCalendarResponse:
-        # 参数验证
-        if start_date and end_date and start_date > end_date:
-            raise ValueError("start_date cannot be later than end_date")
-
-        # 查询场馆
-        venue = self.db.query(Venue).join(SportVenue).filter(Venue.id == venue_id).first()
-        if not venue:
-            raise ValueError(f"Venue with id {venue_id} not found")
-
-        # 构建查询对象
-        query = (
-            self.db.query(VenueAvailableTimeSlot)
-            .options(joinedload(VenueAvailableTimeSlot.reservations))
-            .filter(VenueAvailableTimeSlot.venue_id == venue_id)
-            .order_by(VenueAvailableTimeSlot.date, VenueAvailableTimeSlot.start_time)
-        )
+        """
+        场馆日历。
 
-        # 添加日期范围过滤
-        if start_date:
-            query = query.filter(VenueAvailableTimeSlot.date >= start_date)
-        if end_date:
-            query = query.filter(VenueAvailableTimeSlot.date <= end_date)
+        默认每个时间段只返回已预约/剩余/总名额，这些计数来自可用性快照（一次 GROUP BY 加载），
+        查询和响应大小与预约数量无关；include_reservations 为 True 时（仅供管理员）
+        再用一次查询加载当前页时间段的预约明细。
+        """
+        venue, page_slots, total_count = self._get_calendar_page(venue_id, start_date, end_date, page, page_size)
 
-        # 添加分页功能
-        total_count = query.count()
-        total_pages = (total_count + page_size - 1) // page_size
-        offset = (page - 1) * page_size
-        available_time_slots = query.offset(offset).limit(page_size).all()
+        reservations_by_slot: Dict[int, List[Reservation]] = {}
+        if include_reservations and page_slots:
+            for reservation in self.db.query(Reservation).filter(
+                    Reservation.venue_available_time_slot_id.in_([slot.slot_id for _, slot in page_slots])
+            ).all():
+                reservations_by_slot.setdefault(reservation.venue_available_time_slot_id, []).append(reservation)
 
         # 将预约时段按照日期分组
         calendar_data: Dict[date, List[CalendarTimeSlot]] = {}
-        for time_slot in available_time_slots:
+        for slot_date, slot in page_slots:
             time_slot_data = CalendarTimeSlot(
-                id=time_slot.id,
-                date=time_slot.date,
-                start_time=time_slot.start_time,
-                end_time=time_slot.end_time,
-                capacity=time_slot.capacity,
+                id=slot.slot_id,
+                date=slot_date,
+                start_time=slot.start_time,
+                end_time=slot.end_time,
+                capacity=slot.remaining,
+                booked_count=slot.total - slot.remaining,
+                total_capacity=slot.total,
                 reservations=[
-                    ReservationService.create_reservation_read(res)
-                    for res in time_slot.reservations
+                    ReservationRead(
+                        id=res.id,
+                        user_id=res.user_id,
+                        venue_id=res.venue_id,
+                        venue_available_time_slot_id=slot.slot_id,
+                        status=res.status,
+                        date=slot_date,
+                        actual_start_time=res.actual_start_time,
+                        actual_end_time=res.actual_end_time,
+                        is_recurring=res.is_recurring,
+                        venue_name=venue.name
+                    ) for res in reservations_by_slot.get(slot.slot_id, [])
                 ]
             )
-
-            if time_slot.date not in calendar_data:
-                calendar_data[time_slot.date] = []
-            calendar_data[time_slot.date].append(time_slot_data)
+            calendar_data.setdefault(slot_date, []).append(time_slot_data)
 
         return VenueCalendarResponse(
             venue_id=venue_id,
@@ -242,11 +309,87 @@ class ReservationService:
             sport_venue_name=venue.sport_venue.name,
             calendar_data=calendar_data,
             total_count=total_count,
-            total_pages=total_pages,
+            total_pages=(total_count + page_size - 1) // page_size,
             current_page=page,
             page_size=page_size
         )
 
+    def get_venue_calendar_etag(
+            self,
+            venue_id: int,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            page: int = 1,
+            page_size: int = 10,
+            include_reservations: bool = False
+    ) -> str:
+        """
+        日历当前页的 ETag。
+
+        计数模式下只由可用性快照和分页参数组成，不访问预约表；
+        包含预约明细时再加上当前页预约的数量和最后更新时间，
+        预约状态变化（确认、签到）即使不改变容量也会使 ETag 变化。
+        """
+        venue, page_slots, total_count = self._get_calendar_page(venue_id, start_date, end_date, page, page_size)
+        reservation_count, last_updated = 0, None
+        if include_reservations and page_slots:
+            reservation_count, last_updated = self.db.query(
+                func.count(Reservation.id), func.max(Reservation.updated_at)
+            ).filter(
+                Reservation.venue_available_time_slot_id.in_([slot.slot_id for _, slot in page_slots])
+            ).one()
+        return AvailabilitySnapshotService.combined_etag(
+            {},
+            venue.name,
+            venue.sport_venue.name,
+            total_count,
+            page,
+            page_size,
+            include_reservations,
+            [(slot_date.isoformat(), tuple(slot)) for slot_date, slot in page_slots],
+            reservation_count,
+            last_updated
+        )
+
+    def _get_calendar_page(
+            self,
+            venue_id: int,
+            start_date: Optional[date],
+            end_date: Optional[date],
+            page: int,
+            page_size: int
+    ) -> Tuple[Venue, List[Tuple[date, SnapshotSlot]], int]:
+        # 参数验证
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date cannot be later than end_date")
+
+        # 查询场馆
+        venue = (
+            self.db.query(Venue)
+            .options(contains_eager(Venue.sport_venue))
+            .join(SportVenue)
+            .filter(Venue.id == venue_id)
+            .first()
+        )
+        if not venue:
+            raise ValueError(f"Venue with id {venue_id} not found")
+
+        # 未指定的日期边界取该场馆时间段的最早/最晚日期
+        if start_date is None or end_date is None:
+            first_date, last_date = self.db.query(
+                func.min(VenueAvailableTimeSlot.date), func.max(VenueAvailableTimeSlot.date)
+            ).filter(VenueAvailableTimeSlot.venue_id == venue_id).one()
+            start_date = start_date or first_date
+            end_date = end_date or last_date
+        if start_date is None or end_date is None or start_date > end_date:
+            return venue, [], 0
+
+        # 时间段来自可用性快照，按 (date, start_time) 排序后分页
+        days = AvailabilitySnapshotService(self.db).get_days(venue_id, start_date, end_date)
+        all_slots = [(slot_date, slot) for slot_date, snapshot in days.items() for slot in snapshot]
+        offset = (page - 1) * page_size
+        return venue, all_slots[offset:offset + page_size], len(all_slots)
+
     def check_reservation_conflict(self, reservation_data: ReservationCreate) -> ConflictCheckResult:
         try:
             # 获取场馆信息
@@ -265,7 +408,7 @@ class ReservationService:
                     has_conflict=True,
                     conflict_reason="Conflict with existing reservations",
                     conflicting_slots=[{
-                        "date": slot.date,
+                        "date": reservation_data.date,
                         "start_time": slot.start_time,
                         "end_time": slot.end_time
                     } for slot in conflicting_slots]
@@ -303,30 +446,98 @@ class ReservationService:
                 conflict_reason=f"An error occurred while checking conflicts: {str(e)}"
             )
 
-    def _get_conflicting_time_slots(self, reservation_data: ReservationCreate) -> List[VenueAvailableTimeSlot]:
-        return self.db.query(VenueAvailableTimeSlot).filter(
-            VenueAvailableTimeSlot.venue_id == reservation_data.venue_id,
-            VenueAvailableTimeSlot.date == reservation_data.date,
-            VenueAvailableTimeSlot.start_time < reservation_data.end_time,
-            VenueAvailableTimeSlot.end_time > reservation_data.start_time,
-            VenueAvailableTimeSlot.capacity <= 0
-        ).all()
+    def _get_conflicting_time_slots(self, reservation_data: ReservationCreate) -> List[Interval]:
+        # 与请求时间重叠且已满员的时间段，从区间索引中查找
+        return [
+            slot for slot in self.slot_index.find_overlapping_slots(
+                reservation_data.venue_id, reservation_data.date,
+                reservation_data.start_time, reservation_data.end_time
+            )
+            if slot.capacity <= 0
+        ]
 
-    def _get_conflicting_leader_reserved_time(
-            self, reservation_data: ReservationCreate) -> Optional[LeaderReservedTime]:
-        return self.db.query(LeaderReservedTime).filter(
-            LeaderReservedTime.venue_id == reservation_data.venue_id,
-            LeaderReservedTime.day_of_week == reservation_data.date.weekday(),
-            LeaderReservedTime.start_time < reservation_data.end_time,
-            LeaderReservedTime.end_time > reservation_data.start_time
-        ).first()
+    def _get_conflicting_leader_reserved_time(self, reservation_data: ReservationCreate) -> Optional[Interval]:
+        return self.slot_index.find_overlapping_leader_time(
+            reservation_data.venue_id, reservation_data.date,
+            reservation_data.start_time, reservation_data.end_time
+        )
 
     def _check_recurring_conflicts(self, reservation_data: ReservationCreate) -> List[Dict[str, Any]]:
-        # 实现检查周期性预约冲突的逻辑
-        # 这里需要根据 recurring_pattern 和 recurrence_end_date 生成未来的预约日期
-        # 然后检查这些日期是否有冲突
-        # 返回冲突的日期和时间列表
-        pass
+        # 第一次预约由调用方单独检查，这里只检查之后的重复日期
+        if not reservation_data.recurring_pattern:
+            return []
+        occurrences = list(iter_occurrences(
+            reservation_data.recurring_pattern,
+            reservation_data.date,
+            reservation_data.recurrence_end_date or reservation_data.date + timedelta(days=365),
+            limit=settings.MAX_RECURRING_OCCURRENCES
+        ))
+        _, conflicts = self._find_series_conflicts(
+            reservation_data.venue_id, occurrences[1:], reservation_data.start_time, reservation_data.end_time
+        )
+        return conflicts
+
+    def _find_series_conflicts(
+            self,
+            venue_id: int,
+            occurrences: List[date],
+            start_time: time,
+            end_time: time
+    ) -> Tuple[Dict[date, VenueAvailableTimeSlot], List[Dict[str, Any]]]:
+        """
+        检查一个预约序列的所有日期。
+
+        序列覆盖日期范围内的时间段用一次查询加载，领导预留时间来自区间索引，
+        之后逐个日期在内存中匹配。
+
+        :return: (日期 -> 可预约的时间段, 冲突列表)
+        """
+        slots_by_date: Dict[date, List[VenueAvailableTimeSlot]] = {}
+        if occurrences:
+            occurrence_set = set(occurrences)
+            slots = self.db.query(VenueAvailableTimeSlot).filter(
+                VenueAvailableTimeSlot.venue_id == venue_id,
+                VenueAvailableTimeSlot.date.between(min(occurrences), max(occurrences))
+            ).populate_existing().all()
+            for slot in slots:
+                if slot.date in occurrence_set:
+                    slots_by_date.setdefault(slot.date, []).append(slot)
+
+        matched: Dict[date, VenueAvailableTimeSlot] = {}
+        conflicts: List[Dict[str, Any]] = []
+        for occurrence in occurrences:
+            leader_time = self.slot_index.find_overlapping_leader_time(venue_id, occurrence, start_time, end_time)
+            if leader_time:
+                conflicts.append({
+                    "date": occurrence,
+                    "start_time": leader_time.start_time,
+                    "end_time": leader_time.end_time,
+                    "reason": "Conflict with leader reserved time"
+                })
+                continue
+
+            slot = next((
+                candidate for candidate in slots_by_date.get(occurrence, [])
+                if candidate.start_time <= start_time and candidate.end_time >= end_time
+            ), None)
+            if slot is None:
+                conflicts.append({
+                    "date": occurrence,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "reason": "No available time slot"
+                })
+            elif slot.capacity <= 0:
+                conflicts.append({
+                    "date": occurrence,
+                    "start_time": slot.start_time,
+                    "end_time": slot.end_time,
+                    "reason": "Time slot is fully booked"
+                })
+            else:
+                matched[occurrence] = slot
+
+        return matched, conflicts
 
     # 私有方法记录用户的Reservation操作
     def _create_user_activity(
@@ -352,63 +563,17 @@ class ReservationService:
     def create_reservation(
             self, reservation_data: ReservationCreate
     ) -> Union[List[ReservationRead], List[WaitingListRead]]:
+        """
+        创建预约；时间段已满时加入等待列表。
+
+        预约（或等待列表项）与用户活动记录在同一个事务中一次 flush 写入，只提交一次；
+        通知和配额缓存更新在事务提交之后进行。
+        """
         logger.info(f"Attempting to create reservation: {reservation_data}")
         try:
             with self.transaction():
                 results = self._create_reservation_logic(reservation_data)
                 logger.debug(f"Reservation creation logic completed. Results: {results}")
-
-                # 验证数据是否被正确保存
-                if isinstance(results[0], ReservationRead):
-                    for result in results:
-                        verification = self.db.query(Reservation).filter(Reservation.id == result.id).first()
-                        if not verification:
-                            raise DatabaseError(
-                                f"Reservation with id {result.id} was not found in the database after creation")
-                        logger.debug(f"Reservation verified in database: {verification}")
-
-                        # 创建用户活动记录
-                        user_activity = UserActivity(
-                            user_id=result.user_id,
-                            activity_type="reservation_created",
-                            reservation_id=result.id,
-                            venue_id=verification.venue_id,
-                            timestamp=datetime.now(),
-                            details=f"Created reservation for venue {verification.venue_id} on {result.date}"
-                        )
-                        self.db.add(user_activity)
-                        logger.info(f"User activity record created for reservation: {result.id}")
-
-                elif isinstance(results[0], WaitingListRead):
-                    for result in results:
-                        # 创建用户活动记录（加入等待列表）
-                        user_activity = UserActivity(
-                            user_id=result.user_id,
-                            activity_type="joined_waiting_list",
-                            venue_id=result.venue_available_time_slot.venue_id,
-                            timestamp=datetime.now(),
-                            details=f"Joined waiting list for venue {result.venue_available_time_slot.venue_id} on \
-                             {result.venue_available_time_slot.date}"
-                        )
-                        self.db.add(user_activity)
-                        logger.info(f"User activity record created for joining waiting list: {result.id}")
-
-                # 发送通知
-                if results:
-                    if isinstance(results[0], ReservationRead):
-                        for result in results:
-                            ReservationService._notify_reservation_created(result)
-                            logger.info(f"Notification sent for created reservation: {result.id}")
-                    elif isinstance(results[0], WaitingListRead):
-                        for result in results:
-                            ReservationService._notify_added_to_waiting_list(result)
-                            logger.info(f"Notification sent for waiting list addition: {result.id}")
-                    else:
-                        logger.warning(f"Unexpected result type: {type(results[0])}")
-                else:
-                    logger.warning("No results returned from _create_reservation_logic")
-
-            return results
         except SQLAlchemyError as e:
             logger.error(f"Database error occurred while creating reservation: {str(e)}")
             raise DatabaseError(f"Database error occurred while creating reservation: {str(e)}")
@@ -416,33 +581,51 @@ class ReservationService:
             logger.error(f"Unexpected error during reservation creation: {str(e)}")
             raise
 
+        # 事务提交后发送通知并写穿配额缓存
+        if not results:
+            logger.warning("No results returned from _create_reservation_logic")
+        elif isinstance(results[0], ReservationRead):
+            for result in results:
+                ReservationService._notify_reservation_created(result)
+                self.quota_service.record_created(result.user_id, result.venue_id)
+                logger.info(f"Notification sent for created reservation: {result.id}")
+        elif isinstance(results[0], WaitingListRead):
+            for result in results:
+                WaitingQueueIndex.record_joined(result.venue_available_time_slot_id, result.id, result.created_at)
+                ReservationService._notify_added_to_waiting_list(result)
+                logger.info(f"Notification sent for waiting list addition: {result.id}")
+        else:
+            logger.warning(f"Unexpected result type: {type(results[0])}")
+
+        return results
+
     def _create_reservation_logic(
             self,
             reservation_data: ReservationCreate
     ) -> Union[List[ReservationRead], List[WaitingListRead]]:
         try:
-            # 1. 验证用户
-            user = self.db.query(User).filter(User.id == reservation_data.user_id).first()
+            # 1. 验证用户；锁定用户行，同一用户的并发预约串行通过配额检查
+            user = self.db.query(User).filter(User.id == reservation_data.user_id).with_for_update().first()
             if not user:
                 raise ReservationException("User not found")
 
             # 2. 获取场馆和预约规则
-            venue = self.db.query(Venue).filter(Venue.id == reservation_data.venue_id).first()
+            reference_data = ReferenceDataService(self.db)
+            venue = reference_data.get_venue(reservation_data.venue_id)
             if not venue:
                 raise ReservationException("Venue not found")
 
-            reservation_rules = self.db.query(ReservationRules).filter(
-                ReservationRules.venue_id == venue.id,
-                ReservationRules.user_role == user.role
-            ).first()
+            reservation_rules = reference_data.get_rules(venue.id, user.role)
             if not reservation_rules:
                 raise ReservationException("Reservation rules not found for this user role and venue")
 
             # 3. 检查用户是否超过预约次数限制
             self._check_reservation_limit(user, venue, reservation_rules)
 
-            # 4. 获取并验证可用时间段
-            available_slot = self._get_containing_available_slot(reservation_data, venue.id)
+            # 4. 获取并验证可用时间段（不过滤容量，满员时段用于加入等待列表）
+            available_slot = self._get_containing_available_slot(
+                reservation_data, venue.id, only_with_capacity=False
+            )
             if available_slot is None:
                 # 处理没有找到合适时间段的情况
                 raise ReservationException("No available time slot for the requested reservation")
@@ -450,15 +633,25 @@ class ReservationService:
             reservations = []
             waiting_list_items = []
 
-            # 5. 检查容量并创建预约或加入等待列表
-            if available_slot.capacity <= 0:
+            # 5. 原子扣减容量（compare-and-decrement），失败则加入等待列表
+            if not self._decrement_slot_capacity(available_slot):
                 # 如果没有可用容量，加入等待列表
                 waiting_list_item = self.join_waiting_list(
                     venue.id,
                     reservation_data,
-                    user.id
+                    user.id,
+                    commit=False
                 )[0]  # 获取列表中的第一个（也是唯一的）项目
                 waiting_list_items.append(waiting_list_item)
+
+                # 创建用户活动记录（加入等待列表），与等待列表项一起写入
+                self.db.add(UserActivity(
+                    user_id=user.id,
+                    activity_type="joined_waiting_list",
+                    venue_id=venue.id,
+                    timestamp=datetime.now(),
+                    details=f"Joined waiting list for venue {venue.id} on {available_slot.date}"
+                ))
             else:
                 # 创建预约
                 new_reservation = Reservation(
@@ -470,20 +663,29 @@ class ReservationService:
                     actual_start_time=reservation_data.start_time,
                     actual_end_time=reservation_data.end_time,  # 用户实际预约时间段
                     is_recurring=reservation_data.is_recurring,
-
+                    venue=venue,
+                    venue_available_time_slot=available_slot
                 )
                 self.db.add(new_reservation)
                 reservations.append(new_reservation)
 
+                # 创建用户活动记录，通过关系关联预约，flush 时按依赖顺序插入
+                self.db.add(UserActivity(
+                    user_id=user.id,
+                    activity_type="reservation_created",
+                    reservation=new_reservation,
+                    venue_id=venue.id,
+                    timestamp=datetime.now(),
+                    details=f"Created reservation for venue {venue.id} on {reservation_data.date}"
+                ))
+
                 # 6. 处理周期性预约
                 if reservation_data.is_recurring:
                     recurring_reservation = self._create_recurring_reservation(reservation_data, user.id, venue.id)
-                    new_reservation.recurring_reservation_id = recurring_reservation.id
+                    new_reservation.recurring_reservation = recurring_reservation
 
-                # 更新时间段容量
-                available_slot.capacity -= 1
-
-            self.db.commit()
+            # 只 flush 以获得主键，由外层事务统一提交
+            self.db.flush()
 
             # 7. 转换为ReservationRead对象并返回相应列表
             if reservations:
@@ -547,58 +749,41 @@ class ReservationService:
             raise ReservationException(f"An unexpected error occurred while creating reservation detail: {str(e)}")
 
     def _check_reservation_limit(self, user: User, venue: Venue, rules: ReservationRules):
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        month_start = today.replace(day=1)
-
-        daily_count = self.db.query(Reservation).filter(
-            Reservation.user_id == user.id,
-            Reservation.venue_id == venue.id,
-            Reservation.created_at >= today
-        ).count()
-
-        weekly_count = self.db.query(Reservation).filter(
-            Reservation.user_id == user.id,
-            Reservation.venue_id == venue.id,
-            Reservation.created_at >= week_start
-        ).count()
-
-        monthly_count = self.db.query(Reservation).filter(
-            Reservation.user_id == user.id,
-            Reservation.venue_id == venue.id,
-            Reservation.created_at >= month_start
-        ).count()
-
-        if daily_count >= rules.max_daily_reservations:
-            raise ReservationException("Daily reservation limit exceeded")
-        if weekly_count >= rules.max_weekly_reservations:
-            raise ReservationException("Weekly reservation limit exceeded")
-        if monthly_count >= rules.max_monthly_reservations:
-            raise ReservationException("Monthly reservation limit exceeded")
+        # 远离上限时使用配额缓存；接近上限时由配额服务在当前事务中一次聚合重新计数
+        self.quota_service.check_limit(user, venue, rules)
 
     # 查找包含所请求时间的可用时间段
     def _get_containing_available_slot(
             self,
             reservation_data: ReservationCreate,
-            venue_id: int
+            venue_id: int,
+            only_with_capacity: bool = True
     ) -> Optional[VenueAvailableTimeSlot]:
         """
         获取包含请求预约时间的可用时间段。
 
         :param reservation_data: 预约请求数据
         :param venue_id: 场馆ID
+        :param only_with_capacity: 是否只返回仍有剩余容量的时间段
         :return: 包含请求时间的可用时间段，如果没有找到则返回None
         """
         try:
-            slot = self.db.query(VenueAvailableTimeSlot).filter(
-                and_(
-                    VenueAvailableTimeSlot.venue_id == venue_id,
-                    VenueAvailableTimeSlot.date == reservation_data.date,
-                    VenueAvailableTimeSlot.start_time <= reservation_data.start_time,
-                    VenueAvailableTimeSlot.end_time >= reservation_data.end_time,
-                    VenueAvailableTimeSlot.capacity > 0
-                )
-            ).first()
+            # 在区间索引中定位时间段，再按主键取 ORM 对象（优先命中会话的 identity map）
+            slot = None
+            interval = self.slot_index.find_containing_slot(
+                venue_id, reservation_data.date, reservation_data.start_time, reservation_data.end_time,
+                only_with_capacity=only_with_capacity
+            )
+            if interval is not None:
+                slot = self.db.get(VenueAvailableTimeSlot, interval.id)
+                if slot is None:
+                    # 索引已过期（时间段已被其他进程删除），重建该日期的索引后重试
+                    SlotIntervalIndex.invalidate_slots(venue_id, reservation_data.date)
+                    interval = self.slot_index.find_containing_slot(
+                        venue_id, reservation_data.date, reservation_data.start_time, reservation_data.end_time,
+                        only_with_capacity=only_with_capacity
+                    )
+                    slot = self.db.get(VenueAvailableTimeSlot, interval.id) if interval else None
 
             if slot:
                 logger.info(f"Found available time slot: id={slot.id}, date={slot.date}, "
@@ -614,14 +799,89 @@ class ReservationService:
             logger.error(f"Error occurred while getting available time slot: {str(e)}")
             return None
 
+    def _decrement_slot_capacity(self, slot: VenueAvailableTimeSlot) -> bool:
+        """
+        以单条条件 UPDATE 原子地扣减一个名额（compare-and-decrement）。
+
+        UPDATE ... SET capacity = capacity - 1 WHERE id = ? AND capacity > 0 RETURNING capacity
+        由数据库保证并发下不会超卖，也不需要 SELECT ... FOR UPDATE 的行锁等待。
+
+        :param slot: 目标时间段
+        :return: 扣减成功返回True，容量已满返回False
+        """
+        stmt = (
+            update(VenueAvailableTimeSlot)
+            .where(VenueAvailableTimeSlot.id == slot.id, VenueAvailableTimeSlot.capacity > 0)
+            .values(capacity=VenueAvailableTimeSlot.capacity - 1)
+            .returning(VenueAvailableTimeSlot.capacity)
+            .execution_options(synchronize_session=False)
+        )
+        remaining = self.db.execute(stmt).scalar_one_or_none()
+        if remaining is None:
+            logger.info(f"Time slot {slot.id} is fully booked")
+            return False
+
+        # 同步会话中的对象，但不标记为脏数据，避免 flush 时覆盖数据库中的值
+        set_committed_value(slot, 'capacity', remaining)
+        self._capacity_changes.append((slot.venue_id, slot.date, slot.id, remaining))
+        return True
+
+    def _increment_slot_capacity(self, slot: VenueAvailableTimeSlot) -> None:
+        """以单条 UPDATE 原子地归还一个名额"""
+        self._release_slot_capacity(slot, 1)
+
+    def _release_slot_capacity(self, slot: VenueAvailableTimeSlot, count: int) -> None:
+        """以单条 UPDATE 原子地归还 count 个名额"""
+        stmt = (
+            update(VenueAvailableTimeSlot)
+            .where(VenueAvailableTimeSlot.id == slot.id)
+            .values(capacity=VenueAvailableTimeSlot.capacity + count)
+            .returning(VenueAvailableTimeSlot.capacity)
+            .execution_options(synchronize_session=False)
+        )
+        remaining = self.db.execute(stmt).scalar_one_or_none()
+        if remaining is not None:
+            set_committed_value(slot, 'capacity', remaining)
+            self._capacity_changes.append((slot.venue_id, slot.date, slot.id, remaining))
+
+    def _take_slot_capacity(self, slot: VenueAvailableTimeSlot, requested: int) -> int:
+        """
+        在一个时间段上原子地扣减最多 requested 个名额，返回实际扣减的数量。
+
+        一条语句完成：CTE 以 FOR UPDATE 锁定并读取当前容量，
+        UPDATE ... SET capacity = capacity - LEAST(capacity, :requested) ... RETURNING 同时返回剩余容量和扣减数量。
+        """
+        current = (
+            select(VenueAvailableTimeSlot.id, VenueAvailableTimeSlot.capacity)
+            .where(VenueAvailableTimeSlot.id == slot.id, VenueAvailableTimeSlot.capacity > 0)
+            .with_for_update()
+            .cte("current_capacity")
+        )
+        granted = func.least(current.c.capacity, requested)
+        row = self.db.execute(
+            update(VenueAvailableTimeSlot)
+            .where(VenueAvailableTimeSlot.id == current.c.id)
+            .values(capacity=current.c.capacity - granted)
+            .returning(VenueAvailableTimeSlot.capacity, granted.label("granted"))
+            .execution_options(synchronize_session=False)
+        ).one_or_none()
+        if row is None:
+            return 0
+
+        set_committed_value(slot, 'capacity', row.capacity)
+        self._capacity_changes.append((slot.venue_id, slot.date, slot.id, row.capacity))
+        return row.granted
+
     def _create_recurring_reservation(self, reservation_data: ReservationCreate, user_id: int,
                                       venue_id: int) -> RecurringReservation:
         recurring_reservation = RecurringReservation(
             user_id=user_id,
             venue_id=venue_id,
-            pattern=reservation_data.recurrence_pattern,
+            pattern=reservation_data.recurring_pattern,
             start_date=reservation_data.date,
-            end_date=reservation_data.recurrence_end_date
+            end_date=reservation_data.recurrence_end_date,
+            start_time=reservation_data.start_time,
+            end_time=reservation_data.end_time
         )
         self.db.add(recurring_reservation)
         return recurring_reservation
@@ -690,11 +950,10 @@ class ReservationService:
                 logger.info(f"Reservation {reservation_id} has been cancelled by user {user_id}")
 
                 # 增加对应时间段的可用容量
-                venue_available_time_slot = reservation.venue_available_time_slot
-                venue_available_time_slot.capacity += 1
+                self._increment_slot_capacity(reservation.venue_available_time_slot)
 
                 # 处理等待列表
-                self._handle_waiting_list(reservation)
+                promoted = self._handle_waiting_list(reservation)
 
                 # 创建用户活动记录
                 user_activity = UserActivity(
@@ -708,9 +967,14 @@ class ReservationService:
                 self.db.add(user_activity)
                 logger.info(f"User activity record created for cancelling reservation: {reservation_id}")
 
-            # 事务成功提交后，发送通知
-            self._notify_cancellation(reservation)
-            logger.info(f"Cancellation notification sent for reservation {reservation_id}")
+                # 通知与取消写在同一事务中，投递经由发件箱在提交后进行
+                self._notify_cancellation(reservation)
+
+            # 事务成功提交后更新配额缓存
+            self.quota_service.record_cancelled(reservation.user_id, reservation.venue_id, reservation.created_at)
+            if promoted is not None:
+                self.quota_service.record_created(promoted.user_id, promoted.venue_id)
+                WaitingQueueIndex.invalidate([promoted.venue_available_time_slot_id])
 
         except ReservationException as e:
             logger.warning(str(e))
@@ -741,19 +1005,25 @@ class ReservationService:
         # 检查当前时间是否在允许取消的时间范围内
         return datetime.now() <= cancellation_deadline
 
-    def _handle_waiting_list(self, cancelled_reservation: Reservation) -> None:
+    def _handle_waiting_list(self, cancelled_reservation: Reservation) -> Optional[Reservation]:
+        """把释放的名额分配给下一个候补用户，在调用方的事务中执行；返回新建的预约"""
         logger.debug(f"Handling waiting list for cancelled reservation: {cancelled_reservation.id}")
         logger.debug(f"Venue available time slot id: {cancelled_reservation.venue_available_time_slot_id}")
         waiting_user = self.waiting_list_service.get_next_waiting_user(
             cancelled_reservation.venue_available_time_slot_id
         )
 
-        if waiting_user:
+        # 候补用户抢占刚释放的名额，与其他并发预约走同一个原子扣减路径
+        slot = cancelled_reservation.venue_available_time_slot
+        if waiting_user and self._decrement_slot_capacity(slot):
             new_reservation = Reservation(
                 user_id=waiting_user.user_id,
                 venue_id=cancelled_reservation.venue_id,
                 venue_available_time_slot_id=cancelled_reservation.venue_available_time_slot_id,
-                status=ReservationStatus.PENDING
+                status=ReservationStatus.PENDING,
+                date=slot.date,
+                actual_start_time=slot.start_time,
+                actual_end_time=slot.end_time
             )
             self.db.add(new_reservation)
 
@@ -762,21 +1032,19 @@ class ReservationService:
             logger.info(
                 f"User {waiting_user.user_id} moved from waiting list to reservation for time slot {cancelled_reservation.venue_available_time_slot_id}")
 
-            # 减少对应时间段的可用容量
-            venue_available_time_slot = cancelled_reservation.venue_available_time_slot
-            venue_available_time_slot.capacity -= 1
-
-            self.db.commit()  # 提交事务
-
-            # 发送通知
+            # flush 取得新预约的 id；通知随调用方的事务一起提交
+            self.db.flush()
             self._notify_reservation_available(waiting_user.user_id, new_reservation.id)
+            return new_reservation
+        return None
 
     def _notify_cancellation(self, reservation: Reservation) -> None:
         self.notification_service.notify_user(
             user_id=reservation.user_id,
             title="Reservation Canceled",
             content=f"Your reservation {reservation.id} has been canceled.",
-            type="RES_CANCEL"
+            type="RES_CANCEL",
+            commit=False
         )
         logger.info(f"Cancellation notification sent to user {reservation.user_id} for reservation {reservation.id}")
 
@@ -785,15 +1053,19 @@ class ReservationService:
             user_id=user_id,
             title="Reservation Available",
             content=f"Your reservation {reservation_id} is now available!",
-            type="RES_AVAIL"
+            type="RES_AVAIL",
+            commit=False
         )
         logger.info(f"Reservation available notification sent to user {user_id} for reservation {reservation_id}")
 
     # 加入预约等候列表
-    def join_waiting_list(self, venue_id: int, reservation_data: ReservationCreate, user_id: int) -> List[WaitingList]:
+    def join_waiting_list(self, venue_id: int, reservation_data: ReservationCreate, user_id: int,
+                          commit: bool = True) -> List[WaitingList]:
         try:
-            # 获取包含用户请求时间的可用时间段
-            available_slot = self._get_containing_available_slot(reservation_data, venue_id)
+            # 获取包含用户请求时间的时间段（满员时段同样可以排队）
+            available_slot = self._get_containing_available_slot(
+                reservation_data, venue_id, only_with_capacity=False
+            )
 
             if not available_slot:
                 raise ReservationException("No available time slot found for the requested time")
@@ -803,30 +1075,30 @@ class ReservationService:
             # 检查用户是否已经在该时间段的等待列表中
             existing_waiting_list_item = self.db.query(WaitingList).filter(
                 WaitingList.venue_available_time_slot_id == available_slot.id,
-                WaitingList.user_id == user_id
+                WaitingList.user_id == user_id,
+                WaitingList.is_expired == False
             ).first()
 
             if existing_waiting_list_item:
-                # 如果用户已经在等待列表中，更新实际请求的时间
-                existing_waiting_list_item.actual_start_time = reservation_data.start_time
-                existing_waiting_list_item.actual_end_time = reservation_data.end_time
-                existing_waiting_list_item.date = reservation_data.date
+                # 如果用户已经在等待列表中，保留原有的排队位置
                 waiting_list_items.append(existing_waiting_list_item)
             else:
-                # 如果用户不在等待列表中，创建新的等待列表项
+                # 如果用户不在等待列表中，创建新的等待列表项（等待列表只记录时间段，不记录实际请求时间）
                 new_waiting_list_item = WaitingList(
                     venue_available_time_slot_id=available_slot.id,
-                    user_id=user_id,
-                    actual_start_time=reservation_data.start_time,  # 用户实际请求时间段
-                    actual_end_time=reservation_data.end_time,  # 用户实际请求时间段
-                    date=reservation_data.date  # 用户实际请求日期
+                    user_id=user_id
                 )
                 self.db.add(new_waiting_list_item)
                 waiting_list_items.append(new_waiting_list_item)
 
-            self.db.commit()
-            for item in waiting_list_items:
-                self.db.refresh(item)
+            if commit:
+                self.db.commit()
+                for item in waiting_list_items:
+                    self.db.refresh(item)
+                    WaitingQueueIndex.record_joined(item.venue_available_time_slot_id, item.id, item.created_at)
+            else:
+                # 由调用方的事务统一提交
+                self.db.flush()
 
             return waiting_list_items
         except Exception as e:
@@ -871,62 +1143,124 @@ class ReservationService:
 
     # 处理等待列表并自动分配预约
     def process_waiting_list(self) -> None:
-        current_time = datetime.now()
-        process_hours = WAITING_LIST_PROCESS_HOURS
-        process_time = current_time + timedelta(hours=process_hours)
+        """
+        把即将开始的时间段的剩余名额按排队顺序分配给候补用户，其余候补条目置为过期。
 
-        # 查找所有即将在4小时内开始的时间段
-        upcoming_time_slots = self.db.query(VenueAvailableTimeSlot).filter(
-            and_(
-                VenueAvailableTimeSlot.date == current_time.date(),
-                VenueAvailableTimeSlot.start_time <= process_time.time(),
-                VenueAvailableTimeSlot.start_time > current_time.time()
-            )
-        ).all()
+        语句数量与到期时间段的数量无关：锁定有候补的到期时间段，一条 ROW_NUMBER 窗口查询给出所有时间段的候补顺位，
+        然后批量插入预约、批量删除已晋升条目、批量过期其余条目、一条 UPDATE 扣减各时间段容量，通知批量写入。
+        """
+        current_time = datetime.now()
+        process_time = current_time + timedelta(hours=WAITING_LIST_PROCESS_HOURS)
 
-        for time_slot in upcoming_time_slots:
-            # 获取该时间段的等待列表
-            waiting_list = self.db.query(WaitingList).filter(
-                WaitingList.venue_available_time_slot_id == time_slot.id
-            ).order_by(WaitingList.created_at).all()
-
-            # 获取该时间段的可用名额
-            reservations_count = self.db.query(Reservation).filter(
-                Reservation.venue_available_time_slot_id == time_slot.id,
-                Reservation.status != ReservationStatus.CANCELLED
-            ).count()
-            available_slots = time_slot.capacity - reservations_count
-
-            # 根据可用名额分配预约给等待列表中的用户
-            for _ in range(available_slots):
-                if waiting_list:
-                    waiting_user = waiting_list.pop(0)
-                    new_reservation = Reservation(
-                        user_id=waiting_user.user_id,
-                        venue_id=time_slot.venue_id,
-                        venue_available_time_slot_id=time_slot.id,
-                        status=ReservationStatus.PENDING
-                    )
-                    self.db.add(new_reservation)
-                    self.db.delete(waiting_user)
+        try:
+            # 锁定即将在 WAITING_LIST_PROCESS_HOURS 小时内开始且有候补的时间段，分配期间剩余容量不会被并发预约改变
+            has_waiting = select(WaitingList.id).where(
+                WaitingList.venue_available_time_slot_id == VenueAvailableTimeSlot.id,
+                WaitingList.is_expired == False
+            ).exists()
+            slot_ids = self.db.execute(
+                select(VenueAvailableTimeSlot.id).where(
+                    VenueAvailableTimeSlot.date == current_time.date(),
+                    VenueAvailableTimeSlot.start_time <= process_time.time(),
+                    VenueAvailableTimeSlot.start_time > current_time.time(),
+                    has_waiting
+                ).with_for_update()
+            ).scalars().all()
+            if not slot_ids:
+                self.db.commit()
+                return
+
+            # 每个时间段内按加入顺序编号，顺位不超过剩余容量的候补用户晋升
+            ranked = select(
+                WaitingList.id,
+                WaitingList.user_id,
+                WaitingList.venue_available_time_slot_id.label("slot_id"),
+                func.row_number().over(
+                    partition_by=WaitingList.venue_available_time_slot_id,
+                    order_by=(WaitingList.created_at, WaitingList.id)
+                ).label("position")
+            ).where(
+                WaitingList.venue_available_time_slot_id.in_(slot_ids),
+                WaitingList.is_expired == False
+            ).subquery()
+            entries = self.db.execute(
+                select(
+                    ranked.c.id, ranked.c.user_id, ranked.c.slot_id,
+                    VenueAvailableTimeSlot.venue_id, VenueAvailableTimeSlot.date,
+                    VenueAvailableTimeSlot.start_time, VenueAvailableTimeSlot.end_time,
+                    (ranked.c.position <= VenueAvailableTimeSlot.capacity).label("promoted")
+                ).join(VenueAvailableTimeSlot, VenueAvailableTimeSlot.id == ranked.c.slot_id)
+            ).all()
 
+            reservations, promoted_ids, expired_ids = [], [], []
+            taken: Dict[int, int] = {}
+            notifications: List[NotificationMessage] = []
+            for entry in entries:
+                if entry.promoted:
+                    reservations.append({
+                        "user_id": entry.user_id,
+                        "venue_id": entry.venue_id,
+                        "venue_available_time_slot_id": entry.slot_id,
+                        "status": ReservationStatus.PENDING,
+                        "date": entry.date,
+                        "actual_start_time": entry.start_time,
+                        "actual_end_time": entry.end_time
+                    })
+                    promoted_ids.append(entry.id)
+                    taken[entry.slot_id] = taken.get(entry.slot_id, 0) + 1
                     # 通知新分配的用户他们的预约现在可用
-                    self.notification_service.notify_user(
-                        waiting_user.user_id,
+                    notifications.append(NotificationMessage(
+                        entry.user_id,
+                        "Reservation Available",
                         "Your reservation is now available!",
                         "RESERVATION_AVAILABLE"
-                    )
-
-            # 将剩余的等待列表条目设置为已过期并通知用户
-            for waiting_item in waiting_list:
-                waiting_item.is_expired = True
-                self.notification_service.notify_user(
-                    waiting_item.user_id,
-                    "Your waiting list entry has expired.",
-                    "WAITING_LIST_EXPIRED"
+                    ))
+                else:
+                    expired_ids.append(entry.id)
+                    notifications.append(NotificationMessage(
+                        entry.user_id,
+                        "Waiting List Expired",
+                        "Your waiting list entry has expired.",
+                        "WAITING_LIST_EXPIRED"
+                    ))
+
+            remaining = []
+            if reservations:
+                self.db.execute(insert(Reservation), reservations)
+                self.db.execute(
+                    delete(WaitingList).where(WaitingList.id.in_(promoted_ids)),
+                    execution_options={"synchronize_session": False}
+                )
+                remaining = self.db.execute(
+                    update(VenueAvailableTimeSlot)
+                    .where(VenueAvailableTimeSlot.id.in_(list(taken)))
+                    .values(capacity=VenueAvailableTimeSlot.capacity - case(taken, value=VenueAvailableTimeSlot.id))
+                    .returning(VenueAvailableTimeSlot.venue_id, VenueAvailableTimeSlot.date,
+                               VenueAvailableTimeSlot.id, VenueAvailableTimeSlot.capacity)
+                    .execution_options(synchronize_session=False)
+                ).all()
+            if expired_ids:
+                self.db.execute(
+                    update(WaitingList).where(WaitingList.id.in_(expired_ids)).values(is_expired=True),
+                    execution_options={"synchronize_session": False}
                 )
 
-        self.db.commit()
+            # 所有通知在同一事务中一次写入
+            self.notification_service.notify_users(notifications)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error processing waiting list: {str(e)}")
+            raise
+
+        # 事务成功提交后同步区间索引、候补队列和配额缓存
+        WaitingQueueIndex.record_removed_many((entry.slot_id, entry.id) for entry in entries)
+        for slot_venue_id, slot_date, slot_id, capacity in remaining:
+            SlotIntervalIndex.record_capacity(slot_venue_id, slot_date, slot_id, capacity)
+        for reservation in reservations:
+            self.quota_service.record_created(reservation["user_id"], reservation["venue_id"])
+        logger.info(f"Processed waiting list for {len(slot_ids)} time slots: "
+                    f"{len(promoted_ids)} promoted, {len(expired_ids)} expired")
 
     def send_reservation_reminder(self) -> None:
         # 获取当前时间
@@ -945,12 +1279,11 @@ class ReservationService:
             )
         ).all()
 
-        # 发送预约提醒
-        for reservation in reservations:
-            reservation_detail = ReservationService.create_reservation_detail_read(reservation)
-
-            # 发送提醒通知
-            self.notification_service.send_reservation_reminder(reservation_detail)
+        # 发送预约提醒（批量写入通知）
+        self.notification_service.send_reservation_reminders(
+            [ReservationService.create_reservation_detail_read(reservation) for reservation in reservations],
+            commit=True
+        )
 
     """
     预约的确认可以有以下几种触发条件:
@@ -1000,7 +1333,8 @@ class ReservationService:
             user_id=reservation.user_id,
             title="Reservation Confirmed",
             content=f"Your reservation {reservation_id} has been confirmed.",
-            type="RESERVATION_CONFIRMATION"
+            type="RESERVATION_CONFIRMATION",
+            commit=False
         )
         logger.info(f"Queued confirmation notification for reservation {reservation_id}")
 
@@ -1035,18 +1369,20 @@ class ReservationService:
         ).with_for_update().all()
 
         confirmed_reservations: List[Reservation] = []
+        notifications: List[NotificationMessage] = []
 
         for reservation in pending_reservations:
             reservation.status = ReservationStatus.CONFIRMED
             confirmed_reservations.append(reservation)
-
-            self.notification_service.notify_user(
+            notifications.append(NotificationMessage(
                 user_id=reservation.user_id,
                 title="Reservation Auto-Confirmed",
                 content=f"Your reservation {reservation.id} has been automatically confirmed.",
                 type="AUTO_CONFIRMATION"
-            )
+            ))
 
+        # 通知随调用方（auto_confirm_reservations）的事务一起提交
+        self.notification_service.notify_users(notifications)
         return confirmed_reservations
 
     def handle_venue_closure_or_time_slot_adjustment(self, venue_id: int, start_date: datetime,
@@ -1059,16 +1395,18 @@ class ReservationService:
                 VenueAvailableTimeSlot.date <= end_date.date()
             ).all()
 
-            # 获取受影响的预约
-            affected_reservations: List[Reservation] = []
-            for time_slot in affected_time_slots:
-                reservations = self.db.query(Reservation).filter(
-                    Reservation.venue_available_time_slot_id == time_slot.id,
-                    Reservation.status.in_([ReservationStatus.PENDING, ReservationStatus.CONFIRMED])
-                ).all()
-                affected_reservations.extend(reservations)
+            # 获取受影响的预约（一次查询，预加载时间段、场馆和运动场馆）
+            affected_reservations: List[Reservation] = self.db.query(Reservation).options(
+                joinedload(Reservation.venue_available_time_slot)
+                .joinedload(VenueAvailableTimeSlot.venue)
+                .joinedload(Venue.sport_venue)
+            ).filter(
+                Reservation.venue_available_time_slot_id.in_([time_slot.id for time_slot in affected_time_slots]),
+                Reservation.status.in_([ReservationStatus.PENDING, ReservationStatus.CONFIRMED])
+            ).all()
 
             # 处理受影响的预约
+            cancelled_reads: List[ReservationRead] = []
             for reservation in affected_reservations:
                 reservation_read = ReservationRead(
                     id=reservation.id,
@@ -1084,15 +1422,19 @@ class ReservationService:
 
                 # 取消预约
                 reservation.status = ReservationStatus.CANCELLED
+                cancelled_reads.append(reservation_read)
 
-                # 发送预约取消通知
-                self.notification_service.send_reservation_cancellation_notice(reservation_read)
+            # 批量写入预约取消通知，随下面的提交一起生效
+            self.notification_service.send_reservation_cancellation_notices(
+                cancelled_reads, reason="Venue closure or time slot adjustment"
+            )
 
             # 删除受影响的可用时间段
             for time_slot in affected_time_slots:
                 self.db.delete(time_slot)
 
             self.db.commit()
+            SlotIntervalIndex.invalidate_slots(venue_id)
             logger.info(f"Successfully handled venue closure or time slot adjustment for venue {venue_id}")
 
         except SQLAlchemyError as e:
@@ -1106,31 +1448,302 @@ class ReservationService:
 
     def create_recurring_reservation(self, recurring_reservation: RecurringReservationCreate,
                                      user_id: int) -> RecurringReservationRead:
-        # 实现创建周期性预约的逻辑
-        pass
+        """
+        创建周期性预约并一次性预订整个序列。
+
+        所有日期的冲突检查共用一次时间段查询；容量用一条 UPDATE ... WHERE id IN (...) 扣减，
+        预约用一条多行 INSERT 写入。任何一个日期冲突时整个序列都不会创建。
+        """
+        data = recurring_reservation
+        self._validate_series_rule(data.start_date, data.end_date, data.start_time, data.end_time,
+                                   data.days_of_week)
+        if data.start_date < date.today():
+            raise ReservationException("Recurring reservation cannot start in the past")
+
+        venue = self.db.query(Venue).filter(Venue.id == data.venue_id).first()
+        if not venue:
+            raise ReservationException("Venue not found")
+
+        occurrences = self._expand_series(data.recurrence_pattern, data.start_date, data.end_date,
+                                          data.days_of_week, data.day_of_month)
+        if not occurrences:
+            raise ReservationException("The recurrence rule does not produce any reservation date")
+
+        try:
+            self._check_series_limit(user_id, venue.id, len(occurrences))
+            series = RecurringReservation(
+                user_id=user_id,
+                venue_id=venue.id,
+                pattern=data.recurrence_pattern,
+                start_date=data.start_date,
+                end_date=data.end_date,
+                start_time=data.start_time,
+                end_time=data.end_time,
+                days_of_week=format_days_of_week(data.days_of_week),
+                day_of_month=data.day_of_month
+            )
+            self.db.add(series)
+            self.db.flush()
+
+            booked = self._book_series(series, occurrences)
+            self._create_user_activity(
+                user_id=user_id,
+                activity_type="recurring_reservation_created",
+                venue_id=venue.id,
+                details=f"Created recurring reservation {series.id} with {len(booked)} occurrences"
+            )
+            self.db.commit()
+        except ReservationException:
+            self.db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Database error occurred while creating recurring reservation: {str(e)}")
+            raise DatabaseError(f"Database error occurred while creating recurring reservation: {str(e)}")
+
+        self._after_series_change(user_id, venue.id, booked)
+        logger.info(f"Recurring reservation {series.id} created with {len(booked)} occurrences")
+        return self._create_recurring_reservation_read(series)
 
     def get_recurring_reservation(self, recurring_id: int, user_id: int) -> RecurringReservationRead:
-        # 实现获取周期性预约的逻辑
-        pass
+        return self._create_recurring_reservation_read(self._get_user_series(recurring_id, user_id))
 
     def update_recurring_reservation(self, recurring_id: int, recurring_reservation: RecurringReservationUpdate,
                                      user_id: int) -> RecurringReservationRead:
-        # 实现更新周期性预约的逻辑
-        pass
+        """
+        更新周期性预约规则。
+
+        从今天（或序列开始日期）起尚未发生的预约全部取消并归还名额，再按新规则重新预订，
+        已经发生的预约保持不变。
+        """
+        series = self._get_user_series(recurring_id, user_id)
+        update_data = recurring_reservation.dict(exclude_unset=True)
+        if "recurrence_pattern" in update_data:
+            update_data["pattern"] = update_data.pop("recurrence_pattern")
+        if "days_of_week" in update_data:
+            update_data["days_of_week"] = format_days_of_week(update_data["days_of_week"])
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(series, key, value)
+
+        start_date = self._as_date(series.start_date)
+        end_date = self._as_date(series.end_date)
+        self._validate_series_rule(start_date, end_date, series.start_time, series.end_time,
+                                   parse_days_of_week(series.days_of_week))
+        from_date = max(date.today(), start_date)
+
+        try:
+            released = self._release_series(series.id, from_date)
+            occurrences = self._expand_series(series.pattern, from_date, end_date,
+                                              parse_days_of_week(series.days_of_week), series.day_of_month)
+            # 先取消未发生的预约再计数，被替换的预约不再占用配额
+            self._check_series_limit(user_id, series.venue_id, len(occurrences))
+            booked = self._book_series(series, occurrences)
+            self._create_user_activity(
+                user_id=user_id,
+                activity_type="recurring_reservation_updated",
+                venue_id=series.venue_id,
+                details=f"Updated recurring reservation {series.id}: {len(released)} released, {len(booked)} booked"
+            )
+            self.db.commit()
+        except ReservationException:
+            self.db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Database error occurred while updating recurring reservation: {str(e)}")
+            raise DatabaseError(f"Database error occurred while updating recurring reservation: {str(e)}")
+
+        self._after_series_change(user_id, series.venue_id, released + booked)
+        return self._create_recurring_reservation_read(series)
 
     def delete_recurring_reservation(self, recurring_id: int, user_id: int) -> None:
-        # 实现删除周期性预约的逻辑
-        pass
+        """删除周期性预约：取消尚未发生的预约，已发生的预约保留为普通预约"""
+        series = self._get_user_series(recurring_id, user_id)
+        venue_id = series.venue_id
+        try:
+            released = self._release_series(series.id, date.today())
+            self.db.execute(
+                update(Reservation)
+                .where(Reservation.recurring_reservation_id == series.id)
+                .values(recurring_reservation_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.delete(series)
+            self._create_user_activity(
+                user_id=user_id,
+                activity_type="recurring_reservation_deleted",
+                venue_id=venue_id,
+                details=f"Deleted recurring reservation {recurring_id}, {len(released)} future reservations cancelled"
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Database error occurred while deleting recurring reservation: {str(e)}")
+            raise DatabaseError(f"Database error occurred while deleting recurring reservation: {str(e)}")
+
+        self._after_series_change(user_id, venue_id, released)
+
+    def _get_user_series(self, recurring_id: int, user_id: int) -> RecurringReservation:
+        series = self.db.query(RecurringReservation).filter(
+            RecurringReservation.id == recurring_id,
+            RecurringReservation.user_id == user_id
+        ).first()
+        if not series:
+            raise ReservationNotFoundError(f"Recurring reservation with id {recurring_id} not found")
+        return series
+
+    @staticmethod
+    def _validate_series_rule(start_date: date, end_date: date, start_time: time, end_time: time,
+                              days_of_week: Optional[List[int]]) -> None:
+        if end_date < start_date:
+            raise ReservationException("End date must be on or after start date")
+        if start_time >= end_time:
+            raise ReservationException("End time must be after start time")
+        if days_of_week and any(day < 0 or day > 6 for day in days_of_week):
+            raise ReservationException("Days of week must be between 0 (Monday) and 6 (Sunday)")
+
+    @staticmethod
+    def _expand_series(pattern: RecurrencePattern, start_date: date, end_date: date,
+                       days_of_week: Optional[List[int]], day_of_month: Optional[int]) -> List[date]:
+        max_occurrences = settings.MAX_RECURRING_OCCURRENCES
+        occurrences = list(iter_occurrences(pattern, start_date, end_date, days_of_week, day_of_month,
+                                            limit=max_occurrences + 1))
+        if len(occurrences) > max_occurrences:
+            raise ReservationException(f"A recurring reservation cannot exceed {max_occurrences} occurrences")
+        return occurrences
+
+    def _check_series_limit(self, user_id: int, venue_id: int, occurrence_count: int) -> None:
+        """
+        检查整个序列是否会超出用户的日/周/月配额，不提交事务。
+
+        配额按预约的创建时间计数，序列的所有预约在同一时刻创建，因此每个预约都同时计入当天、
+        本周和本月的窗口。与单次预约相同，先锁定用户行再在事务中重新计数。
+        """
+        user = self.db.query(User).filter(User.id == user_id).with_for_update().first()
+        if not user:
+            raise ReservationException("User not found")
+        rules = ReferenceDataService(self.db).get_rules(venue_id, user.role)
+        if not rules:
+            raise ReservationException("Reservation rules not found for this user role and venue")
+
+        counts = self.quota_service.get_counts_bulk([(user_id, venue_id)], fresh=True)[(user_id, venue_id)]
+        violation = ReservationQuotaService.limit_violation(counts, rules, adding=occurrence_count)
+        if violation:
+            raise ReservationLimitExceededError(
+                f"{violation}: the series adds {occurrence_count} reservations to "
+                f"{counts.daily} today, {counts.weekly} this week and {counts.monthly} this month"
+            )
+
+    def _book_series(self, series: RecurringReservation, occurrences: List[date]) -> List[Tuple[int, date, int, int]]:
+        """
+        预订序列中的所有日期，不提交事务。
+
+        :return: 被扣减容量的时间段 (venue_id, date, slot_id, 剩余容量)，供提交后同步区间索引
+        """
+        matched, conflicts = self._find_series_conflicts(series.venue_id, occurrences,
+                                                         series.start_time, series.end_time)
+        if conflicts:
+            first = conflicts[0]
+            raise ReservationConflictError(
+                f"{len(conflicts)} occurrence(s) conflict, first on {first['date']}: {first['reason']}"
+            )
+        if not matched:
+            return []
+
+        slots = list(matched.values())
+        taken = self.db.execute(
+            update(VenueAvailableTimeSlot)
+            .where(VenueAvailableTimeSlot.id.in_([slot.id for slot in slots]), VenueAvailableTimeSlot.capacity > 0)
+            .values(capacity=VenueAvailableTimeSlot.capacity - 1)
+            .returning(VenueAvailableTimeSlot.id, VenueAvailableTimeSlot.capacity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if len(taken) < len(slots):
+            raise ReservationConflictError("Some time slots in the series were fully booked concurrently")
+
+        remaining = dict(taken)
+        self.db.execute(insert(Reservation), [
+            {
+                "user_id": series.user_id,
+                "venue_id": series.venue_id,
+                "venue_available_time_slot_id": slot.id,
+                "status": ReservationStatus.PENDING,
+                "date": occurrence,
+                "actual_start_time": series.start_time,
+                "actual_end_time": series.end_time,
+                "is_recurring": True,
+                "recurring_reservation_id": series.id
+            } for occurrence, slot in matched.items()
+        ])
+        return [(slot.venue_id, slot.date, slot.id, remaining[slot.id]) for slot in slots]
+
+    def _release_series(self, series_id: int, from_date: date) -> List[Tuple[int, date, int, int]]:
+        """
+        取消序列中 from_date 及之后仍有效的预约并归还名额，各用一条 UPDATE 完成，不提交事务。
+
+        :return: 被归还容量的时间段 (venue_id, date, slot_id, 剩余容量)
+        """
+        slot_ids = self.db.execute(
+            update(Reservation)
+            .where(
+                Reservation.recurring_reservation_id == series_id,
+                Reservation.date >= from_date,
+                Reservation.status.in_([ReservationStatus.PENDING, ReservationStatus.CONFIRMED])
+            )
+            .values(status=ReservationStatus.CANCELLED, cancelled_at=datetime.now())
+            .returning(Reservation.venue_available_time_slot_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if not slot_ids:
+            return []
+
+        released = self.db.execute(
+            update(VenueAvailableTimeSlot)
+            .where(VenueAvailableTimeSlot.id.in_(slot_ids))
+            .values(capacity=VenueAvailableTimeSlot.capacity + 1)
+            .returning(VenueAvailableTimeSlot.venue_id, VenueAvailableTimeSlot.date,
+                       VenueAvailableTimeSlot.id, VenueAvailableTimeSlot.capacity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        return [tuple(row) for row in released]
+
+    def _after_series_change(self, user_id: int, venue_id: int,
+                             changed_slots: List[Tuple[int, date, int, int]]) -> None:
+        # 序列一次改变多个计数窗口，直接失效配额缓存；区间索引按返回的剩余容量逐个更新
+        self.quota_service.invalidate(user_id, venue_id)
+        for slot_venue_id, slot_date, slot_id, capacity in changed_slots:
+            SlotIntervalIndex.record_capacity(slot_venue_id, slot_date, slot_id, capacity)
+
+    @staticmethod
+    def _as_date(value: Union[date, datetime, None]) -> Optional[date]:
+        return value.date() if isinstance(value, datetime) else value
+
+    @staticmethod
+    def _create_recurring_reservation_read(series: RecurringReservation) -> RecurringReservationRead:
+        return RecurringReservationRead(
+            id=series.id,
+            user_id=series.user_id,
+            venue_id=series.venue_id,
+            start_date=ReservationService._as_date(series.start_date),
+            end_date=ReservationService._as_date(series.end_date),
+            start_time=series.start_time,
+            end_time=series.end_time,
+            recurrence_pattern=series.pattern,
+            days_of_week=parse_days_of_week(series.days_of_week),
+            day_of_month=series.day_of_month,
+            created_at=series.created_at,
+            updated_at=series.updated_at
+        )
 
     def get_user_reservation_history(self, user_id: int, start_date: Optional[date], end_date: Optional[date],
-                                     page: int, page_size: int) -> PaginatedReservationResponse:
-        # 实现获取用户预约历史的逻辑
+                                     page: int, page_size: int, cursor: Optional[str] = None,
+                                     include_total: Optional[bool] = None) -> PaginatedReservationResponse:
+        # 按 (date, start_time, id) 倒序；传入 cursor 时使用 keyset 分页
         query = (
             self.db.query(Reservation)
-            .join(VenueAvailableTimeSlot)
-            .join(Venue)
+            .join(Reservation.venue_available_time_slot)
             .filter(Reservation.user_id == user_id)
-            .order_by(VenueAvailableTimeSlot.date.desc(), VenueAvailableTimeSlot.start_time.desc())
         )
 
         if start_date:
@@ -1138,8 +1751,35 @@ class ReservationService:
         if end_date:
             query = query.filter(VenueAvailableTimeSlot.date <= end_date)
 
-        total_count = query.count()
-        reservations = query.offset((page - 1) * page_size).limit(page_size).all()
+        total_count = query.count() if resolve_include_total(include_total, cursor) else None
+
+        sort_keys = (VenueAvailableTimeSlot.date, VenueAvailableTimeSlot.start_time, Reservation.id)
+        if cursor:
+            query = query.filter(keyset_before(
+                sort_keys, decode_cursor(cursor, (date.fromisoformat, time.fromisoformat, int))
+            ))
+        else:
+            query = query.offset((page - 1) * page_size)
+
+        reservations = (
+            query
+            .options(
+                contains_eager(Reservation.venue_available_time_slot),
+                joinedload(Reservation.venue).joinedload(Venue.sport_venue),
+                joinedload(Reservation.user)
+            )
+            .order_by(*(key.desc() for key in sort_keys))
+            .limit(page_size + 1)
+            .all()
+        )
+
+        next_cursor = None
+        if len(reservations) > page_size:
+            reservations = reservations[:page_size]
+            last = reservations[-1]
+            next_cursor = encode_cursor(
+                last.venue_available_time_slot.date, last.venue_available_time_slot.start_time, last.id
+            )
 
         reservation_reads = [
             ReservationService.create_reservation_detail_read(res) for res in reservations
@@ -1149,16 +1789,310 @@ class ReservationService:
             reservations=reservation_reads,
             total_count=total_count,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=next_cursor
         )
 
-    def bulk_create_reservations(self, reservations: List[ReservationCreate]) -> List[ReservationRead]:
-        # 实现批量创建预约的逻辑
-        pass
+    def bulk_create_reservations(self, reservations: List[ReservationCreate]) -> BulkReservationResult:
+        """
+        批量创建预约（团队预约、HR 课程报名）。
+
+        所有目标时间段用一次查询解析，所有用户的配额用一次聚合检查；
+        预约和用户活动记录用多行 INSERT 写入，每个时间段只执行一条容量扣减语句。
+        单个条目失败不影响其他条目，结果中逐条返回成功或失败原因。
+        """
+        results: Dict[int, BulkReservationItemResult] = {}
+
+        def fail(index: int, message: str) -> None:
+            results[index] = BulkReservationItemResult(index=index, success=False, error=message)
 
-    def bulk_update_reservations(self, reservations: List[ReservationUpdate]) -> List[ReservationRead]:
-        # 实现批量更新预约的逻辑
-        pass
+        booked = []
+        now = datetime.now()
+        try:
+            # 1. 一次性加载用户、场馆、预约规则和所有目标日期的时间段
+            user_ids = {item.user_id for item in reservations}
+            venue_ids = {item.venue_id for item in reservations}
+            users = {
+                user.id: user
+                for user in self.db.query(User).filter(User.id.in_(user_ids)).order_by(User.id).with_for_update().all()
+            }
+            venues = {venue.id: venue for venue in self.db.query(Venue).filter(Venue.id.in_(venue_ids)).all()}
+            rules = {
+                (rule.venue_id, rule.user_role): rule
+                for rule in self.db.query(ReservationRules).filter(
+                    ReservationRules.venue_id.in_(venue_ids),
+                    ReservationRules.user_role.in_({user.role for user in users.values()})
+                ).all()
+            }
+            slots_by_day: Dict[Tuple[int, date], List[VenueAvailableTimeSlot]] = {}
+            for slot in self.db.query(VenueAvailableTimeSlot).filter(
+                    VenueAvailableTimeSlot.venue_id.in_(venue_ids),
+                    VenueAvailableTimeSlot.date.in_({item.date for item in reservations})
+            ).all():
+                slots_by_day.setdefault((slot.venue_id, slot.date), []).append(slot)
+
+            # 2. 逐条校验并在内存中匹配包含请求时间的时间段
+            candidates = []
+            for index, item in enumerate(reservations):
+                user = users.get(item.user_id)
+                venue = venues.get(item.venue_id)
+                if not user:
+                    fail(index, "User not found")
+                    continue
+                if not venue:
+                    fail(index, "Venue not found")
+                    continue
+                rule = rules.get((venue.id, user.role))
+                if not rule:
+                    fail(index, "Reservation rules not found for this user role and venue")
+                    continue
+                if item.is_recurring:
+                    fail(index, "Recurring reservations cannot be created in bulk")
+                    continue
+                slot = next((
+                    candidate for candidate in slots_by_day.get((venue.id, item.date), [])
+                    if candidate.start_time <= item.start_time and candidate.end_time >= item.end_time
+                ), None)
+                if slot is None:
+                    fail(index, "No available time slot for the requested reservation")
+                    continue
+                candidates.append((index, item, user, venue, rule, slot))
+
+            # 3. 配额：在事务中一次聚合得到所有 (user, venue) 的计数；本批次只计入已成功扣减名额的条目
+            counts = self.quota_service.get_counts_bulk(((c[2].id, c[3].id) for c in candidates), fresh=True)
+            full_slots = set()
+            pending = candidates
+            while pending:
+                tentative = dict(counts)
+                accepted_by_slot: Dict[int, list] = {}
+                rejected = []
+                for candidate in pending:
+                    index, item, user, venue, rule, slot = candidate
+                    if slot.id in full_slots:
+                        fail(index, "Time slot is fully booked")
+                        continue
+                    key = (user.id, venue.id)
+                    violation = ReservationQuotaService.limit_violation(tentative[key], rule)
+                    if violation:
+                        rejected.append((candidate, violation))
+                        continue
+                    current = tentative[key]
+                    tentative[key] = QuotaCounts(current.daily + 1, current.weekly + 1, current.monthly + 1)
+                    accepted_by_slot.setdefault(slot.id, []).append(candidate)
+
+                # 4. 每个时间段一条容量扣减语句，超出剩余容量的条目按提交顺序失败
+                released_quota = False
+                for slot_id, slot_candidates in accepted_by_slot.items():
+                    granted = self._take_slot_capacity(slot_candidates[0][5], len(slot_candidates))
+                    for candidate in slot_candidates[:granted]:
+                        booked.append(candidate)
+                        key = (candidate[2].id, candidate[3].id)
+                        current = counts[key]
+                        counts[key] = QuotaCounts(current.daily + 1, current.weekly + 1, current.monthly + 1)
+                    if granted < len(slot_candidates):
+                        full_slots.add(slot_id)
+                        released_quota = True
+                        for candidate in slot_candidates[granted:]:
+                            fail(candidate[0], "Time slot is fully booked")
+
+                # 因满员失败的条目不占配额：被本批次计数挤掉的条目按实际预订结果重新检查
+                if released_quota:
+                    pending = [candidate for candidate, _ in rejected]
+                else:
+                    for candidate, violation in rejected:
+                        fail(candidate[0], violation)
+                    pending = []
+
+            # 5. 多行 INSERT 写入预约和用户活动记录
+            if booked:
+                booked.sort(key=lambda c: c[0])
+                reservation_ids = self.db.scalars(
+                    insert(Reservation).returning(Reservation.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "user_id": user.id,
+                            "venue_id": venue.id,
+                            "venue_available_time_slot_id": slot.id,
+                            "status": ReservationStatus.PENDING,
+                            "date": item.date,
+                            "actual_start_time": item.start_time,
+                            "actual_end_time": item.end_time,
+                            "is_recurring": False
+                        } for _, item, user, venue, _, slot in booked
+                    ]
+                ).all()
+
+                self.db.execute(insert(UserActivity), [
+                    {
+                        "user_id": user.id,
+                        "activity_type": "reservation_created",
+                        "reservation_id": reservation_id,
+                        "venue_id": venue.id,
+                        "timestamp": now,
+                        "details": f"Created reservation for venue {venue.id} on {item.date}"
+                    } for (_, item, user, venue, _, _), reservation_id in zip(booked, reservation_ids)
+                ])
+
+                for (index, item, user, venue, _, slot), reservation_id in zip(booked, reservation_ids):
+                    results[index] = BulkReservationItemResult(
+                        index=index,
+                        success=True,
+                        reservation=ReservationRead(
+                            id=reservation_id,
+                            user_id=user.id,
+                            venue_id=venue.id,
+                            venue_available_time_slot_id=slot.id,
+                            status=ReservationStatus.PENDING,
+                            date=slot.date,
+                            actual_start_time=item.start_time,
+                            actual_end_time=item.end_time,
+                            is_recurring=False,
+                            venue_name=venue.name
+                        )
+                    )
+
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            self._capacity_changes.clear()
+            logger.error(f"Database error occurred while creating reservations in bulk: {str(e)}")
+            raise DatabaseError(f"Database error occurred while creating reservations in bulk: {str(e)}")
+
+        self._apply_capacity_changes()
+        for _, _, user, venue, _, _ in booked:
+            self.quota_service.record_created(user.id, venue.id, now)
+
+        logger.info(f"Bulk reservation finished: {len(booked)} of {len(reservations)} booked")
+        return self._bulk_result(results)
+
+    def bulk_update_reservations(self, reservations: List[ReservationBulkUpdate]) -> BulkReservationResult:
+        """
+        批量更新预约状态或时间段。
+
+        预约和目标时间段各用一次查询加载；换时间段时，每个新时间段一条扣减语句、
+        每个旧时间段一条归还语句。单个条目失败不影响其他条目。
+        """
+        results: Dict[int, BulkReservationItemResult] = {}
+
+        def fail(index: int, message: str) -> None:
+            results[index] = BulkReservationItemResult(index=index, success=False, error=message)
+
+        cancelled = []
+        try:
+            db_reservations = {
+                reservation.id: reservation
+                for reservation in self.db.query(Reservation)
+                .options(joinedload(Reservation.venue), joinedload(Reservation.venue_available_time_slot))
+                .filter(Reservation.id.in_({item.id for item in reservations}))
+                .all()
+            }
+            target_slot_ids = {item.venue_available_time_slot_id for item in reservations
+                               if item.venue_available_time_slot_id is not None}
+            slots = {
+                slot.id: slot for slot in self.db.query(VenueAvailableTimeSlot).filter(
+                    VenueAvailableTimeSlot.id.in_(target_slot_ids)
+                ).all()
+            }
+            for reservation in db_reservations.values():
+                slots.setdefault(reservation.venue_available_time_slot_id, reservation.venue_available_time_slot)
+
+            # 1. 校验并按目标时间段分组需要换时间段的条目
+            updates = []
+            moves_by_slot: Dict[int, list] = {}
+            for index, item in enumerate(reservations):
+                reservation = db_reservations.get(item.id)
+                if not reservation:
+                    fail(index, f"Reservation with id {item.id} not found")
+                    continue
+                if reservation.status == ReservationStatus.CANCELLED:
+                    fail(index, f"Reservation {item.id} is already cancelled")
+                    continue
+
+                new_slot_id = item.venue_available_time_slot_id
+                if new_slot_id is not None and new_slot_id != reservation.venue_available_time_slot_id:
+                    new_slot = slots.get(new_slot_id)
+                    if not new_slot or new_slot.venue_id != reservation.venue_id:
+                        fail(index, f"Time slot {new_slot_id} not found for venue {reservation.venue_id}")
+                        continue
+                    moves_by_slot.setdefault(new_slot_id, []).append((index, item, reservation))
+                else:
+                    updates.append((index, item, reservation))
+
+            # 2. 每个目标时间段一条扣减语句，容量不足的条目失败
+            released: Dict[int, int] = {}
+            for new_slot_id, slot_moves in moves_by_slot.items():
+                granted = self._take_slot_capacity(slots[new_slot_id], len(slot_moves))
+                for index, item, reservation in slot_moves[granted:]:
+                    fail(index, "Time slot is fully booked")
+                for index, item, reservation in slot_moves[:granted]:
+                    old_slot_id = reservation.venue_available_time_slot_id
+                    released[old_slot_id] = released.get(old_slot_id, 0) + 1
+                    new_slot = slots[new_slot_id]
+                    reservation.venue_available_time_slot_id = new_slot_id
+                    reservation.date = new_slot.date
+                    reservation.actual_start_time = new_slot.start_time
+                    reservation.actual_end_time = new_slot.end_time
+                    updates.append((index, item, reservation))
+
+            # 3. 应用状态变更；取消的预约归还名额
+            now = datetime.now()
+            for index, item, reservation in updates:
+                if item.status is not None and item.status != reservation.status:
+                    if item.status == ReservationStatus.CANCELLED:
+                        reservation.cancelled_at = now
+                        slot_id = reservation.venue_available_time_slot_id
+                        released[slot_id] = released.get(slot_id, 0) + 1
+                        cancelled.append(reservation)
+                    elif item.status == ReservationStatus.CHECKED_IN:
+                        reservation.checked_in_at = now
+                    reservation.status = item.status
+
+            # 4. 每个旧时间段一条归还语句
+            for slot_id, count in released.items():
+                self._release_slot_capacity(slots[slot_id], count)
+
+            self.db.flush()
+            for index, item, reservation in updates:
+                slot = slots[reservation.venue_available_time_slot_id]
+                results[index] = BulkReservationItemResult(
+                    index=index,
+                    success=True,
+                    reservation=ReservationRead(
+                        id=reservation.id,
+                        user_id=reservation.user_id,
+                        venue_id=reservation.venue_id,
+                        venue_available_time_slot_id=slot.id,
+                        status=reservation.status,
+                        date=slot.date,
+                        actual_start_time=reservation.actual_start_time,
+                        actual_end_time=reservation.actual_end_time,
+                        is_recurring=reservation.is_recurring,
+                        venue_name=reservation.venue.name
+                    )
+                )
+
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            self._capacity_changes.clear()
+            logger.error(f"Database error occurred while updating reservations in bulk: {str(e)}")
+            raise DatabaseError(f"Database error occurred while updating reservations in bulk: {str(e)}")
+
+        self._apply_capacity_changes()
+        for reservation in cancelled:
+            self.quota_service.record_cancelled(reservation.user_id, reservation.venue_id, reservation.created_at)
+
+        return self._bulk_result(results)
+
+    @staticmethod
+    def _bulk_result(results: Dict[int, BulkReservationItemResult]) -> BulkReservationResult:
+        ordered = [results[index] for index in sorted(results)]
+        success_count = sum(1 for result in ordered if result.success)
+        return BulkReservationResult(
+            success_count=success_count,
+            failure_count=len(ordered) - success_count,
+            results=ordered
+        )
 
     def generate_check_in_token(self, reservation_id: int) -> Dict[str, str]:
         reservation = self._get_reservation(reservation_id)
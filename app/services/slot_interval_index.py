@@ -0,0 +1,175 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.leader_reserved_time import LeaderReservedTime
+from app.models.venue_available_time_slot import VenueAvailableTimeSlot
+from app.services.availability_snapshot import AvailabilitySnapshotService
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings, get_logger
+
+logger = get_logger(__name__)
+
+
+class Interval(NamedTuple):
+    id: int
+    start_time: time
+    end_time: time
+    capacity: int = 0
+    day_of_week: Optional[int] = None
+
+
+class IntervalDay:
+    """
+    一天内按开始时间排序的区间数组（不可变）。
+
+    ``max_ends[i]`` 是前 i+1 个区间中最大的结束时间，
+    包含和重叠查询先用 bisect 定位，再从右向左扫描到 ``max_ends`` 排除剩余区间为止。
+    """
+
+    __slots__ = ("intervals", "starts", "max_ends")
+
+    def __init__(self, intervals: Iterable[Interval]):
+        self.intervals: Tuple[Interval, ...] = tuple(sorted(intervals, key=lambda i: (i.start_time, i.end_time)))
+        self.starts: List[time] = [interval.start_time for interval in self.intervals]
+        self.max_ends: List[time] = []
+        for interval in self.intervals:
+            previous = self.max_ends[-1] if self.max_ends else interval.end_time
+            self.max_ends.append(max(previous, interval.end_time))
+
+    def containing(self, start_time: time, end_time: time,
+                   only_with_capacity: bool = False) -> Optional[Interval]:
+        """返回开始时间最早的、完整包含 [start_time, end_time] 的区间"""
+        match = None
+        position = bisect_right(self.starts, start_time) - 1
+        while position >= 0 and self.max_ends[position] >= end_time:
+            interval = self.intervals[position]
+            if interval.end_time >= end_time and (not only_with_capacity or interval.capacity > 0):
+                match = interval
+            position -= 1
+        return match
+
+    def overlapping(self, start_time: time, end_time: time) -> List[Interval]:
+        """返回与 (start_time, end_time) 有交集的全部区间，按开始时间排序"""
+        matches = []
+        position = bisect_left(self.starts, end_time) - 1
+        while position >= 0 and self.max_ends[position] > start_time:
+            interval = self.intervals[position]
+            if interval.end_time > start_time:
+                matches.append(interval)
+            position -= 1
+        matches.reverse()
+        return matches
+
+    def with_capacity(self, interval_id: int, capacity: int) -> "IntervalDay":
+        return IntervalDay(
+            interval._replace(capacity=capacity) if interval.id == interval_id else interval
+            for interval in self.intervals
+        )
+
+
+# ("slots", venue_id, date) -> IntervalDay；("leader", venue_id) -> {day_of_week: IntervalDay}
+# 多进程部署时各进程各自持有一份，其他进程的修改最多在 SLOT_INDEX_TTL_SECONDS 后可见。
+# 过期只影响读路径（可用性展示、定位包含请求时间的时间段）：预约时的容量扣减以数据库的条件 UPDATE 为准，
+# 时间段写入的冲突校验直接查询数据库，索引找到的时间段已被删除时重建该日期后重试，不会超卖或写入重叠的时间段。
+_interval_cache = register_cache(
+    "slot_interval_index",
+    TTLCache(ttl_seconds=settings.SLOT_INDEX_TTL_SECONDS, max_entries=settings.SLOT_INDEX_MAX_ENTRIES)
+)
+
+
+class SlotIntervalIndex:
+    """
+    场馆时间段和领导预留时间的进程内区间索引。
+
+    每个 (venue_id, date) 的时间段和每个场馆的领导预留时间在首次访问时各用一次查询加载，
+    之后的包含、重叠检查都在内存中完成。时间段的增删改和容量变化通过下面的类方法保持一致，
+    这些方法同时维护 AvailabilitySnapshotService 中的可用性快照。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_slots(self, venue_id: int, slot_date: date) -> IntervalDay:
+        key = ("slots", venue_id, slot_date)
+        day = _interval_cache.get(key)
+        if day is None:
+            rows = self.db.query(
+                VenueAvailableTimeSlot.id,
+                VenueAvailableTimeSlot.start_time,
+                VenueAvailableTimeSlot.end_time,
+                VenueAvailableTimeSlot.capacity
+            ).filter(
+                VenueAvailableTimeSlot.venue_id == venue_id,
+                VenueAvailableTimeSlot.date == slot_date
+            ).all()
+            day = IntervalDay(Interval(row.id, row.start_time, row.end_time, row.capacity) for row in rows)
+            _interval_cache.set(key, day)
+        return day
+
+    def get_leader_times(self, venue_id: int, day_of_week: int) -> IntervalDay:
+        key = ("leader", venue_id)
+        days: Optional[Dict[int, IntervalDay]] = _interval_cache.get(key)
+        if days is None:
+            rows = self.db.query(
+                LeaderReservedTime.id,
+                LeaderReservedTime.start_time,
+                LeaderReservedTime.end_time,
+                LeaderReservedTime.day_of_week
+            ).filter(LeaderReservedTime.venue_id == venue_id).all()
+            grouped: Dict[int, List[Interval]] = {}
+            for row in rows:
+                grouped.setdefault(row.day_of_week, []).append(
+                    Interval(row.id, row.start_time, row.end_time, day_of_week=row.day_of_week)
+                )
+            days = {day: IntervalDay(intervals) for day, intervals in grouped.items()}
+            _interval_cache.set(key, days)
+        return days.get(day_of_week) or IntervalDay(())
+
+    def find_containing_slot(self, venue_id: int, slot_date: date, start_time: time, end_time: time,
+                             only_with_capacity: bool = False) -> Optional[Interval]:
+        return self.get_slots(venue_id, slot_date).containing(start_time, end_time, only_with_capacity)
+
+    def find_overlapping_slots(self, venue_id: int, slot_date: date, start_time: time, end_time: time,
+                               exclude_id: Optional[int] = None) -> List[Interval]:
+        return [
+            interval for interval in self.get_slots(venue_id, slot_date).overlapping(start_time, end_time)
+            if interval.id != exclude_id
+        ]
+
+    def find_overlapping_leader_time(self, venue_id: int, slot_date: date, start_time: time,
+                                     end_time: time) -> Optional[Interval]:
+        overlapping = self.get_leader_times(venue_id, slot_date.weekday()).overlapping(start_time, end_time)
+        return overlapping[0] if overlapping else None
+
+    @staticmethod
+    def record_capacity(venue_id: int, slot_date: date, slot_id: int, capacity: int) -> None:
+        """时间段容量变化的事务提交后原地更新索引中的剩余容量"""
+        _interval_cache.update(("slots", venue_id, slot_date), lambda day: day.with_capacity(slot_id, capacity))
+        AvailabilitySnapshotService.record_remaining(venue_id, slot_date, slot_id, capacity)
+
+    @staticmethod
+    def invalidate_slots(venue_id: int, slot_date: Optional[date] = None) -> None:
+        """时间段增删改后失效对应日期（未指定日期时失效该场馆所有日期）的索引"""
+        if slot_date is not None:
+            _interval_cache.delete(("slots", venue_id, slot_date))
+        else:
+            _interval_cache.delete_where(lambda key: key[0] == "slots" and key[1] == venue_id)
+        AvailabilitySnapshotService.invalidate(venue_id, slot_date)
+
+    @staticmethod
+    def invalidate_venues(venue_ids: Iterable[int]) -> None:
+        """批量生成时间段后一次失效多个场馆的所有日期"""
+        venue_ids = set(venue_ids)
+        _interval_cache.delete_where(lambda key: key[0] == "slots" and key[1] in venue_ids)
+        AvailabilitySnapshotService.invalidate_venues(venue_ids)
+
+    @staticmethod
+    def invalidate_leader_times(venue_id: int) -> None:
+        _interval_cache.delete(("leader", venue_id))
+
+    @staticmethod
+    def clear() -> None:
+        _interval_cache.clear()
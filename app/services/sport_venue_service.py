@@ -5,6 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from app.models.sport_venue import SportVenue
 from app.models.venue import Venue
 from app.schemas.sport_venue import SportVenueCreate, SportVenueUpdate
+from app.services.reference_data_service import ReferenceDataService
 from app.core.config import get_logger
 from app.core.exceptions import (SportVenueNotFoundError,
                                  SportVenueDuplicateError,
@@ -46,6 +47,7 @@ class SportVenueService:
             for key, value in update_data.items():
                 setattr(db_sport_venue, key, value)
             self.db.commit()
+            ReferenceDataService.invalidate_sport_venue(sport_venue_id)
             self.db.refresh(db_sport_venue)
             logger.info(f"Updated sport venue: {db_sport_venue.name}")
             return db_sport_venue
@@ -55,6 +57,7 @@ class SportVenueService:
 
     def delete_sport_venue(self, sport_venue_id: int):
         db_sport_venue = self.get_sport_venue(sport_venue_id)
+        venue_ids = [row.id for row in self.db.query(Venue.id).filter(Venue.sport_venue_id == sport_venue_id)]
         try:
             # 开始事务
             self.db.begin_nested()
@@ -66,6 +69,8 @@ class SportVenueService:
             self.db.delete(db_sport_venue)
 
             self.db.commit()
+            ReferenceDataService.invalidate_sport_venue(sport_venue_id)
+            ReferenceDataService.invalidate_venues(venue_ids)
             logger.info(f"Deleted sport venue: {db_sport_venue.name}")
             return db_sport_venue
         except Exception as e:
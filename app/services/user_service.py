@@ -1,5 +1,6 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy import func, and_, or_
 from typing import List, Optional
 from datetime import datetime, date, time, timedelta
@@ -16,8 +17,9 @@ from app.schemas.user import UserDashboardResponse, UpcomingReservation, RecentA
 
 from app.schemas.reservation import PaginatedReservationResponse
 from app.services.reservation_service import ReservationService
-from app.core.security import (get_password_hash, verify_password,
-                               create_password_reset_token, verify_password_reset_token)
+from app.core.security import create_password_reset_token, verify_password_reset_token
+from app.core.password_hasher import password_hasher
+from app.core.principal import invalidate_principal
 # from app.services.log_services import log_operation
 from app.core.config import settings, get_logger
 from app.utils.email import send_email_async
@@ -50,7 +52,7 @@ class UserService:
 
     def create_user(self, user: UserCreate) -> UserResponse:
         try:
-            hashed_password = get_password_hash(user.password)
+            hashed_password = password_hasher.hash(user.password)
             db_user = User(
                 username=user.username,
                 email=user.email,
@@ -75,6 +77,7 @@ class UserService:
 
     def update_user(self, user_id: int, user: UserUpdate) -> User:
         db_user = self.get_user(user_id=user_id)
+        username = db_user.username
         update_data = user.dict(exclude_unset=True)
 
         # Check if email is being updated and if it's already in use
@@ -88,6 +91,7 @@ class UserService:
 
         try:
             self.db.commit()
+            invalidate_principal(username)
             self.db.refresh(db_user)
             logger.info(f"User updated: {db_user.username}")
             return db_user
@@ -96,20 +100,42 @@ class UserService:
             logger.warning(f"Failed to update user: {db_user.username}")
             raise ValidationError("Failed to update user")
 
-    def authenticate_user(self, username: str, password: str) -> User:
+    async def authenticate_user(self, username: str, password: str) -> User:
+        """
+        校验用户名和密码。
+
+        用户查询和重算哈希后的提交在线程池中执行，bcrypt 在独立进程池中计算，都不占用事件循环。
+        """
         try:
-            user = self.get_user(username=username)
-            if not verify_password(password, user.password):
-                raise AuthenticationError("Incorrect username or password")
-            logger.info(f"User authenticated: {user.username}")
-            return user
+            user = await run_in_threadpool(self.get_user, username=username)
         except UserNotFoundError:
             raise AuthenticationError("Incorrect username or password")
 
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+        if not verified:
+            raise AuthenticationError("Incorrect username or password")
+
+        if new_hash:
+            # BCRYPT_ROUNDS 变化后用本次登录的明文透明重算哈希
+            await run_in_threadpool(self._save_rehashed_password, user, new_hash)
+        logger.info(f"User authenticated: {user.username}")
+        return user
+
+    def _save_rehashed_password(self, user: User, new_hash: str) -> None:
+        user.password = new_hash
+        try:
+            self.db.commit()
+            # 提交后属性已过期，在这里重新加载，避免序列化响应时在事件循环上查询
+            self.db.refresh(user)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Failed to rehash password for user {user.username}: {str(e)}")
+
     def delete_user(self, user_id: int):
         db_user = self.get_user(user_id=user_id)
         self.db.delete(db_user)
         self.db.commit()
+        invalidate_principal(db_user.username)
         logger.info(f"User deleted: {db_user.username}")
 
     def get_user_by_email(self, email: str) -> User:
@@ -160,8 +186,9 @@ class UserService:
 
         try:
             user = self.get_user(user_id=user_id)
-            user.password = get_password_hash(new_password)
+            user.password = password_hasher.hash(new_password)
             self.db.commit()
+            invalidate_principal(user.username)
             logger.info(f"Password reset successful for user: {user.username}")
             return True
         except UserNotFoundError:
@@ -189,7 +216,9 @@ class UserService:
             start_date: Optional[date] = None,
             end_date: Optional[date] = None,
             page: int = 1,
-            page_size: int = 20
+            page_size: int = 20,
+            cursor: Optional[str] = None,
+            include_total: Optional[bool] = None
     ) -> PaginatedReservationResponse:
         """
         获取用户的预约历史。
@@ -203,6 +232,8 @@ class UserService:
             - end_date: 结束日期（可选）
             - page: 页码
             - page_size: 每页数量
+            - cursor: 上一页返回的 next_cursor（可选，使用 keyset 分页）
+            - include_total: 是否计算总数（可选）
 
         返回:
         - PaginatedReservationResponse: 包含分页的预约历史记录
@@ -214,7 +245,7 @@ class UserService:
 
         reservation_service = ReservationService(self.db)
         return reservation_service.get_user_reservation_history(
-            user_id, start_date, end_date, page, page_size
+            user_id, start_date, end_date, page, page_size, cursor=cursor, include_total=include_total
         )
 
     def get_upcoming_reservations(self, user_id: int, limit: int=3) -> List[UpcomingReservation]:
@@ -349,6 +380,7 @@ class UserService:
         current_date = datetime.now()
         start_of_month = current_date.replace(day=1)
 
+        # 仪表盘只统计待确认和已确认的预约，与配额计数（包括已签到）不同，不共用配额缓存
         monthly_reservation_count = (
             self.db.query(func.count(Reservation.id))
             .filter(
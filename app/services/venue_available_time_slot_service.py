@@ -1,11 +1,17 @@
-from sqlalchemy import and_
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import select, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from app.models.venue import Venue
 from app.models.venue_available_time_slot import VenueAvailableTimeSlot
 from app.schemas.venue_available_time_slot import VenueAvailableTimeSlotCreate, VenueAvailableTimeSlotUpdate
 from app.services.venue_service import VenueService
-from typing import List, Optional, Tuple, Union
+from app.services.slot_interval_index import SlotIntervalIndex
+from app.services.venue_slot_template_service import VenueSlotTemplateService
+from typing import List, NamedTuple, Optional, Tuple, Union
 from datetime import date, datetime, timedelta, time
 from app.core.config import get_logger, settings
 from app.core.exceptions import (
@@ -20,6 +26,12 @@ from app.core.exceptions import (
 logger = get_logger(__name__)
 
 
+class SlotGenerationStats(NamedTuple):
+    venues: int
+    rows_created: int
+    duration_seconds: float
+
+
 class VenueAvailableTimeSlotService:
     def __init__(self, db: Session):
         self.db = db
@@ -46,6 +58,7 @@ class VenueAvailableTimeSlotService:
         try:
             self.db.commit()
             self.db.refresh(db_time_slot)
+            SlotIntervalIndex.invalidate_slots(db_time_slot.venue_id, db_time_slot.date)
             logger.info(f"Time slot created successfully: {db_time_slot.id}")
             return db_time_slot
         except IntegrityError:
@@ -75,6 +88,7 @@ class VenueAvailableTimeSlotService:
             raise TimeSlotNotFoundError(f"Time slot {slot_id} not found for venue {venue_id}")
 
         update_data = slot_update.dict(exclude_unset=True)
+        old_date = db_time_slot.date
 
         if 'capacity' in update_data:
             venue = self.venue_service.get_venue(venue_id)
@@ -94,6 +108,8 @@ class VenueAvailableTimeSlotService:
         try:
             self.db.commit()
             self.db.refresh(db_time_slot)
+            SlotIntervalIndex.invalidate_slots(venue_id, old_date)
+            SlotIntervalIndex.invalidate_slots(venue_id, db_time_slot.date)
             logger.info(f"Time slot {slot_id} updated successfully")
             return db_time_slot
         except IntegrityError:
@@ -111,8 +127,10 @@ class VenueAvailableTimeSlotService:
         # Here you might want to check for and handle any associated reservations
         # For example: cancel_associated_reservations(time_slot_id)
 
+        venue_id, slot_date = db_time_slot.venue_id, db_time_slot.date
         self.db.delete(db_time_slot)
         self.db.commit()
+        SlotIntervalIndex.invalidate_slots(venue_id, slot_date)
         logger.info(f"Time slot {time_slot_id} deleted successfully")
         return True
 
@@ -128,63 +146,124 @@ class VenueAvailableTimeSlotService:
         slots = query.offset((page - 1) * page_size).limit(page_size).all()
         return slots, total
 
-    def create_future_time_slots(self, days_ahead: int = 14):
+    def create_future_time_slots(self, days_ahead: int = 14) -> SlotGenerationStats:
+        """
+        为所有场馆生成未来 days_ahead 天的时间段，可重复执行。
+
+        场馆按批次分给线程池，每个批次使用独立的会话，
+        以 INSERT ... ON CONFLICT DO NOTHING（uq_venue_date_time）写入，已存在的时间段由数据库跳过，
+        不再把已有时间段读回 Python 比对。
+        """
         logger.info(f"Creating future time slots for the next {days_ahead} days")
+        started = time_module.monotonic()
         today = datetime.now().date()
-        end_date = today + timedelta(days=days_ahead)
+        dates = [today + timedelta(days=day) for day in range(days_ahead + 1)]
 
-        venues = self.db.query(Venue).all()
+        venues = self.db.query(Venue.id, Venue.default_capacity).all()
+        batch_size = self.settings.SLOT_GENERATION_VENUE_BATCH_SIZE
+        batches = [venues[i:i + batch_size] for i in range(0, len(venues), batch_size)]
+        bind = self.db.get_bind()
 
+        rows_created = 0
         try:
-            for venue in venues:
-                existing_slots = self.db.query(VenueAvailableTimeSlot).filter(
-                    and_(
-                        VenueAvailableTimeSlot.venue_id == venue.id,
-                        VenueAvailableTimeSlot.date >= today,
-                        VenueAvailableTimeSlot.date <= end_date
-                    )
-                ).all()
-
-                existing_slots_set = {(slot.date, slot.start_time, slot.end_time) for slot in existing_slots}
-
-                new_slots = []
-                for day in range(days_ahead + 1):
-                    current_date = today + timedelta(days=day)
-                    for start_hour in range(self.settings.VENUE_OPEN_HOUR, self.settings.VENUE_CLOSE_HOUR):
-                        start_time = time(start_hour, 0)
-                        end_time = time(start_hour + 1, 0)
-
-                        if (current_date, start_time, end_time) not in existing_slots_set:
-                            new_slots.append(VenueAvailableTimeSlot(
-                                venue_id=venue.id,
-                                date=current_date,
-                                start_time=start_time,
-                                end_time=end_time,
-                                capacity=venue.default_capacity
-                            ))
-
-                self.db.bulk_save_objects(new_slots)
-
-            self.db.commit()
-            logger.info(f"Successfully created future time slots for {len(venues)} venues")
+            with ThreadPoolExecutor(max_workers=self.settings.SLOT_GENERATION_MAX_WORKERS) as executor:
+                futures = [
+                    executor.submit(self._insert_venue_batch_slots, bind, batch, dates)
+                    for batch in batches
+                ]
+                for future in as_completed(futures):
+                    rows_created += future.result()
         except SQLAlchemyError as e:
-            self.db.rollback()
             logger.error(f"Failed to create future time slots: {str(e)}")
             raise
+        finally:
+            SlotIntervalIndex.invalidate_venues(venue.id for venue in venues)
+
+        stats = SlotGenerationStats(
+            venues=len(venues),
+            rows_created=rows_created,
+            duration_seconds=round(time_module.monotonic() - started, 3)
+        )
+        logger.info(f"Successfully created future time slots: {stats._asdict()}")
+        return stats
+
+    def _insert_venue_batch_slots(self, bind, venues, dates: List[date]) -> int:
+        """在独立会话中按各场馆的每周模板为一批场馆写入时间段，返回实际新增的行数"""
+        chunk_size = self.settings.SLOT_GENERATION_INSERT_CHUNK_SIZE
+
+        with Session(bind=bind) as session:
+            try:
+                templates = VenueSlotTemplateService(session).get_compiled_bulk(venue.id for venue in venues)
+                rows = []
+                for venue in venues:
+                    rows.extend(VenueSlotTemplateService.expand_rows(
+                        templates[venue.id], venue.id, venue.default_capacity, dates
+                    ))
+
+                created = 0
+                for i in range(0, len(rows), chunk_size):
+                    created += self._insert_ignore_existing(session, rows[i:i + chunk_size])
+                session.commit()
+                return created
+            except SQLAlchemyError:
+                session.rollback()
+                raise
+
+    @staticmethod
+    def _insert_ignore_existing(session: Session, rows: List[dict]) -> int:
+        dialect = session.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql_insert(VenueAvailableTimeSlot).values(rows).on_conflict_do_nothing(
+                constraint="uq_venue_date_time"
+            )
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(VenueAvailableTimeSlot).values(rows).on_conflict_do_nothing(
+                index_elements=["venue_id", "date", "start_time", "end_time"]
+            )
+        else:
+            return VenueAvailableTimeSlotService._insert_missing(session, rows)
+        return session.execute(stmt).rowcount
+
+    @staticmethod
+    def _insert_missing(session: Session, rows: List[dict]) -> int:
+        """
+        不支持 ON CONFLICT 的数据库：一次查询本批次涉及的场馆和日期上已有的时间段，只插入不存在的行。
+
+        并发生成同一批时间段时由 uq_venue_date_time 拒绝重复行，事务回滚后重新执行即可。
+        """
+        existing = set(session.execute(
+            select(VenueAvailableTimeSlot.venue_id, VenueAvailableTimeSlot.date,
+                   VenueAvailableTimeSlot.start_time, VenueAvailableTimeSlot.end_time).where(
+                VenueAvailableTimeSlot.venue_id.in_({row["venue_id"] for row in rows}),
+                VenueAvailableTimeSlot.date.in_({row["date"] for row in rows})
+            )
+        ).all())
+        missing = [
+            row for row in rows
+            if (row["venue_id"], row["date"], row["start_time"], row["end_time"]) not in existing
+        ]
+        if missing:
+            session.execute(insert(VenueAvailableTimeSlot), missing)
+        return len(missing)
 
     def _check_time_slot_conflict(
             self,
             time_slot: Union[VenueAvailableTimeSlotCreate, VenueAvailableTimeSlot],
             exclude_id: Optional[int] = None
     ) -> bool:
-        query = self.db.query(VenueAvailableTimeSlot).filter(
+        """
+        检查与同一场馆同一天已有时间段的重叠。
+
+        写入前的校验直接查询数据库，不使用可能落后的区间索引；先锁定场馆行，
+        同一场馆的时间段写入在提交前串行执行，校验之后不会有重叠的时间段被并发写入。
+        """
+        self.db.query(Venue.id).filter(Venue.id == time_slot.venue_id).with_for_update().first()
+        query = self.db.query(VenueAvailableTimeSlot.id).filter(
             VenueAvailableTimeSlot.venue_id == time_slot.venue_id,
             VenueAvailableTimeSlot.date == time_slot.date,
             VenueAvailableTimeSlot.start_time < time_slot.end_time,
             VenueAvailableTimeSlot.end_time > time_slot.start_time
         )
-
-        if exclude_id:
+        if exclude_id is not None:
             query = query.filter(VenueAvailableTimeSlot.id != exclude_id)
-
         return query.first() is not None
@@ -1,8 +1,8 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func, or_
-from datetime import date, time, timedelta
+from datetime import date
 
 from app.models.reservation import ReservationStatus, Reservation
 from app.models.sport_venue import SportVenue
@@ -12,6 +12,10 @@ from app.models.facility import Facility
 from app.models.leader_reserved_time import LeaderReservedTime
 from app.schemas.venue import VenueCreate, VenueUpdate, VenueStats
 from app.schemas.venue_available_time_slot import VenueAvailabilityRead, TimeSlotAvailability
+from app.services.venue_slot_template_service import VenueSlotTemplateService
+from app.services.availability_snapshot import AvailabilitySnapshotService
+from app.services.reference_data_service import ReferenceDataService
+from app.services.slot_interval_index import SlotIntervalIndex
 from app.core.config import get_logger
 from app.core.exceptions import (VenueNotFoundError, SportVenueNotFoundError,
                                  VenueCreateError, VenueUpdateError, VenueDeleteError, TimeSlotException)
@@ -26,9 +30,7 @@ class VenueService:
         self.db = db
 
     def get_venue(self, venue_id: int) -> Venue:
-        venue = self.db.query(Venue).options(
-            joinedload(Venue.sport_venue)
-        ).filter(Venue.id == venue_id).first()
+        venue = ReferenceDataService(self.db).get_venue(venue_id)
 
         if not venue:
             raise VenueNotFoundError("Venue not found", status_code=404)
@@ -64,6 +66,7 @@ class VenueService:
             for key, value in update_data.items():
                 setattr(db_venue, key, value)
             self.db.commit()
+            ReferenceDataService.invalidate_venue(venue_id)
             self.db.refresh(db_venue)
             return db_venue
         except SQLAlchemyError as e:
@@ -79,6 +82,8 @@ class VenueService:
                 self.db.query(Reservation).filter(Reservation.venue_id == venue_id).update(
                     {"status": ReservationStatus.CANCELLED})
             self.db.commit()
+            ReferenceDataService.invalidate_venue(venue_id)
+            SlotIntervalIndex.invalidate_slots(venue_id)
             self.db.refresh(venue)
             return venue
         except SQLAlchemyError as e:
@@ -99,6 +104,10 @@ class VenueService:
                 {"status": ReservationStatus.CANCELLED})
             self.db.delete(db_venue)
             self.db.commit()
+            ReferenceDataService.invalidate_venues([venue_id])
+            ReferenceDataService.invalidate_rules(venue_id)
+            SlotIntervalIndex.invalidate_slots(venue_id)
+            SlotIntervalIndex.invalidate_leader_times(venue_id)
         except SQLAlchemyError as e:
             self.db.rollback()
             logger.error(f"Database error occurred while deleting venue: {str(e)}")
@@ -121,46 +130,29 @@ class VenueService:
         return search_query.limit(limit).all()
 
     def check_venue_availability(self, venue_id: int, start_date: date, end_date: date) -> List[VenueAvailabilityRead]:
-        # 检查输入的有效性
-        if start_date > end_date:
-            raise ValueError("Start date must be before or equal to end date")
-
-        if (end_date - start_date).days > MAX_DATE_RANGE:
-            raise TimeSlotException(f"Date range cannot exceed {MAX_DATE_RANGE} days")
-
-        # 获取场馆信息
-        venue = self.db.query(Venue).filter(Venue.id == venue_id).first()
-        if not venue:
-            raise ValueError(f"Venue with id {venue_id} not found")
-
-        # 批量获取时间段
-        time_slots = self.db.query(VenueAvailableTimeSlot).filter(
-            VenueAvailableTimeSlot.venue_id == venue_id,
-            VenueAvailableTimeSlot.date.between(start_date, end_date)
-        ).order_by(VenueAvailableTimeSlot.date, VenueAvailableTimeSlot.start_time).all()
-
-        # 创建日期到时间段的映射
-        date_to_slots = {}
-        for slot in time_slots:
-            if slot.date not in date_to_slots:
-                date_to_slots[slot.date] = []
-            date_to_slots[slot.date].append(slot)
+        venue, days, template = self._load_availability(venue_id, start_date, end_date)
 
         availability_list = []
-        current_date = start_date
-        while current_date <= end_date:
-            slots = date_to_slots.get(current_date, [])
-            if not slots:
-                slots = VenueService._generate_default_time_slots(venue, current_date)
-
-            time_slot_availability = [
-                TimeSlotAvailability(
-                    start_time=slot.start_time,
-                    end_time=slot.end_time,
-                    available_capacity=slot.capacity,
-                    total_capacity=venue.default_capacity  # 使用场馆的默认容量
-                ) for slot in slots
-            ]
+        for current_date, snapshot in days.items():
+            if len(snapshot):
+                time_slot_availability = [
+                    TimeSlotAvailability(
+                        start_time=slot.start_time,
+                        end_time=slot.end_time,
+                        available_capacity=slot.remaining,
+                        total_capacity=slot.total
+                    ) for slot in snapshot
+                ]
+            else:
+                # 尚未生成时间段的日期按场馆的每周模板展示（与夜间生成任务使用同一份模板）
+                time_slot_availability = [
+                    TimeSlotAvailability(
+                        start_time=slot_start,
+                        end_time=slot_end,
+                        available_capacity=venue.default_capacity if capacity is None else capacity,
+                        total_capacity=venue.default_capacity if capacity is None else capacity
+                    ) for slot_start, slot_end, capacity in template.days[current_date.weekday()]
+                ]
 
             availability_list.append(VenueAvailabilityRead(
                 date=current_date,
@@ -169,34 +161,30 @@ class VenueService:
                 time_slots=time_slot_availability
             ))
 
-            current_date += timedelta(days=1)
-
         return availability_list
 
-    @staticmethod
-    def _generate_default_time_slots(venue: Venue, date_key: date) -> List[VenueAvailableTimeSlot]:
-        # 定义默认时间段
-        time_ranges = [
-            (time(8, 0), time(10, 0)),
-            (time(10, 0), time(12, 0)),
-            (time(14, 0), time(16, 0)),
-            (time(16, 0), time(18, 0)),
-            (time(19, 0), time(21, 0))
-        ]
-
-        default_slots = []
-        for start_time, end_time in time_ranges:
-            default_slots.append(
-                VenueAvailableTimeSlot(
-                    venue_id=venue.id,
-                    date=date_key,
-                    start_time=start_time,
-                    end_time=end_time,
-                    capacity=venue.default_capacity  # 使用场馆的默认可预约容量
-                )
-            )
+    def get_availability_etag(self, venue_id: int, start_date: date, end_date: date) -> str:
+        """可用性结果的 ETag，只依赖内存中的快照，结果未变化时无需构建响应"""
+        venue, days, template = self._load_availability(venue_id, start_date, end_date)
+        return AvailabilitySnapshotService.combined_etag(days, venue.name, venue.default_capacity, template.days)
+
+    def _load_availability(self, venue_id: int, start_date: date, end_date: date):
+        # 检查输入的有效性
+        if start_date > end_date:
+            raise ValueError("Start date must be before or equal to end date")
+
+        if (end_date - start_date).days > MAX_DATE_RANGE:
+            raise TimeSlotException(f"Date range cannot exceed {MAX_DATE_RANGE} days")
+
+        # 获取场馆信息
+        venue = ReferenceDataService(self.db).get_venue(venue_id)
+        if not venue:
+            raise ValueError(f"Venue with id {venue_id} not found")
 
-        return default_slots
+        # 每天的可用性来自快照，未缓存的日期用一次聚合查询加载
+        days = AvailabilitySnapshotService(self.db).get_days(venue_id, start_date, end_date)
+        template = VenueSlotTemplateService(self.db).get_compiled(venue_id)
+        return venue, days, template
 
     def create_venues_batch(self, venues: List[VenueCreate]) -> List[Venue]:
         try:
@@ -0,0 +1,171 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.venue import Venue
+from app.models.venue_slot_template import VenueSlotTemplate
+from app.schemas.venue import VenueSlotTemplateEntry, VenueSlotTemplateRead
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings, get_logger
+from app.core.exceptions import VenueNotFoundError, VenueUpdateError, ValidationError
+
+logger = get_logger(__name__)
+
+# (start_time, end_time, capacity)，capacity 为 None 表示使用场馆的 default_capacity
+TemplateSlot = Tuple[time, time, Optional[int]]
+
+
+class CompiledWeekTemplate(NamedTuple):
+    days: Tuple[Tuple[TemplateSlot, ...], ...]  # 下标为星期几（0 为周一），共 7 项
+    is_default: bool = False
+
+
+def _compile(slots_by_day: Dict[int, List[TemplateSlot]], is_default: bool = False) -> CompiledWeekTemplate:
+    return CompiledWeekTemplate(
+        days=tuple(tuple(sorted(slots_by_day.get(day, []))) for day in range(7)),
+        is_default=is_default
+    )
+
+
+def _build_default_template() -> CompiledWeekTemplate:
+    # 未配置模板的场馆：VENUE_OPEN_HOUR 到 VENUE_CLOSE_HOUR 之间每 VENUE_SLOT_MINUTES 一个时间段
+    step = timedelta(minutes=settings.VENUE_SLOT_MINUTES)
+    current = datetime.combine(date.min, time(settings.VENUE_OPEN_HOUR))
+    close = datetime.combine(date.min, time(settings.VENUE_CLOSE_HOUR))
+    day_slots = []
+    while current + step <= close:
+        day_slots.append((current.time(), (current + step).time(), None))
+        current += step
+    return _compile({day: day_slots for day in range(7)}, is_default=True)
+
+
+DEFAULT_TEMPLATE = _build_default_template()
+
+# venue_id -> CompiledWeekTemplate
+_template_cache = register_cache("slot_template", TTLCache(ttl_seconds=settings.SLOT_TEMPLATE_CACHE_TTL_SECONDS))
+
+
+class VenueSlotTemplateService:
+    """
+    场馆每周时间段模板。
+
+    模板编译为“星期几 -> 时间段数组”的表并缓存在内存中，
+    夜间生成时间段和可用性查询都从这里展开，不再各自硬编码时间网格。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_compiled(self, venue_id: int) -> CompiledWeekTemplate:
+        return self.get_compiled_bulk([venue_id])[venue_id]
+
+    def get_compiled_bulk(self, venue_ids: Iterable[int]) -> Dict[int, CompiledWeekTemplate]:
+        """返回多个场馆的编译模板，缓存未命中的场馆用一次查询加载"""
+        result: Dict[int, CompiledWeekTemplate] = {}
+        missing = []
+        for venue_id in set(venue_ids):
+            compiled = _template_cache.get(venue_id)
+            if compiled is None:
+                missing.append(venue_id)
+            else:
+                result[venue_id] = compiled
+
+        if missing:
+            grouped: Dict[int, Dict[int, List[TemplateSlot]]] = {}
+            rows = self.db.query(
+                VenueSlotTemplate.venue_id,
+                VenueSlotTemplate.day_of_week,
+                VenueSlotTemplate.start_time,
+                VenueSlotTemplate.end_time,
+                VenueSlotTemplate.capacity
+            ).filter(VenueSlotTemplate.venue_id.in_(missing)).all()
+            for row in rows:
+                grouped.setdefault(row.venue_id, {}).setdefault(row.day_of_week, []).append(
+                    (row.start_time, row.end_time, row.capacity)
+                )
+            for venue_id in missing:
+                compiled = _compile(grouped[venue_id]) if venue_id in grouped else DEFAULT_TEMPLATE
+                _template_cache.set(venue_id, compiled)
+                result[venue_id] = compiled
+
+        return result
+
+    def get_template(self, venue_id: int) -> VenueSlotTemplateRead:
+        if not self.db.query(Venue.id).filter(Venue.id == venue_id).first():
+            raise VenueNotFoundError(f"Venue with id {venue_id} not found")
+        compiled = self.get_compiled(venue_id)
+        return VenueSlotTemplateRead(
+            venue_id=venue_id,
+            is_default=compiled.is_default,
+            entries=[
+                VenueSlotTemplateEntry(day_of_week=day, start_time=start, end_time=end, capacity=capacity)
+                for day, slots in enumerate(compiled.days)
+                for start, end, capacity in slots
+            ]
+        )
+
+    def replace_template(self, venue_id: int, entries: List[VenueSlotTemplateEntry]) -> VenueSlotTemplateRead:
+        """用 entries 整体替换场馆的每周模板；entries 为空时恢复为默认模板"""
+        venue = self.db.query(Venue).filter(Venue.id == venue_id).first()
+        if not venue:
+            raise VenueNotFoundError(f"Venue with id {venue_id} not found")
+        self._validate_entries(entries, venue)
+
+        try:
+            self.db.query(VenueSlotTemplate).filter(VenueSlotTemplate.venue_id == venue_id).delete(
+                synchronize_session=False
+            )
+            self.db.add_all([
+                VenueSlotTemplate(venue_id=venue_id, **entry.dict()) for entry in entries
+            ])
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Failed to update slot template for venue {venue_id}: {str(e)}")
+            raise VenueUpdateError(f"Failed to update slot template: {str(e)}")
+
+        self.invalidate(venue_id)
+        logger.info(f"Slot template for venue {venue_id} replaced with {len(entries)} entries")
+        return self.get_template(venue_id)
+
+    @staticmethod
+    def _validate_entries(entries: List[VenueSlotTemplateEntry], venue: Venue) -> None:
+        by_day: Dict[int, List[VenueSlotTemplateEntry]] = {}
+        for entry in entries:
+            if entry.capacity is not None and entry.capacity > venue.capacity:
+                raise ValidationError(f"Template capacity cannot exceed venue capacity of {venue.capacity}")
+            by_day.setdefault(entry.day_of_week, []).append(entry)
+
+        for day, day_entries in by_day.items():
+            day_entries.sort(key=lambda e: e.start_time)
+            for previous, current in zip(day_entries, day_entries[1:]):
+                if current.start_time < previous.end_time:
+                    raise ValidationError(f"Template slots overlap on day {day}")
+
+    @staticmethod
+    def invalidate(venue_id: int) -> None:
+        _template_cache.delete(venue_id)
+
+    @staticmethod
+    def expand_rows(template: CompiledWeekTemplate, venue_id: int, default_capacity: int,
+                    dates: Iterable[date]) -> List[dict]:
+        """
+        把模板展开为 dates 上的时间段行（供批量 INSERT 使用）。
+
+        每个星期几的行只构建一次，之后按日期复制并填入 date。
+        """
+        week = [
+            [
+                {
+                    "venue_id": venue_id,
+                    "start_time": start,
+                    "end_time": end,
+                    "capacity": default_capacity if capacity is None else capacity
+                }
+                for start, end, capacity in day_slots
+            ]
+            for day_slots in template.days
+        ]
+        return [{**row, "date": slot_date} for slot_date in dates for row in week[slot_date.weekday()]]
@@ -1,11 +1,12 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, delete
 from datetime import datetime, timedelta
 
 from app.models.waiting_list import WaitingList
+from app.models.venue_available_time_slot import VenueAvailableTimeSlot
 from app.schemas.waiting_list import WaitingListCreate
-from app.models.reservation import Reservation
+from app.services.waiting_queue_index import WaitingQueueIndex
 from app.core.exceptions import WaitingListEntryNotFoundError, WaitingListEntryExistsError
 
 
@@ -19,53 +20,61 @@ class WaitingListService:
             raise WaitingListEntryNotFoundError(f"Waiting list entry with id {entry_id} not found")
         return entry
 
-    def get_waiting_list(self, reservation_id: int = None, skip: int = 0, limit: int = 100) -> List[WaitingList]:
+    def get_waiting_list(self, venue_available_time_slot_id: int = None, skip: int = 0,
+                         limit: int = 100) -> List[WaitingList]:
         query = self.db.query(WaitingList)
-        if reservation_id:
-            query = query.filter(WaitingList.reservation_id == reservation_id)
-        return query.order_by(WaitingList.created_at).offset(skip).limit(limit).all()
+        if venue_available_time_slot_id:
+            query = query.filter(WaitingList.venue_available_time_slot_id == venue_available_time_slot_id)
+        return query.order_by(WaitingList.created_at, WaitingList.id).offset(skip).limit(limit).all()
 
     def create_waiting_list_entry(self, entry: WaitingListCreate) -> WaitingList:
         # 检查用户是否已经在等待列表中
-        self._check_existing_entry(entry.user_id, entry.reservation_id)
+        self._check_existing_entry(entry.user_id, entry.venue_available_time_slot_id)
 
         db_entry = WaitingList(**entry.dict())
         self.db.add(db_entry)
         self.db.commit()
         self.db.refresh(db_entry)
+        WaitingQueueIndex.record_joined(db_entry.venue_available_time_slot_id, db_entry.id, db_entry.created_at)
         return db_entry
 
     def delete_waiting_list_entry(self, entry_id: int):
         db_entry = self.get_waiting_list_entry(entry_id)
         self.db.delete(db_entry)
         self.db.commit()
+        WaitingQueueIndex.record_removed(db_entry.venue_available_time_slot_id, [entry_id])
 
     def get_next_waiting_user(self, venue_available_time_slot_id: int) -> Optional[WaitingList]:
         return self.db.query(WaitingList).filter(
             WaitingList.venue_available_time_slot_id == venue_available_time_slot_id,
             WaitingList.is_expired == False
-        ).order_by(WaitingList.created_at).first()
+        ).order_by(WaitingList.created_at, WaitingList.id).first()
 
     def remove_from_waiting_list(self, waiting_list_entry: WaitingList) -> None:
+        # 调用方提交后需调用 WaitingQueueIndex.record_removed 同步队列缓存
         self.db.delete(waiting_list_entry)
         self.db.flush()  # 使用 flush 而不是 commit，让 ReservationService 控制事务
 
     def clean_expired_entries(self, expiration_days: int = 7):
         """清理过期的等待列表条目"""
         expiration_date = datetime.utcnow() - timedelta(days=expiration_days)
-        expired_entries = self.db.query(WaitingList).filter(WaitingList.created_at < expiration_date).all()
-        for entry in expired_entries:
-            self.db.delete(entry)
+        removed = self.db.execute(
+            delete(WaitingList).where(WaitingList.created_at < expiration_date)
+            .returning(WaitingList.venue_available_time_slot_id, WaitingList.id),
+            execution_options={"synchronize_session": False}
+        ).all()
         self.db.commit()
+        WaitingQueueIndex.record_removed_many(removed)
 
-    def _check_existing_entry(self, user_id: int, reservation_id: int):
-        """检查用户是否已经在特定预约的等待列表中"""
+    def _check_existing_entry(self, user_id: int, venue_available_time_slot_id: int):
+        """检查用户是否已经在特定时间段的等待列表中"""
         existing_entry = self.db.query(WaitingList).filter(
             WaitingList.user_id == user_id,
-            WaitingList.reservation_id == reservation_id
+            WaitingList.venue_available_time_slot_id == venue_available_time_slot_id,
+            WaitingList.is_expired == False
         ).first()
         if existing_entry:
-            raise WaitingListEntryExistsError("User is already in the waiting list for this reservation")
+            raise WaitingListEntryExistsError("User is already in the waiting list for this time slot")
 
     def get_waiting_list_stats(self, venue_id: Optional[int] = None, start_date: Optional[datetime] = None,
                                end_date: Optional[datetime] = None):
@@ -76,7 +85,7 @@ class WaitingListService:
         )
 
         if venue_id:
-            query = query.join(Reservation).filter(Reservation.venue_id == venue_id)
+            query = query.join(VenueAvailableTimeSlot).filter(VenueAvailableTimeSlot.venue_id == venue_id)
 
         if start_date:
             query = query.filter(WaitingList.created_at >= start_date)
@@ -88,9 +97,9 @@ class WaitingListService:
 
         # 获取最受欢迎的时段
         popular_times_query = self.db.query(
-            func.date_trunc('hour', Reservation.start_time).label("hour"),
+            func.extract('hour', VenueAvailableTimeSlot.start_time).label("hour"),
             func.count(WaitingList.id).label("count")
-        ).join(Reservation).group_by("hour").order_by(func.count(WaitingList.id).desc()).limit(5)
+        ).join(VenueAvailableTimeSlot).group_by("hour").order_by(func.count(WaitingList.id).desc()).limit(5)
 
         popular_times = [{"hour": row.hour, "count": row.count} for row in popular_times_query.all()]
 
@@ -101,27 +110,27 @@ class WaitingListService:
         }
 
     def check_user_waiting_list_status(self, user_id: int, venue_id: Optional[int] = None):
-        """检查用户在等待列表中的状态"""
+        """
+        检查用户在等待列表中的状态。
+
+        一次查询取出用户的条目，排队位置由 WaitingQueueIndex 的按时间段缓存的有序队列求得，
+        轮询时通常不再访问数据库计算位置。
+        """
         query = self.db.query(WaitingList).filter(WaitingList.user_id == user_id)
 
         if venue_id:
-            query = query.join(Reservation).filter(Reservation.venue_id == venue_id)
+            query = query.join(VenueAvailableTimeSlot).filter(VenueAvailableTimeSlot.venue_id == venue_id)
 
-        waiting_entries = query.all()
+        waiting_entries = query.order_by(WaitingList.created_at, WaitingList.id).all()
+        positions = WaitingQueueIndex(self.db).get_positions(waiting_entries)
 
         return [
             {
                 "entry_id": entry.id,
-                "reservation_id": entry.reservation_id,
+                "venue_available_time_slot_id": entry.venue_available_time_slot_id,
                 "created_at": entry.created_at,
-                "position": self._get_waiting_list_position(entry.reservation_id, entry.created_at)
+                "is_expired": entry.is_expired,
+                "position": positions[entry.id][0],
+                "queue_length": positions[entry.id][1]
             } for entry in waiting_entries
         ]
-
-    def _get_waiting_list_position(self, reservation_id: int, created_at: datetime) -> int:
-        """获取用户在特定预约等待列表中的位置"""
-        position = self.db.query(func.count(WaitingList.id)).filter(
-            WaitingList.reservation_id == reservation_id,
-            WaitingList.created_at < created_at
-        ).scalar()
-        return position + 1
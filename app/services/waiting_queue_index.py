@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.waiting_list import WaitingList
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings, get_logger
+
+logger = get_logger(__name__)
+
+# 队列中的序列号：(加入时间, 条目 id)，与 process_waiting_list 的晋升顺序一致
+QueueKey = Tuple[datetime, int]
+
+
+class SlotQueue:
+    """
+    一个时间段的候补队列（不可变）。
+
+    ``keys`` 是按序列号排序的未过期条目，排队位置用 bisect 在 O(log n) 内求得；
+    加入和移除返回新对象，读者无需加锁。
+    """
+
+    __slots__ = ("keys",)
+
+    def __init__(self, keys: Iterable[QueueKey], presorted: bool = False):
+        self.keys: Tuple[QueueKey, ...] = tuple(keys) if presorted else tuple(sorted(keys))
+
+    def position(self, created_at: datetime, entry_id: int) -> Optional[int]:
+        """条目在队列中的位置（从 1 开始），不在队列中时返回 None"""
+        key = (created_at, entry_id)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index + 1
+        return None
+
+    def with_entry(self, created_at: datetime, entry_id: int) -> "SlotQueue":
+        key = (created_at, entry_id)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return self
+        return SlotQueue(self.keys[:index] + (key,) + self.keys[index:], presorted=True)
+
+    def without(self, entry_ids: Iterable[int]) -> "SlotQueue":
+        entry_ids = set(entry_ids)
+        return SlotQueue((key for key in self.keys if key[1] not in entry_ids), presorted=True)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+# venue_available_time_slot_id -> SlotQueue；多进程部署时各进程各自持有一份，其他进程的修改在 TTL 内生效
+_queue_cache = register_cache(
+    "waiting_queue",
+    TTLCache(ttl_seconds=settings.WAITING_QUEUE_TTL_SECONDS, max_entries=settings.WAITING_QUEUE_MAX_SLOTS)
+)
+
+
+class WaitingQueueIndex:
+    """
+    按时间段缓存的候补队列，用于排队位置查询。
+
+    未命中的时间段用一次查询批量加载；加入、离开、晋升和过期在事务提交后通过下面的类方法
+    原地更新或失效对应时间段，查询位置时不再对每个条目执行 COUNT。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_queues(self, slot_ids: Iterable[int]) -> Dict[int, SlotQueue]:
+        queues, missing = {}, []
+        for slot_id in set(slot_ids):
+            queue = _queue_cache.get(slot_id)
+            if queue is None:
+                missing.append(slot_id)
+            else:
+                queues[slot_id] = queue
+
+        if missing:
+            loaded: Dict[int, List[QueueKey]] = {slot_id: [] for slot_id in missing}
+            rows = self.db.query(
+                WaitingList.id,
+                WaitingList.venue_available_time_slot_id,
+                WaitingList.created_at
+            ).filter(
+                WaitingList.venue_available_time_slot_id.in_(missing),
+                WaitingList.is_expired == False
+            ).all()
+            for row in rows:
+                loaded[row.venue_available_time_slot_id].append((row.created_at, row.id))
+            for slot_id, keys in loaded.items():
+                queue = queues[slot_id] = SlotQueue(keys)
+                _queue_cache.set(slot_id, queue)
+        return queues
+
+    def get_positions(self, entries: Iterable[WaitingList]) -> Dict[int, Tuple[Optional[int], int]]:
+        """
+        一次求出多个条目的排队位置。
+
+        :return: entry_id -> (位置, 队列长度)；已过期或已离开队列的条目位置为 None
+        """
+        entries = list(entries)
+        queues = self.get_queues(entry.venue_available_time_slot_id for entry in entries)
+        positions = {}
+        for entry in entries:
+            queue = queues[entry.venue_available_time_slot_id]
+            position = None if entry.is_expired else queue.position(entry.created_at, entry.id)
+            positions[entry.id] = (position, len(queue))
+        return positions
+
+    @staticmethod
+    def record_joined(slot_id: int, entry_id: int, created_at: datetime) -> None:
+        _queue_cache.update(slot_id, lambda queue: queue.with_entry(created_at, entry_id))
+
+    @staticmethod
+    def record_removed(slot_id: int, entry_ids: Iterable[int]) -> None:
+        """条目离开、晋升或过期后从队列中移除"""
+        entry_ids = list(entry_ids)
+        _queue_cache.update(slot_id, lambda queue: queue.without(entry_ids))
+
+    @staticmethod
+    def record_removed_many(entries: Iterable[Tuple[int, int]]) -> None:
+        """批量移除 (slot_id, entry_id)"""
+        by_slot: Dict[int, List[int]] = defaultdict(list)
+        for slot_id, entry_id in entries:
+            by_slot[slot_id].append(entry_id)
+        for slot_id, entry_ids in by_slot.items():
+            WaitingQueueIndex.record_removed(slot_id, entry_ids)
+
+    @staticmethod
+    def invalidate(slot_ids: Iterable[int]) -> None:
+        for slot_id in slot_ids:
+            _queue_cache.delete(slot_id)
+
+    @staticmethod
+    def clear() -> None:
+        _queue_cache.clear()
@@ -0,0 +1,63 @@
+import asyncio
+import random
+import threading
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+from app.core.config import settings, get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+async def retry_with_backoff(
+        operation: Callable[[], Awaitable[T]],
+        retry_on: Tuple[Type[BaseException], ...],
+        attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        description: str = "operation"
+) -> T:
+    """
+    执行 operation，遇到 retry_on 中的异常时按指数退避（带随机抖动）重试。
+
+    :param attempts: 总尝试次数，默认 DELIVERY_MAX_ATTEMPTS
+    :param base_delay: 第一次重试前的等待秒数，之后每次翻倍，默认 DELIVERY_RETRY_BASE_SECONDS
+    """
+    attempts = attempts or settings.DELIVERY_MAX_ATTEMPTS
+    base_delay = settings.DELIVERY_RETRY_BASE_SECONDS if base_delay is None else base_delay
+    for attempt in range(1, attempts + 1):
+        try:
+            return await operation()
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            delay = base_delay * (2 ** (attempt - 1)) * (1 + random.random() / 2)
+            logger.warning(f"{description} failed (attempt {attempt}/{attempts}): {str(e)}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+class BackgroundLoop:
+    """
+    进程内常驻的事件循环（后台线程）。
+
+    Celery 任务是同步函数，如果每次都用 asyncio.run 创建新循环，SMTP / HTTP 连接池会随循环一起销毁；
+    在这个常驻循环上执行发送协程，连接可以跨任务复用。
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="delivery-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result(timeout)
+
+
+delivery_loop = BackgroundLoop()
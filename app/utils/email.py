@@ -1,28 +1,119 @@
+import asyncio
+import weakref
 import aiosmtplib, smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Iterable, List, Optional, Tuple
 from app.core.config import settings, get_logger
+from app.utils.delivery import retry_with_backoff
 
 logger = get_logger(__name__)
 
+# 可重试的错误：连接失败、连接断开和超时；收件人被拒等 SMTP 响应错误不重试
+_RETRYABLE_SMTP_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                          aiosmtplib.SMTPTimeoutError, OSError)
 
-async def send_email_async(to_email: str, subject: str, body: str):
+
+class SMTPConnectionPool:
+    """
+    绑定到一个事件循环的 SMTP 连接池。
+
+    最多保持 size 个已登录的长连接，每个连接连续发送多封邮件，
+    发送 SMTP_MAX_MESSAGES_PER_CONNECTION 封后重建；并发发送数受 size 限制。
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: "asyncio.LifoQueue[Tuple[aiosmtplib.SMTP, int]]" = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+
+    @staticmethod
+    async def _connect() -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=settings.SMTP_PORT, use_tls=settings.SMTP_USE_TLS,
+                               timeout=settings.SMTP_TIMEOUT_SECONDS)
+        await smtp.connect()
+        if settings.SMTP_USER:
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return smtp
+
+    @staticmethod
+    async def _close(smtp: aiosmtplib.SMTP) -> None:
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def send_message(self, message: MIMEMultipart) -> None:
+        async with self._slots:
+            smtp, sent = None, 0
+            while not self._idle.empty():
+                smtp, sent = self._idle.get_nowait()
+                if smtp.is_connected:
+                    break
+                smtp = None
+            if smtp is None:
+                smtp, sent = await self._connect(), 0
+
+            try:
+                await smtp.send_message(message)
+            except BaseException:
+                # 连接状态未知，直接丢弃，由重试逻辑建立新连接
+                smtp.close()
+                raise
+
+            sent += 1
+            if sent >= settings.SMTP_MAX_MESSAGES_PER_CONNECTION:
+                await self._close(smtp)
+            else:
+                self._idle.put_nowait((smtp, sent))
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            smtp, _ = self._idle.get_nowait()
+            await self._close(smtp)
+
+
+# 每个事件循环一个连接池：API 进程使用主循环，Celery worker 使用 delivery_loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SMTPConnectionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = SMTPConnectionPool(settings.SMTP_POOL_SIZE)
+    return pool
+
+
+def _build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
     message = MIMEMultipart()
     message["From"] = settings.EMAIL_FROM
     message["To"] = to_email
     message["Subject"] = subject
     message.attach(MIMEText(body, "plain"))
+    return message
+
 
+async def send_email_async(to_email: str, subject: str, body: str):
+    message = _build_message(to_email, subject, body)
+    pool = get_smtp_pool()
     try:
-        smtp = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=settings.SMTP_PORT, use_tls=True)
-        await smtp.connect()
-        await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        await smtp.send_message(message)
-        await smtp.quit()
-        logger.info(f"Email sent successfully to {to_email}")
+        await retry_with_backoff(lambda: pool.send_message(message), _RETRYABLE_SMTP_ERRORS,
+                                 description=f"Email to {to_email}")
+        logger.debug(f"Email sent successfully to {to_email}")
     except Exception as e:
         logger.error(f"Failed to send email to {to_email}: {str(e)}")
-        # 在实际应用中，你可能想要记录这个错误或重新抛出异常
+        raise
+
+
+async def send_emails_async(emails: Iterable[Tuple[str, str, str]]) -> List[Optional[Exception]]:
+    """
+    并发发送多封邮件 (to_email, subject, body)，共享连接池。
+
+    :return: 与输入顺序对应的结果，成功为 None，失败为异常
+    """
+    results = await asyncio.gather(*(send_email_async(*email) for email in emails), return_exceptions=True)
+    return [result if isinstance(result, Exception) else None for result in results]
 
 
 def send_email_sync(to_email: str, subject: str, content: str) -> None:
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from typing import Any, Callable, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """把排序键编码成不透明的游标字符串"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    """
+    解码游标。
+
+    :param cursor: encode_cursor 生成的字符串
+    :param parsers: 每个排序键的解析函数，例如 (datetime.fromisoformat, int)
+    :return: 排序键元组
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_before(columns: Sequence[Any], values: Sequence[Any]):
+    """
+    生成降序 keyset 分页条件：(c1, c2, ...) < (v1, v2, ...)。
+
+    展开为 OR/AND 形式，不依赖数据库对行值比较的支持，同时能命中对应的复合索引。
+    """
+    conditions = []
+    for i, column in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        conditions.append(and_(*prefix, column < values[i]))
+    return or_(*conditions)
+
+
+def resolve_include_total(include_total: Optional[bool], cursor: Optional[str]) -> bool:
+    # 默认：偏移分页返回总数，游标分页不返回（避免每页都做一次 COUNT）
+    if include_total is None:
+        return cursor is None
+    return include_total
@@ -0,0 +1,73 @@
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Iterable, Iterator, Optional
+
+from app.models.recurring_reservation import RecurrencePattern
+
+
+def iter_occurrences(
+        pattern: RecurrencePattern,
+        start_date: date,
+        end_date: date,
+        days_of_week: Optional[Iterable[int]] = None,
+        day_of_month: Optional[int] = None,
+        limit: Optional[int] = None
+) -> Iterator[date]:
+    """
+    按重复规则惰性生成 [start_date, end_date] 内的所有预约日期。
+
+    :param pattern: DAILY / WEEKLY / MONTHLY
+    :param days_of_week: 每周重复的星期（0 为周一），默认取 start_date 的星期
+    :param day_of_month: 每月重复的日期，默认取 start_date 的日期；当月没有这一天时跳过该月
+    :param limit: 最多生成的日期数量
+    """
+    produced = 0
+
+    def candidates() -> Iterator[date]:
+        if pattern == RecurrencePattern.DAILY:
+            current = start_date
+            while current <= end_date:
+                yield current
+                current += timedelta(days=1)
+
+        elif pattern == RecurrencePattern.WEEKLY:
+            weekdays = sorted(set(days_of_week)) if days_of_week else [start_date.weekday()]
+            week_start = start_date - timedelta(days=start_date.weekday())
+            while week_start <= end_date:
+                for weekday in weekdays:
+                    current = week_start + timedelta(days=weekday)
+                    if start_date <= current <= end_date:
+                        yield current
+                week_start += timedelta(weeks=1)
+
+        elif pattern == RecurrencePattern.MONTHLY:
+            day = day_of_month or start_date.day
+            year, month = start_date.year, start_date.month
+            while date(year, month, 1) <= end_date:
+                if day <= monthrange(year, month)[1]:
+                    current = date(year, month, day)
+                    if start_date <= current <= end_date:
+                        yield current
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        else:
+            raise ValueError(f"Unsupported recurrence pattern: {pattern}")
+
+    for occurrence in candidates():
+        if limit is not None and produced >= limit:
+            return
+        produced += 1
+        yield occurrence
+
+
+def format_days_of_week(days_of_week: Optional[Iterable[int]]) -> Optional[str]:
+    """[0, 2, 4] -> "0,2,4"，用于持久化"""
+    if not days_of_week:
+        return None
+    return ",".join(str(day) for day in sorted(set(days_of_week)))
+
+
+def parse_days_of_week(value: Optional[str]) -> Optional[list]:
+    if not value:
+        return None
+    return [int(day) for day in value.split(",")]
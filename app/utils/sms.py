@@ -1,10 +1,33 @@
+import asyncio
+import weakref
 import httpx
 from twilio.rest import Client
 from app.core.config import settings, get_logger
+from app.utils.delivery import retry_with_backoff
 
 logger = get_logger(__name__)
 
 
+class _RetryableSMSError(Exception):
+    """短信网关返回 429 或 5xx"""
+
+
+# 每个事件循环一个长连接客户端，keep-alive 连接在多条短信之间复用
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_sms_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=settings.SMS_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=settings.SMS_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.SMS_MAX_CONNECTIONS)
+        )
+    return client
+
+
 async def send_sms_async(phone_number: str, message: str):
     url = settings.SMS_API_URL
     payload = {
@@ -12,15 +35,21 @@ async def send_sms_async(phone_number: str, message: str):
         "message": message,
         "api_key": settings.SMS_API_KEY
     }
+    client = get_sms_client()
+
+    async def post():
+        response = await client.post(url, json=payload)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise _RetryableSMSError(f"SMS gateway returned {response.status_code}")
+        response.raise_for_status()
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-        logger.info(f"SMS sent successfully to {phone_number}")
+        await retry_with_backoff(post, (httpx.TransportError, _RetryableSMSError),
+                                 description=f"SMS to {phone_number}")
+        logger.debug(f"SMS sent successfully to {phone_number}")
     except Exception as e:
         logger.error(f"Failed to send SMS to {phone_number}: {str(e)}")
-        # 在实际应用中，你可能想要记录这个错误或重新抛出异常
+        raise
 
 
 def send_sms_sync(phone: str, message: str) -> None:
@@ -1,6 +1,13 @@
+import os
+
 from celery import Celery
 from celery.schedules import crontab
 
+# worker 进程使用独立的连接池配置；须在导入任务模块（进而创建数据库引擎）之前设置
+os.environ.setdefault("DB_POOL_PROFILE", "worker")
+
+from app.core.config import settings  # noqa: E402
+
 celery_app = Celery('tasks', broker='amqp://guest@localhost//')
 
 # 包含所有任务模块
@@ -13,7 +20,8 @@ celery_app.conf.update(
     include=[
         'celery_tasks.tasks.log_tasks',
         'celery_tasks.tasks.venue_tasks',
-        'celery_tasks.tasks.notification_tasks'
+        'celery_tasks.tasks.notification_tasks',
+        'celery_tasks.tasks.outbox_tasks'
     ]
 )
 
@@ -23,6 +31,14 @@ celery_app.conf.beat_schedule = {
         'task': 'celery_tasks.tasks.venue_tasks.create_future_venue_time_slot',
         'schedule': crontab(hour=0, minute=0),  # 每天午夜执行
     },
+    'dispatch-outbox': {
+        'task': 'celery_tasks.tasks.outbox_tasks.dispatch_outbox',
+        'schedule': settings.OUTBOX_DISPATCH_INTERVAL_SECONDS,
+    },
+    'purge-outbox': {
+        'task': 'celery_tasks.tasks.outbox_tasks.purge_outbox',
+        'schedule': crontab(hour=3, minute=0),
+    },
     'archive-logs': {
         'task': 'celery_tasks.tasks.log_tasks.archive_logs',
         'schedule': crontab(day_of_month='1', hour='0', minute='0'),  # 每月1日午夜执行
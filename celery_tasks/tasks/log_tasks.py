@@ -19,6 +19,23 @@ def log_user_operation(user_id: int, operation: str, details: dict = None):
     UserLog(**log_data).save()
 
 
+@celery_app.task
+def log_user_operations(entries: list):
+    """批量写入操作日志；entries 为 log_user_operation 参数字典的列表"""
+    logs = []
+    for entry in entries:
+        details = entry.get('details')
+        if details and 'password' in details:
+            details['password'] = '*' * len(details['password'])
+        logs.append(UserLog(
+            user_id=entry['user_id'],
+            operation=entry['operation'],
+            details=json.dumps(details) if details else None
+        ))
+    if logs:
+        UserLog.objects.insert(logs, load_bulk=False)
+
+
 @celery_app.task
 def archive_logs():
     archive_date = datetime.utcnow() - timedelta(days=90)
@@ -1,13 +1,48 @@
+import asyncio
+
 from celery_tasks.celery_app import celery_app
+from app.core.config import settings, get_logger
+from app.utils.delivery import delivery_loop
 from app.utils.email import send_email_async
 from app.utils.sms import send_sms_async
 
+logger = get_logger(__name__)
+
 
+# 发送协程都在进程内常驻的 delivery_loop 上执行，SMTP 连接和 HTTP 客户端在任务之间复用
 @celery_app.task(name='celery_tasks.tasks.notification_tasks.send_email')
 def send_email_task(email: str, subject: str, content: str):
-    send_email_async(email, subject, content)
+    delivery_loop.run(send_email_async(email, subject, content))
 
 
 @celery_app.task(name='celery_tasks.tasks.notification_tasks.send_sms')
 def send_sms_task(phone: str, content: str):
-    send_sms_async(phone, content)
+    delivery_loop.run(send_sms_async(phone, content))
+
+
+async def _deliver(deliveries: list) -> int:
+    """并发发送一批通知，同时进行的发送数不超过 DELIVERY_CONCURRENCY；返回失败数"""
+    semaphore = asyncio.Semaphore(settings.DELIVERY_CONCURRENCY)
+
+    async def bounded(send):
+        async with semaphore:
+            await send
+
+    sends = []
+    for email, phone, title, content in deliveries:
+        if email:
+            sends.append(bounded(send_email_async(email, title, content)))
+        if phone:
+            sends.append(bounded(send_sms_async(phone, content)))
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    return sum(1 for result in results if isinstance(result, Exception))
+
+
+@celery_app.task(name='celery_tasks.tasks.notification_tasks.deliver_notifications')
+def deliver_notifications_task(deliveries: list):
+    """发送一批通知的邮件和短信；deliveries 为 [email, phone, title, content] 列表"""
+    failed = delivery_loop.run(_deliver(deliveries))
+    if failed:
+        logger.error(f"Delivered a batch of {len(deliveries)} notifications with {failed} failed sends")
+    else:
+        logger.info(f"Delivered a batch of {len(deliveries)} notifications")
@@ -0,0 +1,32 @@
+from celery import shared_task
+from app.db.database import SessionLocal
+from app.core.config import settings
+from app.services.outbox_service import OutboxService
+
+# 单次任务最多连续处理的批次数，避免积压时一个任务长时间占用 worker
+MAX_BATCHES_PER_RUN = 20
+
+
+@shared_task
+def dispatch_outbox():
+    db = SessionLocal()
+    try:
+        service = OutboxService(db)
+        dispatched = 0
+        for _ in range(MAX_BATCHES_PER_RUN):
+            count = service.dispatch_pending(settings.OUTBOX_DISPATCH_BATCH_SIZE)
+            dispatched += count
+            if count < settings.OUTBOX_DISPATCH_BATCH_SIZE:
+                break
+        return dispatched
+    finally:
+        db.close()
+
+
+@shared_task
+def purge_outbox():
+    db = SessionLocal()
+    try:
+        return OutboxService(db).purge_dispatched(settings.OUTBOX_RETENTION_DAYS)
+    finally:
+        db.close()
@@ -8,6 +8,8 @@ def create_future_venue_time_slot():
     db = SessionLocal()
     try:
         service = VenueAvailableTimeSlotService(db)
-        service.create_future_time_slots(days_ahead=7)
+        stats = service.create_future_time_slots(days_ahead=7)
+        # 作为任务结果返回，便于在 Flower / result backend 中查看每次运行新增的行数
+        return stats._asdict()
     finally:
         db.close()